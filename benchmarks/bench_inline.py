@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark: single-pass inline tokenizer vs. the old four-regex insert_formatted_line
+
+Runs headless; widget inserts go to a recording stub that only counts calls.
+Usage: python benchmarks/bench_inline.py [--paragraphs N] [--repeat N]
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from preview import insert_formatted_line
+
+
+class RecordingWidget:
+    """只记录 insert 调用次数的假控件"""
+
+    def __init__(self):
+        self.calls = 0
+        self.chars = 0
+
+    def insert(self, index, *args):
+        self.calls += 1
+        self.chars += sum(len(arg) for arg in args[::2])
+
+
+def legacy_insert_formatted_line(text_widget, text, index='end'):
+    """旧实现：四次 re.finditer + 排序，每个片段单独 insert"""
+    if not text.strip():
+        text_widget.insert(index, '\n')
+        return
+
+    patterns = [
+        (r'\*\*(.*?)\*\*', 'bold'),
+        (r'\*(.*?)\*', 'italic'),
+        (r'`(.*?)`', 'code'),
+        (r'\[(.*?)\]\((.*?)\)', 'link'),
+    ]
+
+    matches = []
+    for pattern, tag in patterns:
+        for match in re.finditer(pattern, text):
+            matches.append((match.start(), match.end(), match, tag))
+
+    matches.sort(key=lambda x: x[0])
+
+    current_pos = 0
+    for start, end, match, tag in matches:
+        if start > current_pos:
+            text_widget.insert(index, text[current_pos:start])
+        if tag == 'link':
+            text_widget.insert(index, match.group(1), 'link')
+            text_widget.insert(index, f" ({match.group(2)})", 'link')
+        else:
+            text_widget.insert(index, match.group(1), tag)
+        current_pos = end
+
+    if current_pos < len(text):
+        text_widget.insert(index, text[current_pos:])
+
+    text_widget.insert(index, '\n')
+
+
+def make_document(paragraphs, seed=0):
+    """生成以长段落为主、夹杂行内格式的文档"""
+    rng = random.Random(seed)
+    words = ['Hugo', '博客', 'markdown', '预览', 'render', '中文内容', 'token', 'widget', '性能', 'scanner']
+    inline = ['**粗体文本**', '*斜体*', '`code_span()`', '[链接](https://example.com)', '**粗体 *嵌套* 文本**']
+
+    lines = []
+    for _ in range(paragraphs):
+        parts = []
+        for _ in range(rng.randint(40, 120)):
+            parts.append(rng.choice(inline) if rng.random() < 0.15 else rng.choice(words))
+        lines.append(' '.join(parts))
+    return lines
+
+
+def run(func, lines, repeat):
+    best = None
+    widget = None
+    for _ in range(repeat):
+        widget = RecordingWidget()
+        start = time.perf_counter()
+        for line in lines:
+            func(widget, line, 'end')
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, widget
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--paragraphs', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    lines = make_document(args.paragraphs)
+    total_chars = sum(len(line) for line in lines)
+    print(f"{len(lines)} paragraphs, {total_chars / 1e6:.2f}M chars, best of {args.repeat}")
+
+    results = {}
+    for name, func in (('legacy', legacy_insert_formatted_line), ('tokenizer', insert_formatted_line)):
+        elapsed, widget = run(func, lines, args.repeat)
+        results[name] = elapsed
+        print(f"{name:>10}: {elapsed * 1000:8.1f} ms  {total_chars / elapsed / 1e6:6.2f} Mchar/s  "
+              f"{widget.calls} insert calls")
+
+    print(f"speedup: {results['legacy'] / results['tokenizer']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
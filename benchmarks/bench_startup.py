@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Startup benchmark: import time of hugo_manager measured with python -X importtime
+
+Each run is a fresh interpreter. The best cumulative import time is compared
+against a baseline recorded with --update-baseline, the way bench_suite does.
+A fixed budget in milliseconds only holds on the machine it was picked on, so
+the baseline also stores the import time of tkinter (most of the startup, and
+outside this repo's control) from the same runs. The check scales the baseline
+by how fast tkinter imports here, then allows a tolerance and a noise floor.
+Modules that only preview, upload or batch mode need must not be imported at
+startup. Exits with status 1 when either check fails.
+Usage: python benchmarks/bench_startup.py [--repeat N] [--tolerance 0.25]
+       [--update-baseline] [--budget-ms MS] [--top N]
+"""
+
+import re
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "startup_baseline.json"
+# Imported by hugo_manager in the same run; its time measures the machine
+REFERENCE = 'tkinter'
+# Differences below this many milliseconds are noise, whatever the ratio
+NOISE_FLOOR_MS = 5.0
+
+# Imported on first use only; finding one of these at startup is a regression
+LAZY_MODULES = ['markdown', 'yaml', 'PIL', 'http.server', 'subprocess', 'webbrowser',
+                'concurrent.futures.process', 'difflib', 'tomllib']
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+
+def measure():
+    """在新的解释器中导入 hugo_manager，返回 {模块: (自身微秒, 累计微秒, 层级)}"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import hugo_manager'],
+                            cwd=str(ROOT), capture_output=True, text=True, check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return modules
+
+
+def eager_lazy_modules():
+    """返回启动时被导入的应当延迟导入的模块"""
+    code = ("import sys, hugo_manager; "
+            f"print(' '.join(m for m in {LAZY_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], cwd=str(ROOT),
+                            capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+    parser.add_argument('--update-baseline', action='store_true', help="把本次结果保存为基线")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="允许比基线慢的比例")
+    parser.add_argument('--budget-ms', type=float, default=None, help="另外检查一个固定的上限（毫秒）")
+    parser.add_argument('--top', type=int, default=10, help="显示累计耗时最多的直接依赖")
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.repeat)]
+    best = min(runs, key=lambda modules: modules['hugo_manager'][1])
+    total_ms = best['hugo_manager'][1] / 1000
+    reference_ms = min(modules[REFERENCE][1] for modules in runs) / 1000
+    times = sorted(modules['hugo_manager'][1] / 1000 for modules in runs)
+
+    print(f"import hugo_manager: best {total_ms:.1f} ms, median {times[len(times) // 2]:.1f} ms, "
+          f"{REFERENCE} {reference_ms:.1f} ms ({args.repeat} runs)")
+    direct = sorted(((cumulative, name) for name, (_, cumulative, level) in best.items() if level == 1),
+                    reverse=True)
+    for cumulative, name in direct[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    failed = False
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps({'total_ms': total_ms, 'reference_ms': reference_ms}, indent=2) + '\n',
+                                 encoding='utf-8')
+        print(f"baseline updated: {baseline_path}")
+    elif baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+        expected_ms = baseline['total_ms'] * reference_ms / baseline['reference_ms']
+        allowed_ms = max(expected_ms * (1 + args.tolerance), expected_ms + NOISE_FLOOR_MS)
+        print(f"baseline {baseline['total_ms']:.1f} ms, scaled to this machine {expected_ms:.1f} ms, "
+              f"allowed {allowed_ms:.1f} ms")
+        if total_ms > allowed_ms:
+            print(f"FAIL: startup import time {total_ms:.1f} ms exceeds {allowed_ms:.1f} ms")
+            failed = True
+    else:
+        print("no baseline yet; run with --update-baseline to store one")
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        print(f"FAIL: startup import time {total_ms:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        failed = True
+    eager = eager_lazy_modules()
+    if eager:
+        print(f"FAIL: imported at startup but should be lazy: {', '.join(eager)}")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite: the manager's hot paths on synthetic corpora of increasing size
+
+For every scale a corpus is generated in a temporary directory (see corpus.py).
+The suite then times list refresh (cold and warm), parse_markdown,
+load_article, save_article (with its revision record), preview rendering (Tk blocks and HTML),
+insert_formatted_line and the editor's per-line highlighting scan. Everything runs headless: widget inserts go to a stub
+that only counts calls. Results are written as JSON. When a baseline exists,
+any metric slower than the baseline by more than the tolerance fails the run.
+Usage: python benchmarks/bench_suite.py [--scales 100,1000,5000] [--repeat N]
+       [--baseline FILE] [--update-baseline] [--tolerance 0.25]
+"""
+
+import sys
+import json
+import time
+import shutil
+import random
+import argparse
+import platform
+import tempfile
+import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import generate_corpus
+from hugo_core.frontmatter import parse_document, parse_markdown, serialize_markdown
+from hugo_core.post_index import INDEX_DIR, PostIndex
+from hugo_core.search_index import SearchIndex
+from preview import insert_formatted_line, split_blocks, render_block
+from highlight import scan_line
+import hugo_manager
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+RESULTS_DIR = BENCH_DIR / "results"
+# Per-post operations use a fixed sample so their times are comparable across scales
+SAMPLE = 200
+# Differences below this many seconds are noise, whatever the ratio
+NOISE_FLOOR = 0.005
+
+
+class RecordingWidget:
+    """只记录 insert 调用的假控件"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def insert(self, index, *args):
+        self.calls += 1
+
+
+def best_of(repeat, func, setup=None):
+    """多次运行取最短时间（秒），setup 在每次计时前执行且不计时"""
+    best = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def refresh(blog):
+    """与 refresh_articles 的后台任务相同：刷新文章索引并同步搜索索引"""
+    post_index = PostIndex(blog)
+    post_index.refresh()
+    SearchIndex(blog).sync(post_index.snapshot())
+
+
+def run_scale(blog, posts, repeat):
+    """在一个语料上运行所有测试，返回 {名称: 秒}"""
+    rng = random.Random(len(posts))
+    sample = rng.sample(posts, min(SAMPLE, len(posts)))
+    contents = [path.read_text(encoding='utf-8') for path in posts]
+    sample_bodies = [parse_markdown(path.read_text(encoding='utf-8'))[1] for path in sample]
+    sample_lines = [line for body in sample_bodies for line in body.split('\n')]
+    results = {}
+
+    results['refresh_cold'] = best_of(repeat, lambda: refresh(blog),
+                                      setup=lambda: shutil.rmtree(blog / INDEX_DIR, ignore_errors=True))
+    results['refresh_warm'] = best_of(repeat, lambda: refresh(blog))
+
+    def parse_all():
+        for content in contents:
+            parse_markdown(content)
+    results['parse_markdown'] = best_of(repeat, parse_all)
+
+    def load_sample():
+        # The worker's read and parse plus the content hash computed when the editor is filled
+        for path in sample:
+            front_matter, body, fmt = parse_document(path.read_text(encoding='utf-8'))
+            hugo_manager.content_hash(serialize_markdown(front_matter, body, fmt))
+    results['load_article'] = best_of(repeat, load_sample)
+
+    manager = SimpleNamespace(blog_path=blog, saved_hashes={}, post_index=PostIndex(blog),
+                              search_index=SearchIndex(blog), revision_store=None)
+    # The real helpers, so the revision history is part of the measured save
+    for name in ('revisions', 'record_original'):
+        setattr(manager, name, getattr(hugo_manager.HugoManager, name).__get__(manager))
+    manager.post_index.refresh()
+    rounds = [0]
+
+    def save_sample():
+        # Every round changes the body, so the unchanged-content shortcut never applies
+        rounds[0] += 1
+        for path, body in zip(sample, sample_bodies):
+            front_matter, _, fmt = parse_document(path.read_text(encoding='utf-8'))
+            content = serialize_markdown(front_matter, f"{body}\n\nsave {rounds[0]}", fmt)
+            hugo_manager.HugoManager.write_article(manager, path, content)
+    results['save_article'] = best_of(repeat, save_sample)
+
+    def render_blocks():
+        widget = RecordingWidget()
+        for body in sample_bodies:
+            for kind, source in split_blocks(body):
+                render_block(widget, kind, source)
+    results['preview_blocks'] = best_of(repeat, render_blocks)
+
+    try:
+        from hugo_core.preview_server import MarkdownRenderer
+        MarkdownRenderer()
+    except ImportError:
+        pass  # markdown is not installed
+    else:
+        # A new renderer per run keeps the LRU cache out of the measurement
+        results['preview_html'] = best_of(repeat, lambda: [MarkdownRenderer().render(body)
+                                                           for body in sample_bodies[:50]])
+
+    def insert_lines():
+        widget = RecordingWidget()
+        for line in sample_lines:
+            insert_formatted_line(widget, line, 'end')
+    results['insert_formatted_line'] = best_of(repeat, insert_lines)
+
+    def highlight_lines():
+        state = None
+        for line in sample_lines:
+            state, spans = scan_line(line, state)
+    results['highlight_lines'] = best_of(repeat, highlight_lines)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """返回比基线慢超过容差的测试 [(名称, 基线, 当前)]"""
+    regressions = []
+    for name, value in sorted(results.items()):
+        old = baseline.get(name)
+        if old is None or value is None:
+            continue
+        if value > old * (1 + tolerance) and value - old > NOISE_FLOOR:
+            regressions.append((name, old, value))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', default="100,1000,5000", help="逗号分隔的文章数")
+    parser.add_argument('--body-kb', type=float, default=4)
+    parser.add_argument('--cjk-ratio', type=float, default=0.5)
+    parser.add_argument('--code-ratio', type=float, default=0.1)
+    parser.add_argument('--images', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="结果文件，默认写入 benchmarks/results/")
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+    parser.add_argument('--update-baseline', action='store_true', help="把本次结果保存为基线")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="允许比基线慢的比例")
+    args = parser.parse_args()
+
+    params = {key: getattr(args, key) for key in ('body_kb', 'cjk_ratio', 'code_ratio', 'images', 'repeat')}
+    results = {}
+    for scale in [int(value) for value in args.scales.split(',')]:
+        workdir = Path(tempfile.mkdtemp(prefix=f"hugo-bench-{scale}-"))
+        try:
+            posts = generate_corpus(workdir, scale, args.body_kb, args.cjk_ratio, args.code_ratio, args.images)
+            for name, seconds in run_scale(workdir, posts, args.repeat).items():
+                results[f"{name}@{scale}"] = seconds
+                print(f"{name + '@' + str(scale):>28}: {seconds * 1000:9.1f} ms")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'params': params,
+        'results': results,
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{datetime.datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
+    print(f"results written to {output}")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
+        print(f"baseline updated: {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print("no baseline yet; run with --update-baseline to store one")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+    if baseline.get('params') != params:
+        print("baseline was recorded with different corpus parameters; skipping comparison")
+        return 0
+    regressions = compare(results, baseline['results'], args.tolerance)
+    for name, old, new in regressions:
+        print(f"REGRESSION {name}: {old * 1000:.1f} ms -> {new * 1000:.1f} ms ({new / old:.2f}x)")
+    if regressions:
+        return 1
+    print(f"OK: no regressions beyond {args.tolerance:.0%} of the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
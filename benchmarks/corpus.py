@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic blog corpus generator for the benchmarks
+
+Writes content/posts/*.md (and small PNG files under static/uploads) with a
+configurable number of posts, body size, share of CJK text, code blocks and
+images. The same seed always produces the same corpus.
+Usage: python benchmarks/corpus.py OUT [--posts N] [--body-kb N] [--cjk-ratio R] [--code-ratio R] [--images N]
+"""
+
+import zlib
+import random
+import struct
+import argparse
+import datetime
+from pathlib import Path
+
+CJK_WORDS = ['博客', '文章', '性能', '索引', '预览', '搜索', '构建', '部署', '图片', '标签', '分类', '编辑器',
+             '渲染', '缓存', '并行', '增量', '草稿', '主题', '静态文件', '中文内容', '逆向', '总结']
+LATIN_WORDS = ['hugo', 'markdown', 'render', 'widget', 'index', 'token', 'scanner', 'cache', 'deploy',
+               'thread', 'process', 'static', 'theme', 'layout', 'python', 'search', 'preview', 'build']
+INLINE = ['**粗体文本**', '*斜体*', '`code_span()`', '[链接](https://example.com)', '**bold *nested* text**']
+CODE_SNIPPET = """def handler(event):
+    # synthetic code block
+    for item in event.items:
+        print(item.name, item.value)
+    return len(event.items)"""
+
+TAGS = [f"tag{i}" for i in range(40)] + ['技术', '日常', '逆向', '随笔', 'Hugo', 'Python']
+CATEGORIES = ['技术', '日常', '随笔', '笔记', '项目', '工具']
+
+
+def tiny_png(width=8, height=8, color=(200, 120, 40)):
+    """生成一张纯色 PNG，不依赖 Pillow"""
+    raw = b''.join(b'\x00' + bytes(color) * width for _ in range(height))
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw))
+            + chunk(b'IEND', b''))
+
+
+def make_paragraph(rng, cjk_ratio):
+    parts = []
+    for _ in range(rng.randint(20, 60)):
+        roll = rng.random()
+        if roll < 0.1:
+            parts.append(rng.choice(INLINE))
+        elif roll < 0.1 + 0.9 * cjk_ratio:
+            parts.append(rng.choice(CJK_WORDS))
+        else:
+            parts.append(rng.choice(LATIN_WORDS))
+    return ' '.join(parts)
+
+
+def make_body(rng, body_kb, cjk_ratio, code_ratio, image_urls):
+    """生成约 body_kb KB 的正文，图片链接均匀分布在段落之间"""
+    blocks = []
+    size = 0
+    target = body_kb * 1024
+    while size < target:
+        roll = rng.random()
+        if len(blocks) % 8 == 0:
+            block = f"## {make_paragraph(rng, cjk_ratio)[:30]}"
+        elif roll < code_ratio:
+            block = f"```python\n{CODE_SNIPPET}\n```"
+        elif roll < code_ratio + 0.05:
+            block = f"> {make_paragraph(rng, cjk_ratio)}"
+        else:
+            block = make_paragraph(rng, cjk_ratio)
+        blocks.append(block)
+        size += len(block.encode('utf-8')) + 2
+
+    for i, url in enumerate(image_urls):
+        position = (i + 1) * len(blocks) // (len(image_urls) + 1)
+        blocks.insert(position, f"![图片{i}]({url})")
+    return '\n\n'.join(blocks)
+
+
+def generate_corpus(blog_path, posts=1000, body_kb=4, cjk_ratio=0.5, code_ratio=0.1, images=1, seed=0):
+    """在 blog_path 下生成 content/posts 和 static/uploads，返回文章路径列表"""
+    rng = random.Random(seed)
+    blog_path = Path(blog_path)
+    posts_path = blog_path / "content" / "posts"
+    posts_path.mkdir(parents=True, exist_ok=True)
+    png = tiny_png()
+    start = datetime.datetime(2020, 1, 1, 9, 0, 0)
+
+    paths = []
+    for i in range(posts):
+        name = f"post-{i:05d}"
+        image_urls = []
+        if images:
+            image_dir = blog_path / "static" / "uploads" / "posts" / name
+            image_dir.mkdir(parents=True, exist_ok=True)
+            for j in range(images):
+                (image_dir / f"{j:03d}.png").write_bytes(png)
+                image_urls.append(f"/uploads/posts/{name}/{j:03d}.png")
+
+        date = start + datetime.timedelta(hours=7 * i)
+        title = f"{rng.choice(CJK_WORDS)}{rng.choice(CJK_WORDS)} {rng.choice(LATIN_WORDS)} {i}"
+        front_matter = '\n'.join([
+            "---",
+            f'title: "{title}"',
+            f'date: "{date.strftime("%Y-%m-%dT%H:%M:%S+08:00")}"',
+            f"draft: {'true' if rng.random() < 0.1 else 'false'}",
+            'author: "bench"',
+            "tags: [" + ', '.join(f'"{tag}"' for tag in rng.sample(TAGS, rng.randint(1, 4))) + "]",
+            f'categories: ["{rng.choice(CATEGORIES)}"]',
+            'description: ""',
+            "---",
+        ])
+        body = make_body(rng, body_kb, cjk_ratio, code_ratio, image_urls)
+        path = posts_path / f"{name}.md"
+        path.write_text(f"{front_matter}\n\n{body}\n", encoding='utf-8')
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('output', help="生成的博客目录")
+    parser.add_argument('--posts', type=int, default=1000)
+    parser.add_argument('--body-kb', type=float, default=4)
+    parser.add_argument('--cjk-ratio', type=float, default=0.5)
+    parser.add_argument('--code-ratio', type=float, default=0.1)
+    parser.add_argument('--images', type=int, default=1, help="每篇文章的图片数")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    paths = generate_corpus(args.output, args.posts, args.body_kb, args.cjk_ratio,
+                            args.code_ratio, args.images, args.seed)
+    print(f"wrote {len(paths)} posts to {Path(args.output) / 'content' / 'posts'}")
+
+
+if __name__ == "__main__":
+    main()
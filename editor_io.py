@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Chunked loading and saving of very large posts in the editor
+
+Both directions move a bounded piece of text per root.after tick, so a
+multi-megabyte post never blocks the Tk main loop and never exists as one
+big Python string. The editor is read-only while a transfer is running.
+"""
+
+import os
+import codecs
+import hashlib
+import tkinter as tk
+
+from hugo_core import tracing
+
+# Files at least this large are loaded in chunks
+LARGE_FILE = 1024 * 1024
+# Editor contents with at least this many characters are saved in chunks
+LARGE_TEXT = 256 * 1024
+CHUNK_BYTES = 128 * 1024
+CHUNK_CHARS = 128 * 1024
+TICK = 1  # ms between chunks, enough for Tk to process pending events
+
+
+class ChunkedLoader:
+    """把文件中 offset 之后的正文分块插入文本控件
+
+    每次只读取 chunk_size 字节，增量解码后插入，被切开的多字节字符和 CRLF 会留到下一块。
+    正文开头的空行和结尾的空白与 parse_document 一样被去掉。
+    digest 是已经喂入文章头部的 sha1 对象，插入的每一块都会继续更新它，
+    加载完成后它就是编辑器内容对应的文章哈希。
+    """
+
+    def __init__(self, root, text_widget, path, offset, digest=None, on_progress=None, on_done=None,
+                 on_error=None, strip_leading=True, chunk_size=CHUNK_BYTES):
+        self.root = root
+        self.text = text_widget
+        self.path = path
+        self.offset = offset
+        self.digest = digest or hashlib.sha1()
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.leading = strip_leading
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        self.pending = ''
+        self.file = None
+        self.size = 0
+        self._after_id = None
+
+    def start(self):
+        self.file = open(self.path, 'rb')
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.file.seek(self.offset)
+        self.text.configure(state=tk.DISABLED)
+        self._after_id = self.root.after(TICK, self._tick)
+
+    def cancel(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self._close()
+
+    def _close(self):
+        self.text.configure(state=tk.NORMAL)
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def _tick(self):
+        self._after_id = None
+        with tracing.span('load.chunk'):
+            self._read_chunk()
+
+    def _read_chunk(self):
+        try:
+            data = self.file.read(self.chunk_size)
+        except OSError as e:
+            self._close()
+            if self.on_error is not None:
+                self.on_error(e)
+            return
+        final = len(data) < self.chunk_size
+
+        text = self.pending + self.decoder.decode(data, final)
+        if self.leading:
+            text = text.lstrip('\r\n')
+            self.leading = not text
+        # Trailing whitespace waits for the next chunk; at the end of the file it is dropped
+        content = text.rstrip()
+        self.pending = text[len(content):]
+        if content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+            self.digest.update(content.encode('utf-8'))
+            self.text.configure(state=tk.NORMAL)
+            self.text.insert(tk.END, content)
+            self.text.configure(state=tk.DISABLED)
+
+        if final:
+            self._close()
+            if self.on_done is not None:
+                self.on_done(self.digest.hexdigest())
+            return
+        if self.on_progress is not None:
+            self.on_progress(min(self.file.tell() / max(self.size, 1), 1.0))
+        self._after_id = self.root.after(TICK, self._tick)
+
+
+class ChunkedSaver:
+    """分块把文本控件的内容写入 writer（例如 AtomicFile）
+
+    先写 header，再按 chunk_chars 个字符一块写出正文，正文结尾的空白不写入，
+    与 collect_article 得到的内容一致。同时计算整篇内容的 sha1，完成后交给 on_done。
+    """
+
+    def __init__(self, root, text_widget, writer, header, on_progress=None, on_done=None, on_error=None,
+                 chunk_chars=CHUNK_CHARS):
+        self.root = root
+        self.text = text_widget
+        self.writer = writer
+        self.header = header
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.chunk_chars = chunk_chars
+        self.digest = hashlib.sha1()
+        self.index = '1.0'
+        self.end = '1.0'
+        self._after_id = None
+
+    def start(self):
+        # Stop right after the last non-whitespace character, like body.rstrip()
+        last = self.text.search(r'\S', tk.END, backwards=True, regexp=True)
+        if last:
+            self.end = self.text.index(f"{last} +1c")
+        self._write(self.header)
+        self.text.configure(state=tk.DISABLED)
+        self._after_id = self.root.after(TICK, self._tick)
+
+    def cancel(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self.text.configure(state=tk.NORMAL)
+
+    def _write(self, text):
+        self.writer.write(text)
+        self.digest.update(text.encode('utf-8'))
+
+    def _tick(self):
+        self._after_id = None
+        with tracing.span('save.chunk'):
+            self._write_chunk()
+
+    def _write_chunk(self):
+        try:
+            stop = self.text.index(f"{self.index} +{self.chunk_chars}c")
+            if self.text.compare(stop, '>=', self.end):
+                stop = self.end
+            self._write(self.text.get(self.index, stop))
+        except (OSError, ValueError) as e:
+            self.cancel()
+            if self.on_error is not None:
+                self.on_error(e)
+            return
+        self.index = stop
+
+        if self.text.compare(stop, '>=', self.end):
+            self.text.configure(state=tk.NORMAL)
+            if self.on_done is not None:
+                self.on_done(self.digest.hexdigest())
+            return
+        if self.on_progress is not None:
+            total = int(self.end.split('.')[0])
+            self.on_progress(int(stop.split('.')[0]) / max(total, 1))
+        self._after_id = self.root.after(TICK, self._tick)
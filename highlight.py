@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental Markdown syntax highlighting for the editor
+"""
+
+import re
+
+from hugo_core import tracing
+from preview import HEADING_RE, INLINE_RE
+
+FENCE_RE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+QUOTE_RE = re.compile(r'^ {0,3}>')
+FRONT_MATTER_DELIMITERS = ('---', '+++')
+
+INLINE_TAGS = {'code': 'md_code', 'strong_em': 'md_bold', 'bold': 'md_bold',
+               'italic': 'md_italic', 'url': 'md_link'}
+TAGS = ('md_front', 'md_heading', 'md_quote', 'md_fence', 'md_code', 'md_bold', 'md_italic', 'md_link')
+# Lines whose tags are out of date; Tk moves the tag along with edits
+TODO_TAG = 'md_todo'
+
+# End state of a line that has been edited but not rescanned yet
+UNKNOWN = object()
+
+
+def setup_editor_tags(text_widget, family='Consolas', size=11):
+    """设置编辑器的高亮标签"""
+    text_widget.tag_configure('md_front', foreground='#7f8c8d', background='#f7f7f2')
+    text_widget.tag_configure('md_heading', font=(family, size, 'bold'), foreground='#2c3e50')
+    text_widget.tag_configure('md_quote', foreground='#7f8c8d')
+    text_widget.tag_configure('md_fence', foreground='#555555', background='#f3f4f5')
+    text_widget.tag_configure('md_code', foreground='#c0392b', background='#f3f4f5')
+    text_widget.tag_configure('md_bold', font=(family, size, 'bold'))
+    text_widget.tag_configure('md_italic', font=(family, size, 'italic'))
+    text_widget.tag_configure('md_link', foreground='#2980b9', underline=True)
+
+
+def next_state(line, state, first_line=False):
+    """只计算行尾状态（None、('fence', 标记) 或 ('front', 分隔符)），不生成标签"""
+    if state is None:
+        if first_line and line.rstrip() in FRONT_MATTER_DELIMITERS:
+            return ('front', line.rstrip())
+        match = FENCE_RE.match(line)
+        return ('fence', match.group(1)) if match else None
+    kind, marker = state
+    stripped = line.strip()
+    if kind == 'front':
+        return None if stripped == marker else state
+    # A closing fence uses the same character, at least as many times, and nothing else
+    if len(stripped) >= len(marker) and stripped == marker[0] * len(stripped):
+        return None
+    return state
+
+
+def scan_line(line, state, first_line=False):
+    """返回 (行尾状态, [(标签, 起始列, 结束列)])"""
+    end_state = next_state(line, state, first_line)
+    if state is not None or end_state is not None:
+        # Front matter and fenced code (including the fence lines) are tagged as one block
+        kind = (state or end_state)[0]
+        return end_state, [('md_front' if kind == 'front' else 'md_fence', 0, len(line))]
+
+    if HEADING_RE.match(line):
+        return None, [('md_heading', 0, len(line))]
+    spans = []
+    if QUOTE_RE.match(line):
+        spans.append(('md_quote', 0, len(line)))
+    for match in INLINE_RE.finditer(line):
+        spans.append((INLINE_TAGS[match.lastgroup], match.start(), match.end()))
+    return None, spans
+
+
+class MarkdownHighlighter:
+    """编辑器的增量语法高亮
+
+    拦截文本控件的 insert/delete/replace 命令，只把受影响的行标记为待处理，
+    并维护每一行行尾的代码块/front matter 状态。空闲时从第一处改动开始重新计算状态，
+    直到改动区域之后某行的状态与原来一致为止（打开或关闭代码块会把变化传递下去）。
+    标签只在可见区域上下 margin 行内重新生成，其余待处理的行在滚动到附近时再处理，
+    因此输入延迟与文档长度无关。
+    """
+
+    CHUNK_LINES = 2000
+
+    def __init__(self, root, text_widget, margin=50):
+        self.root = root
+        self.text = text_widget
+        self.margin = margin
+        self.ends = [UNKNOWN]
+        self.dirty_from = None
+        self.dirty_to = 0
+        self._after_id = None
+
+        setup_editor_tags(self.text)
+
+        # Route the widget's Tcl command through us, the same trick IDLE uses
+        widget = str(self.text)
+        self._orig = widget + '_orig'
+        self.text.tk.call('rename', widget, self._orig)
+        self.text.tk.createcommand(widget, self._dispatch)
+
+        # Scrolling and resizing expose lines that may still be waiting for tags
+        self._yscroll = self.text.cget('yscrollcommand')
+        self.text.configure(yscrollcommand=self._on_yscroll)
+        self.text.bind('<Configure>', lambda e: self.schedule(), add='+')
+
+    def _call(self, *args):
+        return self.text.tk.call(self._orig, *args)
+
+    def _line(self, index):
+        """索引所在的行号（超出末尾时取最后一行，与 Tk 的插入/删除行为一致）"""
+        index = self._call('index', index)
+        last = self._call('index', 'end-1c')
+        if self._call('compare', index, '>', last):
+            index = last
+        return int(str(index).split('.')[0])
+
+    def _dispatch(self, operation, *args):
+        if operation == 'insert' and args:
+            line = self._line(args[0])
+            result = self._call(operation, *args)
+            added = sum(chars.count('\n') for chars in args[1::2])
+            self._edited(line, line, added)
+        elif operation == 'delete' and 0 < len(args) <= 2:
+            first = self._line(args[0])
+            last = self._line(args[1] if len(args) == 2 else f"{args[0]} +1c")
+            result = self._call(operation, *args)
+            self._edited(first, max(first, last), 0)
+        elif operation == 'replace' and len(args) >= 3:
+            first = self._line(args[0])
+            last = max(first, self._line(args[1]))
+            result = self._call(operation, *args)
+            added = sum(chars.count('\n') for chars in args[2::2])
+            self._edited(first, last, added)
+        elif operation in ('insert', 'delete', 'replace'):
+            # Unusual argument lists: rescan everything
+            result = self._call(operation, *args)
+            self._edited(1, len(self.ends), self._line('end-1c') - 1)
+        else:
+            return self._call(operation, *args)
+        return result
+
+    def _edited(self, first, last, added):
+        """行 first..last 被替换成 added+1 行"""
+        self.ends[first - 1:last] = [UNKNOWN] * (added + 1)
+        end = first + added
+        self._call('tag', 'add', TODO_TAG, f"{first}.0", f"{end}.end")
+
+        removed = last - first
+        if self.dirty_from is None:
+            self.dirty_from, self.dirty_to = first, end
+        else:
+            if self.dirty_to > last:
+                self.dirty_to += added - removed
+            elif self.dirty_to >= first:
+                self.dirty_to = end
+            self.dirty_from = min(self.dirty_from, first)
+            self.dirty_to = max(self.dirty_to, end)
+        self.schedule()
+
+    def _on_yscroll(self, first, last):
+        if self._yscroll:
+            self.text.tk.call(self._yscroll, first, last)
+        self.schedule()
+
+    def schedule(self):
+        if self._after_id is None:
+            self._after_id = self.root.after_idle(self.update)
+
+    def update(self):
+        self._after_id = None
+        with tracing.span('highlight.update'):
+            line_count = self._line('end-1c')
+            if len(self.ends) != line_count:
+                # Should not happen, but never let the state table drift from the text
+                self.ends = [UNKNOWN] * line_count
+                self.dirty_from, self.dirty_to = 1, line_count
+                self._call('tag', 'add', TODO_TAG, '1.0', 'end')
+            if self.dirty_from is not None:
+                self._update_states()
+            self._tag_viewport()
+
+    def _iter_lines(self, first, last):
+        """分块读取 first..last 行；块从小到大增长，单次输入通常只读几行"""
+        size = 64
+        while first <= last:
+            chunk_end = min(first + size - 1, last)
+            text = str(self._call('get', f"{first}.0", f"{chunk_end}.end"))
+            yield from enumerate(text.split('\n'), first)
+            first = chunk_end + 1
+            size = min(size * 4, self.CHUNK_LINES)
+
+    def _update_states(self):
+        """从第一处改动开始重新计算行尾状态，起始状态变了的行也标记为待处理"""
+        first = self.dirty_from
+        dirty_to = self.dirty_to
+        self.dirty_from = None
+        state = self.ends[first - 2] if first > 1 else None
+        # Old end state of the previous line, i.e. the old start state of this one
+        previous = state
+        ranges = []
+        run = None
+
+        for line, text in self._iter_lines(first, len(self.ends)):
+            if previous != state:
+                if run is None:
+                    run = line
+            elif run is not None:
+                ranges += (f"{run}.0", f"{line - 1}.end")
+                run = None
+            old = self.ends[line - 1]
+            state = next_state(text, state, line == 1)
+            self.ends[line - 1] = state
+            # Past the edits, an unchanged end state means every later line is unchanged too
+            if line > dirty_to and old == state:
+                break
+            previous = old
+
+        if run is not None:
+            ranges += (f"{run}.0", f"{line}.end")
+        if ranges:
+            self._call('tag', 'add', TODO_TAG, *ranges)
+
+    def _tag_viewport(self):
+        """只处理可见区域附近待处理的行"""
+        top = int(str(self._call('index', '@0,0')).split('.')[0])
+        bottom = int(str(self._call('index', f"@0,{self.text.winfo_height()}")).split('.')[0])
+        start = f"{max(top - self.margin, 1)}.0"
+        stop = f"{bottom + self.margin}.end"
+
+        while True:
+            found = self._call('tag', 'nextrange', TODO_TAG, start, stop)
+            if not found:
+                break
+            first = int(str(found[0]).split('.')[0])
+            last = min(int(str(found[1]).split('.')[0]), bottom + self.margin)
+            self._tag_lines(first, last)
+            start = f"{last + 1}.0"
+
+    def _tag_lines(self, first, last):
+        lines = str(self._call('get', f"{first}.0", f"{last}.end")).split('\n')
+        ranges = {tag: [] for tag in TAGS}
+        state = self.ends[first - 2] if first > 1 else None
+        for number, line in enumerate(lines, first):
+            state, spans = scan_line(line, state, number == 1)
+            for tag, start, end in spans:
+                ranges[tag] += (f"{number}.{start}", f"{number}.{end}")
+
+        for tag in TAGS:
+            self._call('tag', 'remove', tag, f"{first}.0", f"{last}.end")
+            if ranges[tag]:
+                self._call('tag', 'add', tag, *ranges[tag])
+        self._call('tag', 'remove', TODO_TAG, f"{first}.0", f"{last}.end +1c")
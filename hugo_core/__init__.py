@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""
+Tk-free core of the Hugo manager: post parsing, indexes, batch edits, build and deploy
+
+The GUI in hugo_manager.py and the command line tools import from here.
+Heavy dependencies (PyYAML, markdown, Pillow, process pools, the HTTP server)
+are imported on first use, so importing a module stays cheap.
+"""
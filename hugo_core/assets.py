@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asset reference graph for static/: orphan and missing file detection, and GC
+
+Every markdown file under content/ is scanned for image and link
+references (markdown links and images, reference definitions, src/href
+attributes and shortcode src="..." parameters). Absolute paths such as
+/uploads/posts/a/1.png are resolved against static/. Extraction runs in a
+process pool and is cached by file content hash, so only edited posts are
+read again. Configuration, layouts and data files are searched for asset
+paths too; anything mentioned there counts as used, never as an orphan.
+
+Orphans are files under the GC scope (static/uploads by default) that
+nothing references. `gc` moves them, together with their stale copies in
+public/, into a dated directory under .hugo_manager/orphans/. Hugo never
+copies from there, and `restore` puts everything back.
+
+Usage: python -m hugo_core.assets [report | gc [--dry-run] [--min-age DAYS] | restore DIR]
+"""
+
+import os
+import re
+import json
+import time
+import shutil
+import argparse
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from .build_manifest import FileHashCache, INPUT_FILES, OUTPUT_DIR, read_theme
+from .image_pipeline import DATA_FILE
+from .post_index import INDEX_DIR
+
+CACHE_FILE = "asset_refs.json"
+ORPHAN_DIR = "orphans"
+MOVED_FILE = "moved.json"
+SCOPES = ("uploads",)
+# Files referenced only from here are still in use (site logo in hugo.toml, theme partials, ...)
+PIN_DIRS = ["layouts", "data", "assets", "i18n", "config"]
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg', '.avif', '.bmp', '.ico'}
+# Posts to parse before a process pool is worth starting
+PARALLEL_THRESHOLD = 200
+
+# Stays on one line, so an unclosed "[text](" cannot swallow the next image
+LINK_RE = re.compile(r'\]\([ \t]*<?([^()\[\]\s>]+)')
+REFERENCE_RE = re.compile(r'^\s{0,3}\[[^\]]+\]:\s*<?([^\s>]+)', re.MULTILINE)
+ATTRIBUTE_RE = re.compile(r'''\b(?:src|href|link)\s*=\s*["']([^"']+)''', re.IGNORECASE)
+
+
+def local_path(url):
+    """把引用中的站内绝对路径转换为 static/ 下的相对路径，其它引用返回 None"""
+    parts = urlsplit(url.strip())
+    if parts.scheme or parts.netloc or not parts.path.startswith('/'):
+        return None
+    path = unquote(parts.path).strip('/')
+    return path or None
+
+
+def extract_references(text):
+    """返回文章中引用的站内路径（相对于 static/）的有序列表"""
+    refs = []
+    for pattern in (LINK_RE, REFERENCE_RE, ATTRIBUTE_RE):
+        for match in pattern.finditer(text):
+            path = local_path(match.group(1))
+            if path is not None:
+                refs.append(path)
+    return sorted(set(refs))
+
+
+def references_in_file(path):
+    """在子进程中读取并解析一个 markdown 文件"""
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return extract_references(f.read())
+    except OSError:
+        return []
+
+
+def pinned_references(blog_path, scopes=SCOPES):
+    """在配置、模板和数据文件中以纯文本查找 scope 下的路径"""
+    blog_path = Path(blog_path)
+    pattern = re.compile(r'(?<![\w.-])/?((?:%s)/[^\s"\'()<>\[\]{},]+)' % '|'.join(map(re.escape, scopes)))
+    paths = [blog_path / name for name in INPUT_FILES] + [blog_path / name for name in PIN_DIRS]
+    theme = read_theme(blog_path)
+    if theme:
+        paths.append(blog_path / "themes" / theme)
+
+    pinned = set()
+    for path in paths:
+        files = [path] if path.is_file() else [Path(dirpath) / name for dirpath, _, names in os.walk(path)
+                                                for name in names]
+        for file_path in files:
+            # Generated from static/uploads itself, so it mentions every image
+            if file_path == blog_path / DATA_FILE:
+                continue
+            try:
+                text = file_path.read_text(encoding='utf-8')
+            except (OSError, UnicodeDecodeError):
+                continue
+            pinned.update(unquote(match.group(1)).rstrip('/') for match in pattern.finditer(text))
+    return pinned
+
+
+class AssetGraph:
+    """content/ 中的 markdown 文件与 static/ 中文件之间的引用关系
+
+    refs 为 {文章: [static 相对路径]}，users 为反向的 {static 相对路径: {文章}}。
+    """
+
+    VERSION = 1
+
+    def __init__(self, blog_path, scopes=SCOPES, workers=None):
+        self.blog_path = Path(blog_path)
+        self.content_path = self.blog_path / "content"
+        self.static_path = self.blog_path / "static"
+        self.cache_path = self.blog_path / INDEX_DIR / CACHE_FILE
+        self.scopes = scopes
+        self.workers = workers
+        self.hash_cache = FileHashCache()
+        self.cached_refs = {}
+        self.refs = {}
+        self.users = {}
+        self.pinned = set()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == self.VERSION:
+            self.hash_cache = FileHashCache(data.get('hash_cache', {}))
+            self.cached_refs = data.get('refs', {})
+
+    def save(self):
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'hash_cache': self.hash_cache.entries, 'refs': self.cached_refs},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+    def build(self):
+        """重新建立引用关系，只解析内容哈希没有缓存的文件，返回解析的文件数"""
+        hashes = {path: digest for path, digest in self.hash_cache.scan(self.content_path, ["."]).items()
+                  if path.endswith('.md')}
+        pending = sorted({digest: path for path, digest in hashes.items() if digest not in self.cached_refs}.items())
+
+        if len(pending) >= PARALLEL_THRESHOLD:
+            from concurrent.futures import ProcessPoolExecutor
+
+            workers = self.workers or os.cpu_count() or 1
+            chunksize = max(len(pending) // (workers * 4), 1)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(references_in_file, [str(self.content_path / path) for _, path in pending],
+                                       chunksize=chunksize)
+                parsed = dict(zip((digest for digest, _ in pending), results))
+        else:
+            parsed = {digest: references_in_file(self.content_path / path) for digest, path in pending}
+
+        # Keep only the hashes of files that still exist
+        self.cached_refs = {digest: parsed[digest] if digest in parsed else self.cached_refs[digest]
+                            for digest in set(hashes.values())}
+        self.refs = {path: self.cached_refs[digest] for path, digest in hashes.items()}
+        self.users = {}
+        for path, refs in self.refs.items():
+            for ref in refs:
+                self.users.setdefault(ref, set()).add(path)
+        self.pinned = pinned_references(self.blog_path, self.scopes)
+        self.save()
+        return len(pending)
+
+    def in_scope(self, relative):
+        return relative.split('/', 1)[0] in self.scopes
+
+    def is_pinned(self, relative):
+        """配置或模板提到了这个文件或它所在的目录"""
+        while relative:
+            if relative in self.pinned:
+                return True
+            relative = relative.rpartition('/')[0]
+        return False
+
+    def static_files(self):
+        """GC 范围内的文件 {相对路径: 大小}"""
+        files = {}
+        for scope in self.scopes:
+            for dirpath, dirnames, filenames in os.walk(self.static_path / scope):
+                dirnames[:] = [name for name in dirnames if not name.startswith('.')]
+                for name in filenames:
+                    path = Path(dirpath) / name
+                    try:
+                        files[path.relative_to(self.static_path).as_posix()] = path.stat().st_size
+                    except OSError:
+                        continue
+        return files
+
+    def orphans(self, files=None):
+        """没有任何文章、配置或模板引用的文件 {相对路径: 大小}"""
+        files = self.static_files() if files is None else files
+        return {path: size for path, size in files.items() if path not in self.users and not self.is_pinned(path)}
+
+    def missing(self):
+        """被引用但 static/ 中不存在的文件 {相对路径: [引用它的文章]}
+
+        只检查 GC 范围内的路径和图片，站内页面链接（/posts/...）不算。
+        """
+        result = {}
+        for ref, users in self.users.items():
+            if not (self.in_scope(ref) or Path(ref).suffix.lower() in IMAGE_EXTENSIONS):
+                continue
+            if not (self.static_path / ref).is_file():
+                result[ref] = sorted(users)
+        return result
+
+    def collect(self, min_age=0, dry_run=False):
+        """把孤立文件（以及 public/ 中的旧副本）移到 .hugo_manager/orphans/<时间>/
+
+        修改时间在 min_age 秒以内的文件不动（可能属于还没保存的文章）。
+        返回 (移动的文件列表, 回收的字节数（含 public/ 副本）, 隔离目录)。
+        """
+        now = time.time()
+        candidates = []
+        for relative, size in sorted(self.orphans().items()):
+            try:
+                if now - (self.static_path / relative).stat().st_mtime < min_age:
+                    continue
+            except OSError:
+                continue
+            try:
+                size += (self.blog_path / OUTPUT_DIR / relative).stat().st_size
+            except OSError:
+                pass
+            candidates.append((relative, size))
+
+        target = self.blog_path / INDEX_DIR / ORPHAN_DIR / time.strftime("%Y%m%d-%H%M%S")
+        total = sum(size for _, size in candidates)
+        if dry_run or not candidates:
+            return [relative for relative, _ in candidates], total, target
+
+        moved = []
+        for relative, size in candidates:
+            for root in ("static", OUTPUT_DIR):
+                source = self.blog_path / root / relative
+                if not source.is_file():
+                    continue
+                destination = target / root / relative
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                shutil.move(str(source), str(destination))
+                moved.append(f"{root}/{relative}")
+            _remove_empty_parents(self.blog_path / "static" / relative, self.static_path)
+            _remove_empty_parents(self.blog_path / OUTPUT_DIR / relative, self.blog_path / OUTPUT_DIR)
+        with open(target / MOVED_FILE, 'w', encoding='utf-8') as f:
+            json.dump(moved, f, ensure_ascii=False, indent=1)
+        return [relative for relative, _ in candidates], total, target
+
+
+def _remove_empty_parents(path, stop):
+    """删除 path 所在的空目录，直到 stop 为止"""
+    parent = path.parent
+    while parent != stop and stop in parent.parents:
+        try:
+            parent.rmdir()
+        except OSError:
+            return
+        parent = parent.parent
+
+
+def restore(blog_path, directory):
+    """把 collect 移走的文件放回原处，已存在同名文件时跳过，返回 (恢复数, 跳过的路径)"""
+    blog_path = Path(blog_path)
+    directory = Path(directory)
+    with open(directory / MOVED_FILE, 'r', encoding='utf-8') as f:
+        moved = json.load(f)
+
+    restored, skipped = 0, []
+    for relative in moved:
+        source = directory / relative
+        destination = blog_path / relative
+        if not source.exists() or destination.exists():
+            skipped.append(relative)
+            continue
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(source), str(destination))
+        restored += 1
+    if not skipped:
+        shutil.rmtree(directory)
+    return restored, skipped
+
+
+def format_size(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find unreferenced and missing files under static/")
+    parser.add_argument('--blog', default='.', help="博客根目录")
+    parser.add_argument('--workers', type=int, default=None, help="进程数，默认为 CPU 核数")
+    commands = parser.add_subparsers(dest='command')
+    commands.add_parser('report', help="列出孤立文件和缺失的引用（默认）")
+    command = commands.add_parser('gc', help="把孤立文件移出 static/ 和 public/")
+    command.add_argument('--dry-run', action='store_true', help="只列出会移动的文件")
+    command.add_argument('--min-age', type=float, default=1.0, help="跳过最近 N 天内修改的文件，默认 1")
+    command = commands.add_parser('restore', help="恢复一次 gc 移走的文件")
+    command.add_argument('directory', help=f"{INDEX_DIR}/{ORPHAN_DIR}/ 下的目录")
+    args = parser.parse_args()
+
+    if args.command == 'restore':
+        restored, skipped = restore(args.blog, args.directory)
+        for relative in skipped:
+            print(f"! 跳过 {relative}")
+        print(f"恢复 {restored} 个文件")
+        return 1 if skipped else 0
+
+    graph = AssetGraph(args.blog, workers=args.workers)
+    parsed = graph.build()
+    files = graph.static_files()
+    orphans = graph.orphans(files)
+
+    if args.command == 'gc':
+        paths, reclaimed, target = graph.collect(min_age=args.min_age * 86400, dry_run=args.dry_run)
+        for relative in paths:
+            print(f"{'将移动' if args.dry_run else '已移动'} {relative}")
+        if paths and not args.dry_run:
+            print(f"文件已移到 {target}，可用 restore 恢复")
+        print(f"{len(paths)} 个文件，{format_size(reclaimed)}")
+        return 0
+
+    missing = graph.missing()
+    for relative in sorted(orphans):
+        print(f"- {relative} ({format_size(orphans[relative])})")
+    for relative, users in sorted(missing.items()):
+        print(f"? {relative} <- {', '.join(users)}")
+    print(f"{len(graph.refs)} 篇文档（解析 {parsed} 篇），{len(files)} 个文件，"
+          f"孤立 {len(orphans)} 个（可回收 {format_size(sum(orphans.values()))}），缺失 {len(missing)} 个")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Content-hash build manifest for deciding whether the site needs a rebuild
+"""
+
+import os
+import re
+import json
+import hashlib
+from pathlib import Path
+
+from .frontmatter import locate_body
+from .post_index import INDEX_DIR
+
+MANIFEST_FILE = "build_manifest.json"
+
+# Everything hugo reads when building the site (theme directory is added from hugo.toml)
+INPUT_DIRS = ["content", "static", "layouts", "assets", "data", "i18n", "archetypes", "config"]
+INPUT_FILES = ["hugo.toml", "hugo.yaml", "hugo.json", "config.toml", "config.yaml", "config.json"]
+OUTPUT_DIR = "public"
+POSTS_DIR = "content/posts/"
+
+
+def file_hash(path):
+    """分块计算文件的 SHA-1"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(1 << 20)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_theme(blog_path):
+    """从 hugo.toml 中读取主题名"""
+    config = Path(blog_path) / "hugo.toml"
+    try:
+        text = config.read_text(encoding='utf-8')
+    except OSError:
+        return None
+    match = re.search(r'''^\s*theme\s*=\s*['"]([^'"]+)['"]''', text, re.MULTILINE)
+    return match.group(1) if match else None
+
+
+class FileHashCache:
+    """按 (mtime, size) 缓存文件哈希，未改动的文件不会被重新读取"""
+
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+
+    def scan(self, root, paths):
+        """扫描 root 下的文件和目录，返回 {相对路径: 哈希}"""
+        root = Path(root)
+        hashes = {}
+        entries = {}
+
+        for relative in paths:
+            path = root / relative
+            if path.is_file():
+                self._add(root, path, hashes, entries)
+            elif path.is_dir():
+                for dirpath, dirnames, filenames in os.walk(path):
+                    dirnames[:] = [name for name in dirnames if not name.startswith('.')]
+                    for filename in filenames:
+                        self._add(root, Path(dirpath) / filename, hashes, entries)
+
+        self.entries = entries
+        return hashes
+
+    def _add(self, root, path, hashes, entries):
+        key = path.relative_to(root).as_posix()
+        try:
+            stat = path.stat()
+        except OSError:
+            return
+
+        cached = self.entries.get(key)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            digest = cached[2]
+        else:
+            digest = file_hash(path)
+        entries[key] = [stat.st_mtime_ns, stat.st_size, digest]
+        hashes[key] = digest
+
+
+def diff_hashes(old, new):
+    """比较两组哈希，返回 (新增, 修改, 删除)"""
+    added = sorted(path for path in new if path not in old)
+    changed = sorted(path for path in new if path in old and old[path] != new[path])
+    removed = sorted(path for path in old if path not in new)
+    return added, changed, removed
+
+
+def front_matter_digest(path):
+    """文章 front matter 的哈希，只读取文件开头"""
+    front_matter, _, _ = locate_body(path)
+    text = json.dumps(front_matter, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def digest_of(hashes):
+    digest = hashlib.sha1()
+    for path in sorted(hashes):
+        digest.update(f"{path}\0{hashes[path]}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    """记录上次成功构建时输入文件和 public/ 输出的哈希
+
+    输入（content/、static/、配置和主题）没有变化时可以跳过整个构建；
+    构建后比较 public/ 可以知道哪些输出真正发生了变化。front_matter 记录构建时
+    每篇文章 front matter 的哈希，用来判断一次修改是否只涉及正文。
+    """
+
+    VERSION = 1
+
+    def __init__(self, blog_path):
+        self.blog_path = Path(blog_path)
+        self.path = self.blog_path / INDEX_DIR / MANIFEST_FILE
+        self.input_digest = None
+        self.inputs = {}
+        self.outputs = {}
+        # {content/posts/... : [file hash, front matter hash]}
+        self.front_matter = {}
+        self.input_cache = FileHashCache()
+        self.output_cache = FileHashCache()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != self.VERSION:
+            return
+
+        self.input_digest = data.get('input_digest')
+        self.inputs = data.get('inputs', {})
+        self.outputs = data.get('outputs', {})
+        self.front_matter = data.get('front_matter', {})
+        self.input_cache = FileHashCache(data.get('input_cache', {}))
+        self.output_cache = FileHashCache(data.get('output_cache', {}))
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': self.VERSION,
+                'input_digest': self.input_digest,
+                'inputs': self.inputs,
+                'outputs': self.outputs,
+                'front_matter': self.front_matter,
+                'input_cache': self.input_cache.entries,
+                'output_cache': self.output_cache.entries,
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def input_paths(self):
+        paths = INPUT_DIRS + INPUT_FILES
+        theme = read_theme(self.blog_path)
+        if theme:
+            paths.append(f"themes/{theme}")
+        return paths
+
+    def scan_inputs(self):
+        """计算当前输入文件的哈希"""
+        return self.input_cache.scan(self.blog_path, self.input_paths())
+
+    def scan_outputs(self):
+        return self.output_cache.scan(self.blog_path, [OUTPUT_DIR])
+
+    def check_inputs(self):
+        """返回 (是否需要构建, 当前输入哈希, 变化的输入文件列表)"""
+        inputs = self.scan_inputs()
+        added, changed, removed = diff_hashes(self.inputs, inputs)
+        needs_build = self.input_digest is None or digest_of(inputs) != self.input_digest
+        return needs_build, inputs, added + changed + removed
+
+    def record_build(self, inputs):
+        """构建成功后记录输入，并返回 public/ 中 (新增, 修改, 删除) 的文件"""
+        outputs = self.scan_outputs()
+        output_changes = diff_hashes(self.outputs, outputs)
+
+        self.inputs = inputs
+        self.input_digest = digest_of(inputs)
+        self.outputs = outputs
+        self.record_front_matter(inputs)
+        self.save()
+        return output_changes
+
+    def record_front_matter(self, inputs):
+        """更新文章 front matter 的哈希，只解析内容有变化的文章"""
+        front_matter = {}
+        for relative, digest in inputs.items():
+            if not (relative.startswith(POSTS_DIR) and relative.endswith('.md')):
+                continue
+            cached = self.front_matter.get(relative)
+            if cached and cached[0] == digest:
+                front_matter[relative] = cached
+                continue
+            try:
+                front_matter[relative] = [digest, front_matter_digest(self.blog_path / relative)]
+            except (OSError, ValueError):
+                continue
+        self.front_matter = front_matter
+
+    def built_front_matter(self, relative):
+        """上次构建时这篇文章 front matter 的哈希，没有记录时返回 None"""
+        cached = self.front_matter.get(relative)
+        return cached[1] if cached else None
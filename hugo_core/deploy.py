@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Differential deploy of public/ to a pluggable target
+
+public/ is hashed and compared against the manifest stored on the target;
+only added or changed files are uploaded (in parallel, together with gzip
+and, when the brotli module is installed, brotli variants) and files that
+disappeared from public/ are deleted.
+
+Usage: python -m hugo_core.deploy local:/path/to/webroot [--dry-run] [--workers N]
+"""
+
+import os
+import io
+import gzip
+import json
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .build_manifest import FileHashCache, diff_hashes
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_NAME = ".deploy_manifest.json"
+COMPRESSIBLE = {'.html', '.css', '.js', '.xml', '.json', '.svg', '.txt', '.map', '.webmanifest'}
+MIN_COMPRESS_SIZE = 1024
+
+
+def compressed_variants(path, data):
+    """为可压缩文件生成预压缩版本，返回 {后缀: 数据}"""
+    if Path(path).suffix.lower() not in COMPRESSIBLE or len(data) < MIN_COMPRESS_SIZE:
+        return {}
+
+    variants = {}
+    buffer = io.BytesIO()
+    # mtime=0 keeps the output identical for identical input
+    with gzip.GzipFile(fileobj=buffer, mode='wb', compresslevel=9, mtime=0) as f:
+        f.write(data)
+    if buffer.tell() < len(data):
+        variants['.gz'] = buffer.getvalue()
+
+    if brotli is not None:
+        compressed = brotli.compress(data)
+        if len(compressed) < len(data):
+            variants['.br'] = compressed
+    return variants
+
+
+class DeployTarget:
+    """部署目标的接口，新的目标类型实现这些方法并注册到 TARGETS"""
+
+    def read_manifest(self):
+        """返回目标上记录的 {路径: 哈希}，首次部署时返回空字典"""
+        raise NotImplementedError
+
+    def write_manifest(self, manifest):
+        raise NotImplementedError
+
+    def upload(self, path, data, variants):
+        """上传一个文件及其预压缩版本，path 为相对路径"""
+        raise NotImplementedError
+
+    def delete(self, path):
+        """删除一个文件及其预压缩版本"""
+        raise NotImplementedError
+
+
+class LocalDirectoryTarget(DeployTarget):
+    """部署到本地目录，用于测试或同步到挂载的网站根目录"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def read_manifest(self):
+        try:
+            with open(self.root / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def write_manifest(self, manifest):
+        self._write(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+
+    def upload(self, path, data, variants):
+        self._write(path, data)
+        for suffix in ('.gz', '.br'):
+            if suffix in variants:
+                self._write(path + suffix, variants[suffix])
+            else:
+                self._remove(path + suffix)
+
+    def delete(self, path):
+        for name in (path, path + '.gz', path + '.br'):
+            self._remove(name)
+
+    def _write(self, path, data):
+        target = self.root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(target.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, target)
+
+    def _remove(self, path):
+        try:
+            os.remove(self.root / path)
+        except FileNotFoundError:
+            pass
+
+
+TARGETS = {
+    'local': LocalDirectoryTarget,
+}
+
+
+def make_target(spec):
+    """根据 "类型:参数" 形式的字符串创建部署目标，例如 local:/srv/www"""
+    kind, _, argument = spec.partition(':')
+    if kind not in TARGETS:
+        raise ValueError(f"未知的部署目标类型: {kind}（可用: {', '.join(sorted(TARGETS))}）")
+    return TARGETS[kind](argument)
+
+
+class Deployer:
+    """比较 public/ 与目标上的清单，只上传新增和修改的文件，删除多余的文件"""
+
+    def __init__(self, public_path, target, workers=8):
+        self.public_path = Path(public_path)
+        self.target = target
+        self.workers = workers
+        self.hash_cache = FileHashCache()
+
+    def plan(self):
+        """返回 (本地哈希, 远端清单, 新增, 修改, 删除)"""
+        local = self.hash_cache.scan(self.public_path, ['.'])
+        remote = self.target.read_manifest()
+        added, changed, removed = diff_hashes(remote, local)
+        return local, remote, added, changed, removed
+
+    def run(self, dry_run=False, progress=None):
+        """执行部署，返回 {'uploaded': [...], 'deleted': [...], 'failed': {路径: 错误}}"""
+        local, remote, added, changed, removed = self.plan()
+        report = {'uploaded': [], 'deleted': [], 'failed': {},
+                  'added': added, 'changed': changed, 'removed': removed}
+        if dry_run:
+            return report
+
+        manifest = dict(remote)
+        uploads = added + changed
+        total = len(uploads) + len(removed)
+        done = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self._upload, path): ('upload', path) for path in uploads}
+            futures.update({executor.submit(self.target.delete, path): ('delete', path) for path in removed})
+
+            for future in as_completed(futures):
+                action, path = futures[future]
+                done += 1
+                error = future.exception()
+                if error is not None:
+                    report['failed'][path] = str(error)
+                elif action == 'upload':
+                    manifest[path] = local[path]
+                    report['uploaded'].append(path)
+                else:
+                    manifest.pop(path, None)
+                    report['deleted'].append(path)
+                if progress is not None:
+                    progress(done, total, path)
+
+        # Failed files keep their old manifest entry, so the next run retries them
+        self.target.write_manifest(manifest)
+        return report
+
+    def _upload(self, path):
+        with open(self.public_path / path, 'rb') as f:
+            data = f.read()
+        self.target.upload(path, data, compressed_variants(path, data))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Differential deploy of public/")
+    parser.add_argument('target', help="部署目标，例如 local:/srv/www")
+    parser.add_argument('--public', default='public', help="public 目录")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--dry-run', action='store_true', help="只显示会上传和删除的文件")
+    args = parser.parse_args()
+
+    deployer = Deployer(args.public, make_target(args.target), workers=args.workers)
+    report = deployer.run(dry_run=args.dry_run)
+
+    for label, key in (("+", 'added'), ("~", 'changed'), ("-", 'removed')):
+        for path in report[key]:
+            print(f"{label} {path}")
+    for path, error in sorted(report['failed'].items()):
+        print(f"! {path}: {error}")
+    print(f"新增 {len(report['added'])}，修改 {len(report['changed'])}，删除 {len(report['removed'])}，"
+          f"失败 {len(report['failed'])}")
+    return 1 if report['failed'] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parallel export of every post in content/posts to standalone HTML
+
+Posts are rendered in a process pool with the same Markdown settings and
+stylesheet as the browser preview. Each result is cached under a key made
+of the post's content hash and RENDERER_VERSION, together with the stamps
+of the static files it references, so exporting again only renders posts
+that changed. Images and other files under static/ that a post links with
+an absolute path (/uploads/...) are either copied next to the pages and
+linked relatively, or inlined as data: URIs.
+
+Usage: python -m hugo_core.export [--out DIR] [--inline-images] [--workers N]
+"""
+
+import os
+import re
+import json
+import html
+import time
+import base64
+import shutil
+import hashlib
+import argparse
+import mimetypes
+from pathlib import Path
+from urllib.parse import unquote
+
+from .frontmatter import as_list, parse_document
+from .post_index import INDEX_DIR, file_stamp
+from .posts import atomic_write
+
+EXPORT_DIR = "export"
+CACHE_FILE = "export_cache.json"
+# Bump when the page template or the rewriting changes; markdown's version is added at run time
+RENDERER_VERSION = "1"
+IMAGES_COPY = 'copy'
+IMAGES_INLINE = 'inline'
+
+# Absolute links into the site, e.g. src="/uploads/a.png"; "//host/..." is not local
+ASSET_RE = re.compile(r'''(\b(?:src|href)\s*=\s*["'])(/(?!/)[^"'#?]*)''', re.IGNORECASE)
+
+EXPORT_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{title}</title>
+    <style>{style}        .meta {{ color: #888; }}
+    </style>
+</head>
+<body>
+    <p class="meta"><a href="index.html">&larr; 目录</a></p>
+    {content}
+</body>
+</html>
+"""
+
+INDEX_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{title}</title>
+    <style>{style}    </style>
+</head>
+<body>
+    <h1>{title}</h1>
+    <ul>
+{items}
+    </ul>
+</body>
+</html>
+"""
+
+_renderer = None
+
+
+def renderer_version():
+    import markdown
+    return f"{RENDERER_VERSION}:{markdown.__version__}"
+
+
+def cache_key(data, version, images):
+    digest = hashlib.sha1(f"{version}:{images}:".encode('utf-8'))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def output_name(name):
+    return Path(name).stem + '.html'
+
+
+def static_stamp(static_path, url_path):
+    """把 /uploads/a.png 映射到 static/ 下的文件，返回 (相对路径, 文件标记)，不是本地文件时返回 None"""
+    relative = unquote(url_path).lstrip('/')
+    path = (static_path / relative).resolve()
+    if static_path not in path.parents:
+        return None
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    if not os.path.isfile(path):
+        return None
+    return relative, file_stamp(stat)
+
+
+def data_uri(path):
+    content_type = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+    with open(path, 'rb') as f:
+        return f"data:{content_type};base64,{base64.b64encode(f.read()).decode('ascii')}"
+
+
+def render_post(path, out_path, static_path, images):
+    """在子进程中把一篇文章写成 HTML 页面
+
+    返回 {'name', 'title', 'date', 'assets': {相对路径: 文件标记}, 'ms', 'error'}，
+    ms 是解析、渲染和改写链接的耗时。
+    """
+    global _renderer
+    name = Path(path).name
+    result = {'name': name, 'title': '', 'date': '', 'assets': {}, 'ms': 0.0, 'error': None}
+    try:
+        start = time.perf_counter()
+        if _renderer is None:
+            # One Markdown instance per worker process, created on its first post
+            from .preview_server import MarkdownRenderer
+            _renderer = MarkdownRenderer(cache_size=0)
+        from .preview_server import CONTENT_TEMPLATE, PAGE_STYLE
+
+        with open(path, 'r', encoding='utf-8') as f:
+            front_matter, body, _ = parse_document(f.read())
+        title = str(front_matter.get('title') or Path(path).stem)
+        date = str(front_matter.get('date', ''))
+        meta = [date[:10]] + [f"#{tag}" for tag in as_list(front_matter.get('tags'))]
+        if front_matter.get('draft') in (True, 'true'):
+            meta.append("草稿")
+        content = CONTENT_TEMPLATE.format(title=html.escape(title), html=_renderer.render(body))
+        content = f'<p class="meta">{html.escape(" ".join(part for part in meta if part))}</p>\n' + content
+
+        static_path = Path(static_path)
+        assets = result['assets']
+
+        def rewrite(match):
+            found = static_stamp(static_path, match.group(2))
+            if found is None:
+                return match.group(0)
+            relative, stamp = found
+            assets[relative] = stamp
+            if images == IMAGES_INLINE:
+                return match.group(1) + data_uri(static_path / relative)
+            return match.group(1) + match.group(2).lstrip('/')
+
+        content = ASSET_RE.sub(rewrite, content)
+        page = EXPORT_TEMPLATE.format(title=html.escape(title), style=PAGE_STYLE, content=content)
+        result.update(title=title, date=date, ms=(time.perf_counter() - start) * 1000)
+        atomic_write(out_path, page)
+    except Exception as e:
+        result['error'] = str(e)
+    return result
+
+
+class HtmlExporter:
+    """把 content/posts 中的文章导出为独立的 HTML 页面，只重新渲染有变化的文章"""
+
+    VERSION = 1
+
+    def __init__(self, blog_path, out_path=None, images=IMAGES_COPY, workers=None):
+        self.blog_path = Path(blog_path)
+        self.posts_path = self.blog_path / "content" / "posts"
+        self.static_path = (self.blog_path / "static").resolve()
+        self.out_path = Path(out_path) if out_path else self.blog_path / EXPORT_DIR
+        self.cache_path = self.blog_path / INDEX_DIR / CACHE_FILE
+        self.images = images
+        self.workers = workers
+        self.cache = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        # The cache describes one output directory
+        if data.get('version') == self.VERSION and data.get('out') == str(self.out_path.resolve()):
+            self.cache = data.get('posts', {})
+
+    def save(self):
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'out': str(self.out_path.resolve()), 'posts': self.cache},
+                      f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+    def is_current(self, name, key):
+        entry = self.cache.get(name)
+        if not entry or entry['key'] != key or not (self.out_path / output_name(name)).exists():
+            return False
+        # Referenced images that changed matter when inlining, and need copying otherwise
+        return all((static_stamp(self.static_path, '/' + relative) or (None, None))[1] == stamp
+                   for relative, stamp in entry['assets'].items())
+
+    def run(self, progress=None):
+        """导出所有文章，返回 {'rendered': {文件名: 毫秒}, 'cached', 'removed', 'copied', 'failed'}
+
+        progress(完成数, 总数, 文件名, 毫秒) 在每篇文章渲染完成后调用。
+        """
+        version = renderer_version()
+        names = sorted(name for name in os.listdir(self.posts_path) if name.endswith('.md'))
+        self.out_path.mkdir(parents=True, exist_ok=True)
+
+        keys = {}
+        pending = []
+        for name in names:
+            with open(self.posts_path / name, 'rb') as f:
+                keys[name] = cache_key(f.read(), version, self.images)
+            if not self.is_current(name, keys[name]):
+                pending.append(name)
+
+        report = {'rendered': {}, 'cached': len(names) - len(pending), 'removed': 0, 'copied': 0, 'failed': {}}
+        if pending:
+            from concurrent.futures import ProcessPoolExecutor
+
+            paths = [str(self.posts_path / name) for name in pending]
+            outputs = [str(self.out_path / output_name(name)) for name in pending]
+            workers = self.workers or os.cpu_count() or 1
+            chunksize = max(len(paths) // (workers * 4), 1)
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(render_post, paths, outputs, [str(self.static_path)] * len(paths),
+                                       [self.images] * len(paths), chunksize=chunksize)
+                for done, result in enumerate(results, 1):
+                    name = result['name']
+                    if result['error'] is not None:
+                        report['failed'][name] = result['error']
+                        self.cache.pop(name, None)
+                    else:
+                        report['rendered'][name] = result['ms']
+                        self.cache[name] = {'key': keys[name], 'title': result['title'], 'date': result['date'],
+                                            'assets': result['assets'], 'ms': result['ms']}
+                    if progress is not None:
+                        progress(done, len(pending), name, result['ms'])
+
+        for name in list(self.cache):
+            if name not in keys:
+                del self.cache[name]
+                try:
+                    os.remove(self.out_path / output_name(name))
+                except FileNotFoundError:
+                    pass
+                report['removed'] += 1
+
+        if self.images == IMAGES_COPY:
+            report['copied'] = self.copy_assets()
+        self.write_index()
+        self.save()
+        return report
+
+    def copy_assets(self):
+        """把文章引用的 static/ 文件复制到导出目录，已是最新的文件不复制"""
+        copied = 0
+        assets = {relative for entry in self.cache.values() for relative in entry['assets']}
+        for relative in sorted(assets):
+            source = self.static_path / relative
+            target = self.out_path / relative
+            try:
+                stat = source.stat()
+                current = target.stat()
+                if current.st_size == stat.st_size and current.st_mtime_ns == stat.st_mtime_ns:
+                    continue
+            except FileNotFoundError:
+                if not source.exists():
+                    continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(source, target)
+            copied += 1
+        return copied
+
+    def write_index(self):
+        """按日期倒序列出所有导出的文章"""
+        from .preview_server import PAGE_STYLE
+
+        entries = sorted(self.cache.items(), key=lambda item: (item[1]['date'], item[0]), reverse=True)
+        items = '\n'.join(
+            f'        <li>{html.escape(entry["date"][:10])} '
+            f'<a href="{html.escape(output_name(name))}">{html.escape(entry["title"])}</a></li>'
+            for name, entry in entries)
+        atomic_write(self.out_path / "index.html",
+                     INDEX_TEMPLATE.format(title="文章目录", style=PAGE_STYLE, items=items))
+
+
+def slowest(rendered, count=10):
+    """渲染最慢的几篇文章 [(文件名, 毫秒)]"""
+    return sorted(rendered.items(), key=lambda item: -item[1])[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export all posts to standalone HTML")
+    parser.add_argument('--blog', default='.', help="博客根目录")
+    parser.add_argument('--out', default=None, help=f"输出目录，默认为 {EXPORT_DIR}/")
+    parser.add_argument('--inline-images', action='store_true', help="把图片内嵌为 data: URI，而不是复制")
+    parser.add_argument('--workers', type=int, default=None, help="进程数，默认为 CPU 核数")
+    args = parser.parse_args()
+
+    exporter = HtmlExporter(args.blog, args.out, IMAGES_INLINE if args.inline_images else IMAGES_COPY,
+                            workers=args.workers)
+    report = exporter.run(progress=lambda done, total, name, ms: print(f"[{done}/{total}] {name} {ms:.1f} ms"))
+    for name, error in sorted(report['failed'].items()):
+        print(f"! {name}: {error}")
+    total = sum(report['rendered'].values())
+    print(f"渲染 {len(report['rendered'])} 篇（共 {total:.0f} ms），缓存命中 {report['cached']}，"
+          f"删除 {report['removed']}，复制文件 {report['copied']}，失败 {len(report['failed'])}")
+    print(f"输出目录: {exporter.out_path}")
+    return 1 if report['failed'] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+Front matter parsing and serialization for Hugo markdown posts
+
+Hugo accepts YAML (between --- lines), TOML (between +++ lines) and JSON (a
+leading object) front matter. The header is read line by line up to the
+closing delimiter, so metadata can be read from a file without touching the
+body, and a --- inside a value or a multi-line list no longer splits the
+document in the wrong place.
+"""
+
+import io
+import re
+import json
+import datetime
+
+DELIMITERS = {'---': 'yaml', '+++': 'toml'}
+FORMAT_DELIMITERS = {'yaml': '---', 'toml': '+++'}
+# Longer headers are treated as a missing closing delimiter
+MAX_HEADER_SIZE = 256 * 1024
+
+BARE_KEY_RE = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+class FrontMatterError(ValueError):
+    """front matter 格式错误"""
+
+
+_yaml = None
+
+
+def _load_yaml():
+    """第一次需要时才导入 PyYAML，返回 (yaml, Loader, Dumper)"""
+    global _yaml
+    if _yaml is None:
+        import yaml
+
+        class Loader(yaml.SafeLoader):
+            pass
+
+        class Dumper(yaml.SafeDumper):
+            pass
+
+        # Keep timestamps as the strings they were written as, so dates round-trip unchanged
+        for cls in (Loader, Dumper):
+            cls.yaml_implicit_resolvers = {
+                first: [(tag, regexp) for tag, regexp in resolvers if tag != 'tag:yaml.org,2002:timestamp']
+                for first, resolvers in yaml.SafeLoader.yaml_implicit_resolvers.items()
+            }
+        _yaml = (yaml, Loader, Dumper)
+    return _yaml
+
+
+def _load_toml():
+    try:
+        import tomllib
+    except ImportError:
+        import toml as tomllib
+    return tomllib
+
+
+def as_list(value):
+    """把front matter中的标签/分类统一成列表"""
+    if isinstance(value, list):
+        return [str(item) for item in value if str(item).strip()]
+    if isinstance(value, str) and value.strip():
+        return [value.strip()]
+    return []
+
+
+# Reading
+
+def _read_header(stream, limit=MAX_HEADER_SIZE):
+    """从文本流中逐行读取 front matter，返回 (原文, 格式, 结束位置)
+
+    没有 front matter 时格式为 None。只读取到结束标记为止。
+    """
+    first = stream.readline()
+    marker = first.strip()
+    if marker in DELIMITERS:
+        fmt = DELIMITERS[marker]
+        lines = []
+    elif marker.startswith('{'):
+        fmt = 'json'
+        lines = [first]
+    else:
+        return None, None, 0
+
+    consumed = len(first)
+    decoder = json.JSONDecoder()
+    while True:
+        if fmt == 'json' and lines[-1].rstrip().endswith('}'):
+            text = ''.join(lines)
+            try:
+                _, end = decoder.raw_decode(text)
+            except ValueError:
+                pass
+            else:
+                return text[:end], fmt, end
+
+        line = stream.readline()
+        if not line:
+            raise FrontMatterError("front matter 没有结束标记")
+        consumed += len(line)
+        if consumed > limit:
+            raise FrontMatterError("front matter 过长或没有结束标记")
+        if fmt != 'json' and line.rstrip() == FORMAT_DELIMITERS[fmt]:
+            return ''.join(lines), fmt, consumed
+        lines.append(line)
+
+
+def parse_front_matter(text, fmt):
+    """按格式解析 front matter 原文，返回字典"""
+    errors = ValueError
+    try:
+        if fmt == 'yaml':
+            yaml, loader, _ = _load_yaml()
+            errors = (yaml.YAMLError, ValueError)
+            data = yaml.load(text, Loader=loader)
+        elif fmt == 'toml':
+            data = _load_toml().loads(text)
+        else:
+            data = json.loads(text)
+    except errors as e:
+        raise FrontMatterError(f"无法解析 {fmt.upper()} front matter: {e}") from e
+
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise FrontMatterError("front matter 必须是键值对")
+    return data
+
+
+def read_front_matter(path):
+    """只读取文件开头的 front matter，不读取正文，返回 (front matter, 格式)"""
+    with open(path, 'r', encoding='utf-8-sig', errors='replace') as f:
+        text, fmt, _ = _read_header(f)
+    if fmt is None:
+        return {}, None
+    return parse_front_matter(text, fmt), fmt
+
+
+class _ByteLines:
+    """按行解码二进制流，记录已读取的原文，用于换算正文的字节偏移"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.lines = []
+        self.bom = 0
+
+    def readline(self):
+        line = self.stream.readline()
+        if not self.lines and not self.bom and line.startswith(b'\xef\xbb\xbf'):
+            line = line[3:]
+            self.bom = 3
+        # surrogateescape keeps invalid bytes, so encoding back gives the exact byte count
+        line = line.decode('utf-8', 'surrogateescape')
+        self.lines.append(line)
+        return line
+
+
+def locate_body(path):
+    """只读取 front matter，返回 (front matter, 格式, 正文在文件中的字节偏移)
+
+    用于大文件：正文之后可以从偏移处分块读取或 mmap，不必把整个文件读成一个字符串。
+    """
+    with open(path, 'rb') as f:
+        reader = _ByteLines(f)
+        text, fmt, end = _read_header(reader)
+    if fmt is None:
+        return {}, None, reader.bom
+    offset = reader.bom + len(''.join(reader.lines)[:end].encode('utf-8', 'surrogateescape'))
+    return parse_front_matter(text, fmt), fmt, offset
+
+
+def parse_document(content):
+    """解析文章内容，返回 (front matter, 正文, 格式)"""
+    if content.startswith('\ufeff'):
+        content = content[1:]
+    text, fmt, end = _read_header(io.StringIO(content), limit=len(content))
+    if fmt is None:
+        return {}, content, None
+    return parse_front_matter(text, fmt), content[end:].lstrip('\r\n').rstrip(), fmt
+
+
+def parse_markdown(content):
+    """解析Markdown文件的front matter和正文"""
+    front_matter, body, _ = parse_document(content)
+    return front_matter, body
+
+
+# Writing
+
+def _is_scalar(value):
+    return value is None or isinstance(value, (str, bool, int, float))
+
+
+def _dump_yaml(front_matter):
+    """简单的值写成一行（字符串带引号、列表用方括号），嵌套结构交给 PyYAML"""
+    lines = []
+    for key, value in front_matter.items():
+        if _is_scalar(value) or (isinstance(value, list) and all(_is_scalar(item) for item in value)):
+            name = key if BARE_KEY_RE.match(str(key)) else json.dumps(str(key), ensure_ascii=False)
+            lines.append(f"{name}: {json.dumps(value, ensure_ascii=False)}")
+        else:
+            yaml, _, dumper = _load_yaml()
+            lines.append(yaml.dump({key: value}, Dumper=dumper, allow_unicode=True,
+                                   sort_keys=False, default_flow_style=False).rstrip('\n'))
+    return '\n'.join(lines)
+
+
+def _toml_key(key):
+    key = str(key)
+    return key if BARE_KEY_RE.match(key) else json.dumps(key, ensure_ascii=False)
+
+
+def _toml_value(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, list):
+        return '[' + ', '.join(_toml_value(item) for item in value) + ']'
+    if isinstance(value, dict):
+        return '{ ' + ', '.join(f"{_toml_key(k)} = {_toml_value(v)}" for k, v in value.items()) + ' }'
+    return json.dumps(str(value), ensure_ascii=False)
+
+
+def _dump_toml(data, path=()):
+    """写出 TOML：先写普通键，再写子表和表数组"""
+    lines = []
+    tables = []
+    for key, value in data.items():
+        if value is None:
+            continue  # TOML has no null
+        if isinstance(value, dict) or (isinstance(value, list) and value
+                                       and all(isinstance(item, dict) for item in value)):
+            tables.append((key, value))
+        else:
+            lines.append(f"{_toml_key(key)} = {_toml_value(value)}")
+
+    for key, value in tables:
+        table_path = path + (key,)
+        header = '.'.join(_toml_key(part) for part in table_path)
+        if isinstance(value, dict):
+            lines += ['', f"[{header}]"] + _dump_toml(value, table_path)
+        else:
+            for item in value:
+                lines += ['', f"[[{header}]]"] + _dump_toml(item, table_path)
+    return lines
+
+
+def serialize_front_matter(front_matter, fmt='yaml'):
+    """按原格式写出 front matter（含分隔符）"""
+    if fmt == 'json':
+        return json.dumps(front_matter, ensure_ascii=False, indent=2, default=str)
+    if fmt == 'toml':
+        return '+++\n' + '\n'.join(_dump_toml(front_matter)) + '\n+++'
+    return '---\n' + _dump_yaml(front_matter) + '\n---'
+
+
+def serialize_markdown(front_matter, body, fmt='yaml'):
+    """把front matter和正文组合成文章内容"""
+    return '\n'.join([serialize_front_matter(front_matter, fmt or 'yaml'), "", body])
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parallel image optimization for static/uploads
+
+Every image under static/uploads is resized to a few standard widths and
+re-encoded as WebP plus its original format. Variants are named after a hash
+of the source content and the encoder settings and written to static/variants/,
+so an image is processed exactly once no matter how often the pipeline runs.
+Size metadata with ready-made srcset strings goes to data/images.json, keyed
+by the URL used in the markdown, e.g. in a render-image hook:
+
+    {{ with index site.Data.images .Destination }}<img srcset="{{ .srcset.webp }}" ...>{{ end }}
+
+Uploads only run the pipeline once a template like that reads the data
+(see is_used); until then the variants would be deployed but never served.
+
+Usage: python -m hugo_core.image_pipeline [--workers N]
+"""
+
+import os
+import json
+import hashlib
+import argparse
+import importlib.util
+from pathlib import Path
+
+from .build_manifest import FileHashCache, read_theme
+from .post_index import INDEX_DIR
+
+VARIANT_DIR = "static/variants"
+DATA_FILE = "data/images.json"
+CACHE_FILE = "image_cache.json"
+
+# What a template that uses data/images.json contains: site.Data.images, .Site.Data.images
+DATA_REFERENCE = "Data.images"
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg'}
+WIDTHS = (480, 960, 1600)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+# Part of every variant name: changing the encoder settings re-processes all images
+SETTINGS = f"v1:{WIDTHS}:{WEBP_QUALITY}:{JPEG_QUALITY}"
+
+
+def variant_digest(content_hash):
+    return hashlib.sha1(f"{SETTINGS}:{content_hash}".encode('utf-8')).hexdigest()[:20]
+
+
+def _save(image, path, fmt):
+    """写入临时文件后替换，中断时不会留下半个文件"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    if fmt == 'webp':
+        image.save(tmp_path, 'WEBP', quality=WEBP_QUALITY, method=6)
+    elif fmt == 'jpg':
+        image.convert('RGB').save(tmp_path, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(tmp_path, 'PNG', optimize=True)
+    os.replace(tmp_path, path)
+
+
+def process_image(source, output_dir, digest):
+    """在子进程中生成一张图片的所有尺寸和格式，返回尺寸信息"""
+    from PIL import Image, ImageOps
+
+    source = Path(source)
+    output_dir = Path(output_dir)
+    fallback = 'jpg' if source.suffix.lower() in ('.jpg', '.jpeg') else 'png'
+
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            has_alpha = image.mode in ('LA', 'PA', 'P') or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+        width, height = image.size
+
+        variants = []
+        for target in [w for w in WIDTHS if w < width] + [width]:
+            target_height = max(round(height * target / width), 1)
+            resized = None
+            for fmt in ('webp', fallback):
+                path = output_dir / f"{digest}-{target}w.{fmt}"
+                if not path.exists():
+                    if resized is None:
+                        resized = image if target == width else image.resize((target, target_height), Image.LANCZOS)
+                    _save(resized, path, fmt)
+                    # Re-encoding an already optimized file can make it bigger
+                    if target == width and fmt == fallback and path.stat().st_size > source.stat().st_size:
+                        path.write_bytes(source.read_bytes())
+                variants.append({'file': path.name, 'format': fmt, 'width': target,
+                                 'height': target_height, 'size': path.stat().st_size})
+
+    return {'width': width, 'height': height, 'variants': variants}
+
+
+class ImagePipeline:
+    """扫描 static/uploads，用进程池并行生成缺失的图片变体"""
+
+    VERSION = 1
+
+    def __init__(self, blog_path, workers=None):
+        self.blog_path = Path(blog_path)
+        self.variant_path = self.blog_path / VARIANT_DIR
+        self.data_path = self.blog_path / DATA_FILE
+        self.cache_path = self.blog_path / INDEX_DIR / CACHE_FILE
+        self.workers = workers
+        self.hash_cache = FileHashCache()
+        self.load()
+
+    @staticmethod
+    def available():
+        """是否安装了 Pillow（不导入它）"""
+        return importlib.util.find_spec('PIL') is not None
+
+    def is_used(self):
+        """站点或主题的模板是否读取 data/images.json，没有时生成的变体不会被页面使用"""
+        layouts = [self.blog_path / "layouts"]
+        theme = read_theme(self.blog_path)
+        if theme:
+            layouts.append(self.blog_path / "themes" / theme / "layouts")
+        for root in layouts:
+            for dirpath, dirnames, filenames in os.walk(root):
+                for filename in filenames:
+                    try:
+                        with open(os.path.join(dirpath, filename), 'r', encoding='utf-8', errors='replace') as f:
+                            if DATA_REFERENCE in f.read():
+                                return True
+                    except OSError:
+                        continue
+        return False
+
+    def load(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == self.VERSION:
+            self.hash_cache = FileHashCache(data.get('hash_cache', {}))
+
+    def save(self):
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'hash_cache': self.hash_cache.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+    def read_metadata(self):
+        try:
+            with open(self.data_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def write_metadata(self, metadata):
+        """内容不变时不重写，避免无谓地触发 hugo 重新构建"""
+        text = json.dumps(metadata, ensure_ascii=False, indent=1, sort_keys=True) + '\n'
+        try:
+            if self.data_path.read_text(encoding='utf-8') == text:
+                return
+        except OSError:
+            pass
+        self.data_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.data_path.with_suffix('.tmp')
+        tmp_path.write_text(text, encoding='utf-8')
+        os.replace(tmp_path, self.data_path)
+
+    def scan(self):
+        """返回 {URL: 变体哈希}，URL 即文章中引用图片的路径"""
+        hashes = self.hash_cache.scan(self.blog_path / "static", ["uploads"])
+        return {'/' + path: variant_digest(content_hash)
+                for path, content_hash in hashes.items()
+                if Path(path).suffix.lower() in IMAGE_EXTENSIONS}
+
+    def is_complete(self, entry, digest):
+        if not entry or entry.get('hash') != digest:
+            return False
+        return all((self.variant_path / variant['file']).exists() for variant in entry.get('variants', []))
+
+    def run(self, progress=None):
+        """处理新增或变化的图片，返回 {'processed', 'cached', 'pruned', 'failed'}"""
+        if not self.available():
+            raise RuntimeError("处理图片需要安装 Pillow: pip install pillow")
+
+        images = self.scan()
+        old_metadata = self.read_metadata()
+        metadata = {}
+        pending = {}
+        for url, digest in images.items():
+            entry = old_metadata.get(url)
+            if self.is_complete(entry, digest):
+                metadata[url] = entry
+            else:
+                pending[url] = digest
+
+        report = {'processed': [], 'cached': len(metadata), 'pruned': 0, 'failed': {}}
+        if pending:
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+
+            self.variant_path.mkdir(parents=True, exist_ok=True)
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = {executor.submit(process_image, str(self.blog_path / "static" / url.lstrip('/')),
+                                           str(self.variant_path), digest): url
+                           for url, digest in pending.items()}
+                for done, future in enumerate(as_completed(futures), 1):
+                    url = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        report['failed'][url] = str(e)
+                    else:
+                        metadata[url] = self.describe(pending[url], result)
+                        report['processed'].append(url)
+                    if progress is not None:
+                        progress(done, len(futures), url)
+
+        self.write_metadata(metadata)
+        report['pruned'] = self.prune(metadata)
+        self.save()
+        return report
+
+    def describe(self, digest, result):
+        """生成模板使用的元数据，srcset 按格式分组"""
+        base = '/' + Path(VARIANT_DIR).relative_to("static").as_posix() + '/'
+        variants = [dict(variant, url=base + variant['file']) for variant in result['variants']]
+        srcset = {}
+        for variant in variants:
+            srcset.setdefault(variant['format'], []).append(f"{variant['url']} {variant['width']}w")
+        return {
+            'hash': digest,
+            'width': result['width'],
+            'height': result['height'],
+            'variants': variants,
+            'srcset': {fmt: ', '.join(entries) for fmt, entries in srcset.items()},
+        }
+
+    def prune(self, metadata):
+        """删除不再被任何图片引用的变体"""
+        referenced = {variant['file'] for entry in metadata.values() for variant in entry['variants']}
+        removed = 0
+        try:
+            names = os.listdir(self.variant_path)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            if name not in referenced:
+                os.remove(self.variant_path / name)
+                removed += 1
+        return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimize images under static/uploads")
+    parser.add_argument('--blog', default='.', help="博客根目录")
+    parser.add_argument('--workers', type=int, default=None, help="进程数，默认为 CPU 核数")
+    args = parser.parse_args()
+
+    pipeline = ImagePipeline(args.blog, workers=args.workers)
+    report = pipeline.run(progress=lambda done, total, url: print(f"[{done}/{total}] {url}"))
+    for url, error in sorted(report['failed'].items()):
+        print(f"! {url}: {error}")
+    print(f"处理 {len(report['processed'])}，缓存命中 {report['cached']}，"
+          f"清理 {report['pruned']}，失败 {len(report['failed'])}")
+    return 1 if report['failed'] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
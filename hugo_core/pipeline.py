@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Portable build-and-publish pipeline, the Python replacement for updateblog.bat
+
+The same steps the batch script ran (hugo, git add, commit, pull --rebase,
+push) run as separate processes, each with its own timeout. Their stdout
+and stderr are streamed line by line to a callback while they run, and the
+whole pipeline can be cancelled from another thread. Works anywhere hugo
+and git are installed, not only on Windows.
+
+Usage: python -m hugo_core.pipeline [--blog PATH] [--no-push] [--message MSG]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import threading
+import subprocess
+from collections import deque
+from pathlib import Path
+
+from . import tracing
+
+# The manager's own launcher, code, benchmarks and tests are never committed by a deploy
+EXCLUDE = (
+    'run_hugo_manager.bat', 'hugo_manager.py', 'hugo_core', 'tasks.py', 'preview.py', 'highlight.py',
+    'editor_io.py', 'virtual_list.py', 'taxonomy_view.py', 'revision_view.py', 'benchmarks', 'tests',
+    'pytest.ini',
+)
+WINGET_HUGO = "Hugo.Hugo.Extended_Microsoft.Winget.Source_8wekyb3d8bbwe"
+# Seconds each step may run before it is stopped
+STEP_TIMEOUTS = {'build': 600, 'stage': 120, 'check': 60, 'commit': 120, 'pull': 300, 'push': 300}
+# Seconds between terminate() and kill() when stopping a step
+KILL_GRACE = 5
+# Output lines kept per step for error messages
+TAIL_LINES = 20
+
+OK = 'ok'
+FAILED = 'failed'
+TIMEOUT = 'timeout'
+CANCELLED = 'cancelled'
+SKIPPED = 'skipped'
+
+
+def find_hugo():
+    """查找 hugo 可执行文件：先找 PATH，再找 WinGet 的安装位置"""
+    path = shutil.which('hugo')
+    if path:
+        return path
+    local = os.environ.get('LOCALAPPDATA')
+    if local:
+        candidate = Path(local) / 'Microsoft' / 'WinGet' / 'Packages' / WINGET_HUGO / 'hugo.exe'
+        if candidate.is_file():
+            return str(candidate)
+    return None
+
+
+def make_step(name, argv, ok_codes=(0,), stop_on=None):
+    """stop_on 是表示"后面不用再做了"的返回码，例如没有暂存任何修改"""
+    return {'name': name, 'argv': list(argv), 'timeout': STEP_TIMEOUTS.get(name),
+            'ok_codes': ok_codes, 'stop_on': stop_on}
+
+
+def deploy_steps(hugo=None, message=None, push=True, remote='origin', branch='main', quick=False):
+    """updateblog.bat 的各个步骤
+
+    quick 为真时构建步骤改用 hugo_core.quick_publish：只改了一篇文章的正文时只更新它的页面，
+    否则仍然完整构建。
+    """
+    hugo = hugo or find_hugo()
+    if hugo is None:
+        raise FileNotFoundError("找不到 hugo，请安装 Hugo 或把它加入 PATH")
+    message = message or time.strftime("update %Y-%m-%d %H%M")
+
+    build = [hugo]
+    if quick:
+        # UTF-8 mode, so the Chinese log lines decode the same on Windows
+        build = [sys.executable, '-X', 'utf8', '-m', 'hugo_core.quick_publish', '--hugo', hugo]
+    steps = [
+        make_step('build', build),
+        make_step('stage', ['git', 'add', '.', '--'] + [f":!{path}" for path in EXCLUDE]),
+        # Exits with 1 when something is staged, 0 when there is nothing to commit
+        make_step('check', ['git', 'diff', '--cached', '--quiet'], ok_codes=(0, 1), stop_on=0),
+        make_step('commit', ['git', 'commit', '-m', message]),
+    ]
+    if push:
+        steps += [
+            make_step('pull', ['git', 'pull', '--rebase', '--autostash', remote, branch]),
+            make_step('push', ['git', 'push', remote, branch]),
+        ]
+    return steps
+
+
+def succeeded(results):
+    return all(result['status'] in (OK, SKIPPED) for result in results)
+
+
+def describe_results(results):
+    """每个步骤一行：名称、状态和耗时"""
+    lines = []
+    for result in results:
+        line = f"{result['name']:<8} {result['status']}"
+        if result['seconds'] is not None:
+            line += f"  {result['seconds']:.1f}s"
+        if result['status'] == FAILED:
+            line += f"  (exit {result['returncode']})"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def _popen_options():
+    if sys.platform == 'win32':
+        # No console window flashing up behind the GUI
+        return {'creationflags': subprocess.CREATE_NO_WINDOW}
+    # Own process group, so stopping a step also stops the helpers it spawned (e.g. ssh)
+    return {'start_new_session': True}
+
+
+def _signal(process, kill):
+    if process.poll() is not None:
+        return
+    try:
+        if sys.platform == 'win32':
+            process.kill() if kill else process.terminate()
+        else:
+            import signal
+            os.killpg(process.pid, signal.SIGKILL if kill else signal.SIGTERM)
+    except OSError:
+        pass
+
+
+class PipelineRunner:
+    """按顺序执行步骤，运行期间把每一行输出交给 on_line(步骤名, 流, 行)
+
+    流是 'stdout'、'stderr' 或 'info'（步骤开始和结束的说明）；on_line 和 on_step
+    在读取线程或工作线程中调用。cancel() 可以在任意线程调用，不会阻塞：
+    正在运行的进程先收到 terminate，KILL_GRACE 秒后仍未退出就被 kill。
+    """
+
+    def __init__(self, cwd, on_line=None, on_step=None):
+        self.cwd = str(cwd)
+        self.on_line = on_line
+        self.on_step = on_step
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._process = None
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        with self._lock:
+            process = self._process
+        if process is not None:
+            self._stop(process)
+
+    def run(self, steps):
+        """返回每个步骤的 {'name', 'status', 'returncode', 'seconds', 'tail'}
+
+        某一步没有成功（或遇到 stop_on 返回码）后，剩下的步骤标记为跳过或取消。
+        """
+        results = []
+        stopped = False
+        for step in steps:
+            if self.cancelled or stopped:
+                results.append({'name': step['name'], 'status': CANCELLED if self.cancelled else SKIPPED,
+                                'returncode': None, 'seconds': None, 'tail': []})
+                continue
+            result = self._run_step(step)
+            results.append(result)
+            stopped = result['status'] != OK or result['returncode'] == step['stop_on']
+        return results
+
+    def _emit(self, name, stream, line):
+        if self.on_line is not None:
+            self.on_line(name, stream, line)
+
+    def _stop(self, process):
+        _signal(process, kill=False)
+        timer = threading.Timer(KILL_GRACE, _signal, args=(process, True))
+        timer.daemon = True
+        timer.start()
+
+    def _pump(self, name, stream_name, stream, tail):
+        for line in stream:
+            line = line.rstrip('\r\n')
+            tail.append(line)
+            self._emit(name, stream_name, line)
+        stream.close()
+
+    def _run_step(self, step):
+        name = step['name']
+        if self.on_step is not None:
+            self.on_step(name)
+        self._emit(name, 'info', f"==> {name}: {subprocess.list2cmdline(step['argv'])}")
+        tail = deque(maxlen=TAIL_LINES)
+        # A git waiting for credentials would only ever end by timing out
+        env = dict(os.environ, GIT_TERMINAL_PROMPT='0')
+        start = time.perf_counter()
+
+        with tracing.span(f"deploy.{name}"):
+            try:
+                process = subprocess.Popen(step['argv'], cwd=self.cwd, env=env, stdin=subprocess.DEVNULL,
+                                           stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                           text=True, encoding='utf-8', errors='replace',
+                                           **_popen_options())
+            except OSError as e:
+                tail.append(str(e))
+                self._emit(name, 'stderr', str(e))
+                return {'name': name, 'status': FAILED, 'returncode': None,
+                        'seconds': time.perf_counter() - start, 'tail': list(tail)}
+
+            with self._lock:
+                self._process = process
+            if self.cancelled:
+                # cancel() ran between the check in run() and registering the process
+                self._stop(process)
+
+            readers = [threading.Thread(target=self._pump, args=(name, stream_name, stream, tail),
+                                        name=f"deploy-{name}-{stream_name}", daemon=True)
+                       for stream_name, stream in (('stdout', process.stdout), ('stderr', process.stderr))]
+            for reader in readers:
+                reader.start()
+
+            timed_out = False
+            try:
+                returncode = process.wait(timeout=step['timeout'])
+            except subprocess.TimeoutExpired:
+                timed_out = True
+                self._stop(process)
+                returncode = process.wait()
+            # A helper that outlived its parent may keep the pipes open; don't wait for it forever
+            for reader in readers:
+                reader.join(KILL_GRACE)
+
+            with self._lock:
+                self._process = None
+
+        seconds = time.perf_counter() - start
+        if timed_out:
+            status = TIMEOUT
+        elif self.cancelled:
+            status = CANCELLED
+        elif returncode in step['ok_codes']:
+            status = OK
+        else:
+            status = FAILED
+        self._emit(name, 'info', f"<== {name}: {status} ({seconds:.1f}s)")
+        return {'name': name, 'status': status, 'returncode': returncode, 'seconds': seconds,
+                'tail': list(tail)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the blog with hugo, commit and push it")
+    parser.add_argument('--blog', default=str(Path(__file__).resolve().parent.parent), help="博客根目录")
+    parser.add_argument('--message', help="提交说明，默认为 update 日期 时间")
+    parser.add_argument('--remote', default='origin')
+    parser.add_argument('--branch', default='main')
+    parser.add_argument('--no-push', action='store_true', help="只构建和提交，不拉取和推送")
+    args = parser.parse_args()
+
+    try:
+        steps = deploy_steps(message=args.message, push=not args.no_push,
+                             remote=args.remote, branch=args.branch)
+    except FileNotFoundError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+
+    def on_line(name, stream, line):
+        print(line if stream == 'info' else f"[{name}] {line}",
+              file=sys.stderr if stream == 'stderr' else sys.stdout, flush=True)
+
+    runner = PipelineRunner(args.blog, on_line=on_line)
+    try:
+        results = runner.run(steps)
+    except KeyboardInterrupt:
+        runner.cancel()
+        return 130
+
+    print()
+    print(describe_results(results))
+    if any(result['name'] == 'check' and result['returncode'] == 0 for result in results):
+        print("[INFO] No staged changes.")
+    return 0 if succeeded(results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
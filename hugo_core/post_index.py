@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent, incremental front matter index for content/posts
+"""
+
+import os
+import json
+import datetime
+import threading
+from pathlib import Path
+
+from .frontmatter import FrontMatterError, as_list, read_front_matter
+from .taxonomy import Taxonomy
+
+INDEX_DIR = ".hugo_manager"
+INDEX_FILE = "post_index.json"
+# Single-file updates are appended here and folded into INDEX_FILE later
+JOURNAL_FILE = "post_index.log"
+COMPACT_AFTER = 500
+
+
+def file_stamp(stat):
+    """文件版本标记：mtime 和大小任一变化都视为文件已修改"""
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def build_entry(name, front_matter, stat):
+    """从 front matter 生成索引条目"""
+    draft = front_matter.get('draft', False)
+    if isinstance(draft, str):
+        draft = draft.lower() == 'true'
+    date = front_matter.get('date', '')
+    if isinstance(date, (datetime.date, datetime.time)):
+        date = date.isoformat()  # TOML dates are parsed into datetime objects
+
+    return {
+        'name': name,
+        'title': str(front_matter.get('title', '')),
+        'date': str(date),
+        'draft': bool(draft),
+        'tags': as_list(front_matter.get('tags')),
+        'categories': as_list(front_matter.get('categories')),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime_ns,
+        'stamp': file_stamp(stat),
+    }
+
+
+class PostIndex:
+    """文章元数据索引，保存在博客目录下的 .hugo_manager/post_index.json
+
+    刷新时只对每个文件做一次 stat，mtime 或大小变化的文件才会重新读取和解析。
+    索引文件在第一次刷新或修改时才加载，创建对象不读磁盘。
+    保存单篇文章时只向日志文件追加一行，不重写整个索引；刷新或日志过长时再合并。
+    taxonomy 随条目的每次变化增量更新，用于标签/分类的补全和筛选。
+    """
+
+    VERSION = 2
+
+    def __init__(self, blog_path):
+        self.blog_path = Path(blog_path)
+        self.posts_path = self.blog_path / "content" / "posts"
+        self.index_path = self.blog_path / INDEX_DIR / INDEX_FILE
+        self.journal_path = self.blog_path / INDEX_DIR / JOURNAL_FILE
+        self.journal_records = 0
+        self.entries = {}
+        self.taxonomy = Taxonomy()
+        # The GUI refreshes and saves from worker threads
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.loaded = False
+
+    def load(self):
+        """从磁盘加载索引，版本不符或文件损坏时从空索引开始"""
+        entries = {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+
+        torn = False
+        if data.get('version') == self.VERSION:
+            entries = data.get('posts', {})
+            torn = self._replay(entries)
+        taxonomy = Taxonomy(entries)
+        with self._lock:
+            self.entries = entries
+            self.taxonomy = taxonomy
+            self.loaded = True
+        if torn:
+            # Rewrite the index so later appends do not land after a broken line
+            self.save()
+
+    def _replay(self, entries):
+        """把日志中的修改应用到 entries，遇到写了一半的行时返回 True"""
+        count = 0
+        torn = False
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        torn = True
+                        continue
+                    if record.get('entry') is None:
+                        entries.pop(record['name'], None)
+                    else:
+                        entries[record['name']] = record['entry']
+                    count += 1
+        except OSError:
+            pass
+        self.journal_records = count
+        return torn
+
+    def _ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+
+    def save(self):
+        """原子写入完整的索引文件并清空日志"""
+        with self._save_lock:
+            self._write_snapshot()
+
+    def _write_snapshot(self):
+        # Copy under the save lock so a concurrent append is never dropped with the journal
+        with self._lock:
+            posts = dict(self.entries)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'posts': posts}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
+        self.journal_records = 0
+
+    def _append(self, name, entry):
+        """记录单篇文章的修改（entry 为 None 表示删除），日志过长时合并进索引文件"""
+        with self._save_lock:
+            if self.journal_records >= COMPACT_AFTER:
+                self._write_snapshot()
+                return
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'name': name, 'entry': entry}, ensure_ascii=False) + '\n')
+            self.journal_records += 1
+
+    def refresh(self):
+        """增量刷新索引，返回 (新增, 修改, 删除) 的文件名列表"""
+        self._ensure_loaded()
+        with self._lock:
+            previous = dict(self.entries)
+
+        entries = {}
+        added, changed = [], []
+        dirty = False
+
+        if self.posts_path.exists():
+            with os.scandir(self.posts_path) as it:
+                for dir_entry in it:
+                    if not dir_entry.name.endswith('.md') or not dir_entry.is_file():
+                        continue
+
+                    name = dir_entry.name
+                    stat = dir_entry.stat()
+                    old = previous.get(name)
+                    if old and old['mtime'] == stat.st_mtime_ns and old['size'] == stat.st_size:
+                        entries[name] = old
+                        continue
+
+                    entry = self._read_entry(name, stat)
+                    if entry is None:
+                        continue
+                    if old is None:
+                        added.append(name)
+                    else:
+                        changed.append(name)
+                    entries[name] = entry
+                    dirty = True
+
+        removed = [name for name in previous if name not in entries]
+
+        with self._lock:
+            # Compare with the live entries, which a concurrent update_file may have changed
+            for name, entry in entries.items():
+                old = self.entries.get(name)
+                if old is not entry:
+                    self.taxonomy.replace(old, entry)
+            for name, old in self.entries.items():
+                if name not in entries:
+                    self.taxonomy.replace(old, None)
+            self.entries = entries
+        if dirty or removed or self.journal_records:
+            self.save()
+        return added, changed, removed
+
+    def update_file(self, file_path):
+        """单个文件保存或新建后更新索引"""
+        self._ensure_loaded()
+        file_path = Path(file_path)
+        try:
+            stat = file_path.stat()
+        except OSError:
+            self.remove(file_path.name)
+            return None
+
+        entry = self._read_entry(file_path.name, stat)
+        if entry is not None:
+            with self._lock:
+                self.taxonomy.replace(self.entries.get(file_path.name), entry)
+                self.entries[file_path.name] = entry
+            self._append(file_path.name, entry)
+        return entry
+
+    def remove(self, name):
+        """从索引中移除文章"""
+        self._ensure_loaded()
+        with self._lock:
+            removed = self.entries.pop(name, None)
+            self.taxonomy.replace(removed, None)
+        if removed is not None:
+            self._append(name, None)
+
+    def snapshot(self):
+        """返回当前条目的副本，供其它线程遍历"""
+        with self._lock:
+            return dict(self.entries)
+
+    def get(self, name):
+        with self._lock:
+            return self.entries.get(name)
+
+    def complete_term(self, kind, prefix, limit=10):
+        """kind 为 'tags' 或 'categories'，返回以 prefix 开头的 [(词项, 文章数)]"""
+        self._ensure_loaded()
+        with self._lock:
+            return self.taxonomy[kind].complete(prefix, limit)
+
+    def term_count(self, kind, term):
+        with self._lock:
+            return self.taxonomy[kind].count(term)
+
+    def terms(self, kind):
+        """按名称排序的全部 [(词项, 文章数)]"""
+        self._ensure_loaded()
+        with self._lock:
+            return self.taxonomy[kind].terms()
+
+    def filter(self, draft=None, tag=None, category=None):
+        """按草稿状态、标签、分类筛选，返回按文件名排序的条目"""
+        results = []
+        with self._lock:
+            if tag is None and category is None:
+                entries = sorted(self.entries.items())
+            else:
+                # Only look at the posts that carry the term
+                names = None
+                for kind, term in (('tags', tag), ('categories', category)):
+                    if term is not None:
+                        posts = self.taxonomy[kind].posts.get(term, set())
+                        names = set(posts) if names is None else names & posts
+                entries = sorted((name, self.entries[name]) for name in names)
+        for name, entry in entries:
+            if draft is not None and entry['draft'] != draft:
+                continue
+            if tag is not None and tag not in entry['tags']:
+                continue
+            if category is not None and category not in entry['categories']:
+                continue
+            results.append(entry)
+        return results
+
+    def _read_entry(self, name, stat):
+        """只读取文件头部的 front matter，不读取正文"""
+        try:
+            front_matter, _ = read_front_matter(self.posts_path / name)
+        except OSError:
+            return None
+        except FrontMatterError:
+            # Still list the post; opening it shows the parse error
+            front_matter = {}
+        return build_entry(name, front_matter, stat)
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+Headless post operations shared by the GUI and the batch command line
+
+Bulk edits run one post per task in a process pool. Every post is parsed,
+transformed, serialized back in its own front matter format and written
+atomically, and only posts whose content actually changes are touched.
+With --dry-run the unified diffs are printed instead.
+
+Usage:
+    python hugo_manager.py rename-tag OLD NEW [--categories]
+    python hugo_manager.py merge-tags TARGET SOURCE [SOURCE ...] [--categories]
+    python hugo_manager.py set-draft true|false GLOB [GLOB ...]
+    python hugo_manager.py rewrite-images OLD_PREFIX NEW_PREFIX
+    python hugo_manager.py normalize-dates [--tz +08:00]
+common options: --dry-run --workers N --posts content/posts
+"""
+
+import os
+import re
+import fnmatch
+import argparse
+import datetime
+from pathlib import Path
+
+from .frontmatter import as_list, parse_document, serialize_markdown
+
+DATE_KEYS = ('date', 'lastmod', 'publishDate', 'expiryDate')
+INPUT_DATE_FORMATS = ('%Y-%m-%dT%H:%M:%S%z', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S%z', '%Y-%m-%d %H:%M:%S',
+                      '%Y-%m-%dT%H:%M%z', '%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M', '%Y-%m-%d',
+                      '%Y/%m/%d %H:%M:%S', '%Y/%m/%d %H:%M', '%Y/%m/%d')
+
+# ![alt](url "title") and <img src="url">
+MARKDOWN_IMAGE_RE = re.compile(r'(!\[[^\]]*\]\(\s*<?)([^)\s>]+)')
+HTML_IMAGE_RE = re.compile(r'''(<img\b[^>]*?\bsrc\s*=\s*["'])([^"']+)''', re.IGNORECASE)
+
+
+class AtomicFile:
+    """分块写入同目录的临时文件，commit() 时才替换原文件，写入中断不会留下半个文件"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        self.file = open(self.tmp_path, 'w', encoding='utf-8')
+
+    def write(self, text):
+        self.file.write(text)
+
+    def commit(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def discard(self):
+        self.file.close()
+        try:
+            os.remove(self.tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+def atomic_write(path, content):
+    """写入同目录的临时文件后替换原文件，写入中断不会留下半个文件"""
+    writer = AtomicFile(path)
+    writer.write(content)
+    writer.commit()
+
+
+def new_post_content(title, now=None):
+    """新建文章的初始内容"""
+    now = now or datetime.datetime.now()
+    front_matter = {
+        'title': title,
+        'date': now.strftime('%Y-%m-%dT%H:%M:%S+08:00'),
+        'draft': True,
+        'author': "你的名字",
+        'tags': [],
+        'categories': [],
+        'description': "",
+    }
+    return serialize_markdown(front_matter, "") + "\n"
+
+
+# Operations: (front_matter, body, args) -> (front_matter, body), run in worker processes
+
+def _replace_terms(front_matter, key, mapping):
+    """把 key 列表中的旧词换成新词，合并后去重并保持顺序"""
+    if key not in front_matter:
+        return
+    terms = as_list(front_matter[key])
+    replaced = []
+    for term in terms:
+        term = mapping.get(term, term)
+        if term not in replaced:
+            replaced.append(term)
+    if replaced != terms:
+        front_matter[key] = replaced
+
+
+def op_retag(front_matter, body, args):
+    mapping = {source: args['target'] for source in args['sources']}
+    _replace_terms(front_matter, args['field'], mapping)
+    return front_matter, body
+
+
+def op_set_draft(front_matter, body, args):
+    if front_matter.get('draft') is not args['draft']:
+        front_matter['draft'] = args['draft']
+    return front_matter, body
+
+
+def op_rewrite_images(front_matter, body, args):
+    old, new = args['old'], args['new']
+
+    def replace(match):
+        url = match.group(2)
+        if url.startswith(old):
+            url = new + url[len(old):]
+        return match.group(1) + url
+
+    body = MARKDOWN_IMAGE_RE.sub(replace, body)
+    body = HTML_IMAGE_RE.sub(replace, body)
+    return front_matter, body
+
+
+def parse_date(value, tz):
+    """把常见的日期写法解析成带时区的 datetime，无法识别时返回 None"""
+    if isinstance(value, datetime.datetime):
+        return value if value.tzinfo else value.replace(tzinfo=tz)
+    if isinstance(value, datetime.date):
+        return datetime.datetime(value.year, value.month, value.day, tzinfo=tz)
+
+    text = str(value).strip()
+    if text.endswith('Z'):
+        text = text[:-1] + '+00:00'
+    for fmt in INPUT_DATE_FORMATS:
+        try:
+            parsed = datetime.datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=tz)
+    return None
+
+
+def op_normalize_dates(front_matter, body, args):
+    tz = datetime.datetime.strptime(args['tz'], '%z').tzinfo
+    for key in DATE_KEYS:
+        if key not in front_matter:
+            continue
+        value = front_matter[key]
+        parsed = parse_date(value, tz)
+        if parsed is None:
+            continue
+        if isinstance(value, (datetime.date, datetime.datetime)):
+            front_matter[key] = parsed  # TOML keeps a native datetime
+        else:
+            front_matter[key] = parsed.isoformat()
+    return front_matter, body
+
+
+OPERATIONS = {
+    'retag': op_retag,
+    'set-draft': op_set_draft,
+    'rewrite-images': op_rewrite_images,
+    'normalize-dates': op_normalize_dates,
+}
+# Operations that only touch the body, so they also apply to posts without front matter
+BODY_OPERATIONS = ('rewrite-images',)
+
+
+def process_post(path, operation, args, dry_run):
+    """在子进程中处理一篇文章，返回 (路径, 是否修改, diff, 错误)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        original, original_body, fmt = parse_document(content)
+        if fmt is None and operation not in BODY_OPERATIONS:
+            return path, False, '', None
+
+        # Posts the operation does not change are not rewritten, even if their formatting would differ
+        front_matter, body = OPERATIONS[operation](dict(original), original_body, args)
+        if (front_matter, body) == (original, original_body):
+            return path, False, '', None
+
+        if fmt is None:
+            # Without a header the body is the whole file, written back as it was apart from the edit
+            new_content = content[:len(content) - len(original_body)] + body
+        else:
+            new_content = serialize_markdown(front_matter, body, fmt)
+            if content.endswith('\n'):
+                new_content += '\n'
+
+        diff = ''
+        if dry_run:
+            import difflib
+            name = Path(path).name
+            diff = ''.join(difflib.unified_diff(content.splitlines(True), new_content.splitlines(True),
+                                                f"a/{name}", f"b/{name}"))
+        else:
+            atomic_write(path, new_content)
+        return path, True, diff, None
+    except Exception as e:
+        return path, False, '', str(e)
+
+
+def run_batch(paths, operation, args, dry_run=False, workers=None):
+    """用进程池并行处理文章，按输入顺序返回 process_post 的结果"""
+    paths = [str(path) for path in paths]
+    if not paths:
+        return []
+
+    from concurrent.futures import ProcessPoolExecutor
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(len(paths) // (workers * 4), 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(process_post, paths, [operation] * len(paths), [args] * len(paths),
+                                 [dry_run] * len(paths), chunksize=chunksize))
+
+
+def find_posts(posts_path, patterns=None):
+    """列出文章，patterns 为文件名通配符"""
+    names = sorted(name for name in os.listdir(posts_path) if name.endswith('.md'))
+    if patterns:
+        names = [name for name in names if any(fnmatch.fnmatch(name, pattern) for pattern in patterns)]
+    return [Path(posts_path) / name for name in names]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="hugo_manager", description="Bulk operations on Hugo posts")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--dry-run', action='store_true', help="只显示修改内容，不写入文件")
+    common.add_argument('--workers', type=int, default=None, help="进程数，默认为 CPU 核数")
+    common.add_argument('--posts', default="content/posts", help="文章目录")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('rename-tag', parents=[common], help="重命名标签（新标签已存在时合并）")
+    command.add_argument('old')
+    command.add_argument('new')
+    command.add_argument('--categories', action='store_true', help="操作分类而不是标签")
+
+    command = commands.add_parser('merge-tags', parents=[common], help="把多个标签合并为一个")
+    command.add_argument('target')
+    command.add_argument('sources', nargs='+')
+    command.add_argument('--categories', action='store_true', help="操作分类而不是标签")
+
+    command = commands.add_parser('set-draft', parents=[common], help="按文件名通配符设置草稿状态")
+    command.add_argument('draft', choices=['true', 'false'])
+    command.add_argument('patterns', nargs='+', metavar='GLOB')
+
+    command = commands.add_parser('rewrite-images', parents=[common], help="替换正文中图片链接的前缀")
+    command.add_argument('old')
+    command.add_argument('new')
+
+    command = commands.add_parser('normalize-dates', parents=[common], help="把日期统一为 ISO 8601 格式")
+    command.add_argument('--tz', default='+08:00', help="没有时区的日期使用的时区")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    patterns = None
+    if args.command in ('rename-tag', 'merge-tags'):
+        sources = [args.old] if args.command == 'rename-tag' else args.sources
+        target = args.new if args.command == 'rename-tag' else args.target
+        operation = 'retag'
+        options = {'field': 'categories' if args.categories else 'tags', 'sources': sources, 'target': target}
+    elif args.command == 'set-draft':
+        operation = 'set-draft'
+        options = {'draft': args.draft == 'true'}
+        patterns = args.patterns
+    elif args.command == 'rewrite-images':
+        operation = 'rewrite-images'
+        options = {'old': args.old, 'new': args.new}
+    else:
+        operation = 'normalize-dates'
+        options = {'tz': args.tz}
+
+    results = run_batch(find_posts(args.posts, patterns), operation, options,
+                        dry_run=args.dry_run, workers=args.workers)
+
+    changed = failed = 0
+    for path, was_changed, diff, error in results:
+        if error is not None:
+            failed += 1
+            print(f"! {path}: {error}")
+        elif was_changed:
+            changed += 1
+            if args.dry_run:
+                print(diff, end='')
+            else:
+                print(f"~ {path}")
+    verb = "将修改" if args.dry_run else "已修改"
+    print(f"{verb} {changed} 篇，未变 {len(results) - changed - failed} 篇，失败 {failed} 篇")
+    return 1 if failed else 0
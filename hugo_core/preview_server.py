@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+In-process HTTP preview server with live reload over server-sent events
+"""
+
+import html
+import hashlib
+import threading
+import mimetypes
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Shared with the standalone pages written by hugo_core.export
+PAGE_STYLE = """
+        body { font-family: 'Microsoft YaHei', Arial, sans-serif; line-height: 1.6; margin: 40px; }
+        h1, h2, h3 { color: #333; }
+        code { background: #f4f4f4; padding: 2px 4px; border-radius: 3px; }
+        pre { background: #f4f4f4; padding: 10px; border-radius: 5px; overflow-x: auto; }
+        blockquote { border-left: 4px solid #ddd; margin: 0; padding-left: 20px; color: #666; }
+        img { max-width: 100%; }
+"""
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{title}</title>
+    <style>{style}    </style>
+</head>
+<body>
+    <div id="content">{content}</div>
+    <script>
+        // Reload the article body in place whenever the manager publishes a new version
+        var source = new EventSource('/events');
+        source.onmessage = function () {{
+            fetch('/content').then(function (r) {{ return r.text(); }}).then(function (body) {{
+                document.getElementById('content').innerHTML = body;
+                document.title = document.querySelector('#content h1').textContent;
+            }});
+        }};
+    </script>
+</body>
+</html>
+"""
+
+CONTENT_TEMPLATE = """<h1>{title}</h1>
+{html}"""
+
+
+class MarkdownRenderer:
+    """复用同一个 Markdown 实例，按内容哈希缓存渲染结果"""
+
+    def __init__(self, cache_size=32):
+        import markdown
+
+        self.md = markdown.Markdown(extensions=['extra', 'codehilite'])
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+
+    def render(self, text):
+        key = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        with self._lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+
+            self.md.reset()
+            result = self.md.convert(text)
+
+            self.cache[key] = result
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            return result
+
+
+class PreviewServer:
+    """本地预览服务器
+
+    / 返回当前文章页面，/content 返回正文片段，/events 用 SSE 推送更新，
+    其它路径从 static/ 目录提供（例如 /uploads/posts/...）。
+    """
+
+    def __init__(self, blog_path, host='127.0.0.1', port=0):
+        self.static_path = (Path(blog_path) / "static").resolve()
+        self._renderer = None
+        self.host = host
+        self.port = port
+        self.title = ""
+        self.content = ""
+        self.version = 0
+        self.clients = 0
+        self._changed = threading.Condition()
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def renderer(self):
+        # Importing markdown and its extensions is slow, so wait for the first preview
+        if self._renderer is None:
+            self._renderer = MarkdownRenderer()
+        return self._renderer
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/"
+
+    @property
+    def running(self):
+        return self._httpd is not None
+
+    def start(self):
+        """在后台线程中启动服务器"""
+        if self._httpd is not None:
+            return
+
+        server = self
+
+        class Handler(PreviewRequestHandler):
+            preview = server
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._httpd is None:
+            return
+        with self._changed:
+            self.version += 1
+            self._changed.notify_all()
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._httpd = None
+
+    def publish(self, title, text):
+        """渲染文章并通知已打开的页面刷新"""
+        content = CONTENT_TEMPLATE.format(title=html.escape(title), html=self.renderer.render(text))
+        with self._changed:
+            if content == self.content and title == self.title:
+                return
+            self.title = title
+            self.content = content
+            self.version += 1
+            self._changed.notify_all()
+
+    def page(self):
+        return PAGE_TEMPLATE.format(title=html.escape(self.title), style=PAGE_STYLE, content=self.content)
+
+    def wait_for_change(self, version, timeout):
+        """阻塞直到有新版本或超时，返回当前版本号"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version or self._httpd is None, timeout)
+            return self.version
+
+    def static_file(self, url_path):
+        """把 URL 路径映射到 static/ 下的文件，越界时返回 None"""
+        path = (self.static_path / unquote(url_path).lstrip('/')).resolve()
+        if self.static_path not in path.parents or not path.is_file():
+            return None
+        return path
+
+
+class PreviewRequestHandler(BaseHTTPRequestHandler):
+    preview = None
+    HEARTBEAT = 15
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == '/':
+            self.send_text(self.preview.page(), 'text/html')
+        elif path == '/content':
+            self.send_text(self.preview.content, 'text/html')
+        elif path == '/events':
+            self.stream_events()
+        else:
+            self.send_static(path)
+
+    def send_text(self, text, content_type):
+        data = text.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_static(self, path):
+        file_path = self.preview.static_file(path)
+        if file_path is None:
+            self.send_error(404)
+            return
+
+        content_type = mimetypes.guess_type(file_path.name)[0] or 'application/octet-stream'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(file_path.stat().st_size))
+        self.end_headers()
+        with open(file_path, 'rb') as f:
+            while True:
+                chunk = f.read(65536)
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+
+    def stream_events(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+        preview = self.preview
+        # Send the current version right away so a page that missed an update catches up
+        version = -1
+        with preview._changed:
+            preview.clients += 1
+        try:
+            while preview.running:
+                current = preview.wait_for_change(version, self.HEARTBEAT)
+                if current != version:
+                    version = current
+                    self.wfile.write(f"data: {version}\n\n".encode('utf-8'))
+                else:
+                    # Comment line keeps proxies and the browser from timing out
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with preview._changed:
+                preview.clients -= 1
+
+    def log_message(self, format, *args):
+        pass
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fast publish of a single post whose body changed, without a full hugo build
+
+When the only input that changed since the last recorded build is one
+existing post, and its front matter (title, date, tags, categories, ...)
+is the same as at that build, no listing or taxonomy page can have changed.
+Only the post's own page and the feeds that carry its content need
+updating. Hugo renders just those, with the site's own templates, into a
+scratch directory using a render segment (hugo >= 0.124). The post's page
+is then copied into public/ and its <item> is spliced into each feed
+(index.xml, posts/index.xml, the tag and category feeds). Everything else
+in public/ is left alone.
+
+sitemap.xml is not re-rendered. Its entry for the post holds only the URL
+and lastmod, which come from the unchanged front matter; settings that
+take dates from the file itself are refused below. Any change that would
+touch the sitemap needs a full build.
+
+Anything else (a new post, edited front matter, several changed files,
+permalink settings, an older hugo) falls back to a full build.
+
+Usage: python -m hugo_core.quick_publish [--blog PATH] [--hugo PATH]
+"""
+
+import os
+import re
+import sys
+import argparse
+import subprocess
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from .build_manifest import INPUT_FILES, OUTPUT_DIR, POSTS_DIR, BuildManifest, front_matter_digest
+from .frontmatter import locate_body
+from .post_index import INDEX_DIR
+
+SEGMENT = "hugo_manager_publish"
+SCRATCH_DIR = "publish"
+MIN_HUGO = (0, 124)
+# Site settings that move pages or make dates depend on the file, so the URL
+# or sitemap entry of an edited post cannot be predicted
+UNSUPPORTED_SETTINGS = ('permalinks', 'uglyurls', 'disablepathtolower', 'enablegitinfo', ':filemodtime')
+GLOB_CHARS = set('*?[]{}\\')
+BASE_URL_RE = re.compile(r'''^\s*baseURL\s*=\s*['"]([^'"]*)['"]''', re.IGNORECASE | re.MULTILINE)
+
+ITEM_RE = re.compile(r'<item>.*?</item>', re.S)
+LINK_RE = re.compile(r'<link>([^<]*)</link>')
+
+SEGMENT_CONFIG = """[segments]
+  [segments.{name}]
+    [[segments.{name}.includes]]
+      path = "{path}"
+    [[segments.{name}.includes]]
+      kind = "{{home,section,term}}"
+      output = "rss"
+"""
+
+
+class PublishError(Exception):
+    """快速发布无法完成，需要完整构建"""
+
+
+def site_config(blog_path):
+    """站点配置文件，没有时返回 None"""
+    for name in INPUT_FILES:
+        if (Path(blog_path) / name).is_file():
+            return Path(blog_path) / name
+    return None
+
+
+def hugo_version(hugo):
+    """hugo 的版本号 (主, 次)，无法识别时返回 None"""
+    try:
+        output = subprocess.run([hugo, 'version'], capture_output=True, text=True, timeout=30).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r'v(\d+)\.(\d+)', output)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def base_path(blog_path):
+    """baseURL 中的路径部分，例如 https://example.com/blog/ -> /blog"""
+    match = BASE_URL_RE.search(site_config(blog_path).read_text(encoding='utf-8'))
+    return urlsplit(match.group(1)).path.rstrip('/') if match else ''
+
+
+def content_path(relative):
+    """hugo 中文章的路径，例如 content/posts/My Post.md -> /posts/my-post"""
+    stem = relative[len('content'):-len('.md')]
+    return stem.lower().replace(' ', '-')
+
+
+def page_url(relative, front_matter):
+    """文章页面的 URL 路径，例如 /posts/my-post/"""
+    url = front_matter.get('url')
+    if not url:
+        slug = front_matter.get('slug') or Path(relative).stem
+        url = f"/{POSTS_DIR[len('content/'):]}{slug}/"
+    url = '/' + str(url).strip('/') + '/'
+    return url.lower().replace(' ', '-')
+
+
+def plan_publish(blog_path, manifest, changed):
+    """判断能否快速发布，返回 (文章相对路径, None) 或 (None, 需要完整构建的原因)"""
+    if len(changed) != 1:
+        return None, f"{len(changed)} 个源文件有变化"
+    relative = changed[0]
+    if not (relative.startswith(POSTS_DIR) and relative.endswith('.md')):
+        return None, f"{relative} 不是文章"
+    if relative not in manifest.inputs:
+        return None, f"{relative} 是新文章或被删除"
+    built = manifest.built_front_matter(relative)
+    if built is None:
+        return None, f"没有 {relative} 上次构建时的 front matter 记录"
+    try:
+        if front_matter_digest(Path(blog_path) / relative) != built:
+            return None, f"{relative} 的 front matter 有变化"
+    except (OSError, ValueError) as e:
+        return None, f"无法读取 {relative}: {e}"
+    if GLOB_CHARS & set(relative):
+        return None, f"{relative} 的文件名含有通配符"
+
+    config = site_config(blog_path)
+    if config is None:
+        return None, "找不到站点配置文件"
+    text = config.read_text(encoding='utf-8').lower()
+    for setting in UNSUPPORTED_SETTINGS:
+        if setting in text:
+            return None, f"站点配置使用了 {setting}"
+    return relative, None
+
+
+def split_entries(text):
+    """返回订阅中的 {URL 路径: <item> 的 (起始, 结束)}"""
+    entries = {}
+    for match in ITEM_RE.finditer(text):
+        key = LINK_RE.search(match.group(0))
+        if key:
+            entries[unquote(urlsplit(key.group(1).strip()).path)] = match.span()
+    return entries
+
+
+def patch_entry(old_text, new_text, url):
+    """用 new_text 中 url 的条目替换 old_text 中的同一条目，没有变化时返回 None"""
+    old_span = split_entries(old_text).get(url)
+    new_span = split_entries(new_text).get(url)
+    if old_span is None and new_span is None:
+        return None
+    if old_span is None or new_span is None:
+        raise PublishError(f"{url} 只出现在新旧两个版本中的一个里")
+    entry = new_text[new_span[0]:new_span[1]]
+    if old_text[old_span[0]:old_span[1]] == entry:
+        return None
+    return old_text[:old_span[0]] + entry + old_text[old_span[1]:]
+
+
+def read_text(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return f.read()
+
+
+def write_text(path, text):
+    """原样写入（不转换换行符），先写临时文件再替换"""
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class QuickPublisher:
+    """用 hugo 的渲染分段只渲染一篇文章和订阅，再把结果合并进 public/"""
+
+    def __init__(self, blog_path, hugo):
+        self.blog_path = Path(blog_path)
+        self.hugo = hugo
+        self.public_path = self.blog_path / OUTPUT_DIR
+        # Kept between runs, so hugo only has to sync static/ files that changed
+        self.scratch_path = self.blog_path / INDEX_DIR / SCRATCH_DIR
+        self.site_path = self.scratch_path / "site"
+
+    def render(self, relative):
+        """在临时目录中渲染文章页面和所有订阅"""
+        version = hugo_version(self.hugo)
+        if version is None or version < MIN_HUGO:
+            raise PublishError(f"需要 hugo {MIN_HUGO[0]}.{MIN_HUGO[1]} 以上版本")
+
+        self.site_path.mkdir(parents=True, exist_ok=True)
+        # Outputs left by an earlier run must not pass for fresh ones
+        for dirpath, dirnames, filenames in os.walk(self.site_path):
+            for filename in filenames:
+                if filename.endswith('.xml') or filename == 'index.html':
+                    os.remove(os.path.join(dirpath, filename))
+
+        overlay = self.scratch_path / "segment.toml"
+        write_text(overlay, SEGMENT_CONFIG.format(name=SEGMENT, path=content_path(relative)))
+        argv = [self.hugo, '--config', f"{site_config(self.blog_path)},{overlay}",
+                '--renderSegments', SEGMENT, '--destination', str(self.site_path)]
+        print(' '.join(argv), flush=True)
+        returncode = subprocess.call(argv, cwd=str(self.blog_path))
+        if returncode != 0:
+            raise PublishError(f"hugo 退出码 {returncode}")
+
+    def patches(self, relative):
+        """返回 {public/ 下的相对路径: 新内容}，只包含真正变化的文件"""
+        front_matter, _, _ = locate_body(self.blog_path / relative)
+        url = page_url(relative, front_matter)
+        page = url.strip('/') + '/index.html'
+        if not (self.public_path / page).is_file():
+            raise PublishError(f"public/ 中没有 {page}，文章可能还没有发布过")
+        if not (self.site_path / page).is_file():
+            raise PublishError(f"hugo 没有渲染出 {page}")
+
+        patches = {}
+        new_page = read_text(self.site_path / page)
+        if read_text(self.public_path / page) != new_page:
+            patches[page] = new_page
+
+        # Feeds link to the post with its full URL
+        key = base_path(self.blog_path) + url
+        feeds = 0
+
+        for dirpath, dirnames, filenames in os.walk(self.site_path):
+            for filename in filenames:
+                if not filename.endswith('.xml'):
+                    continue
+                path = Path(dirpath) / filename
+                target = path.relative_to(self.site_path).as_posix()
+                new_text = read_text(path)
+                if key not in split_entries(new_text):
+                    continue
+                if not (self.public_path / target).is_file():
+                    raise PublishError(f"public/ 中没有 {target}")
+                feeds += 1
+                patched = patch_entry(read_text(self.public_path / target), new_text, key)
+                if patched is not None:
+                    patches[target] = patched
+        if not feeds:
+            # The section feed always lists the post, so its URL was not recognised
+            raise PublishError(f"订阅中找不到 {key}")
+        return patches
+
+    def publish(self, relative):
+        """渲染并更新 public/，返回更新的文件列表；失败时不修改 public/"""
+        self.render(relative)
+        patches = self.patches(relative)
+        for target, text in sorted(patches.items()):
+            write_text(self.public_path / target, text)
+        return sorted(patches)
+
+
+def full_build(hugo, blog_path):
+    return subprocess.call([hugo], cwd=str(blog_path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish a post whose body changed without a full hugo build")
+    parser.add_argument('--blog', default='.', help="博客根目录")
+    parser.add_argument('--hugo', default=None, help="hugo 可执行文件，默认自动查找")
+    args = parser.parse_args()
+
+    from .pipeline import find_hugo
+
+    hugo = args.hugo or find_hugo()
+    if hugo is None:
+        print("[ERROR] 找不到 hugo，请安装 Hugo 或把它加入 PATH", file=sys.stderr)
+        return 1
+
+    manifest = BuildManifest(args.blog)
+    _, _, changed = manifest.check_inputs()
+    relative, reason = plan_publish(args.blog, manifest, changed)
+    if relative is None:
+        print(f"[INFO] 完整构建: {reason}", flush=True)
+        return full_build(hugo, args.blog)
+
+    print(f"[INFO] 只更新 {relative} 的页面和订阅", flush=True)
+    try:
+        updated = QuickPublisher(args.blog, hugo).publish(relative)
+    except (OSError, PublishError) as e:
+        print(f"[INFO] 完整构建: {e}", flush=True)
+        return full_build(hugo, args.blog)
+    for target in updated:
+        print(f"~ {OUTPUT_DIR}/{target}")
+    print(f"[INFO] 更新了 {len(updated)} 个文件")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local revision history for posts, stored as compressed line deltas
+
+Every save appends one JSON line to .hugo_manager/revisions/<post>.log. The
+record holds the revision's sha1, time and size, plus its data. The data is
+a zlib-compressed line delta against the revision before it, or a full
+snapshot every KEYFRAME_INTERVAL revisions or whenever that is smaller.
+Saving content that already exists in the log (undoing back to an earlier
+version, say) stores no data at all, only a pointer to the existing object.
+Listing reads just the log; restoring applies at most KEYFRAME_INTERVAL
+deltas.
+
+Retention keeps the newest `keep_recent` revisions plus the last revision
+of each day for `keep_days` days. When a log holds twice as many
+revisions as that policy keeps, it is compacted: the kept revisions are
+re-encoded into a fresh log and the rest are dropped. A compacted log
+therefore has to double again before the next compaction.
+
+Usage: python -m hugo_core.revisions list|diff|restore|compact|stats ...
+"""
+
+import os
+import json
+import time
+import zlib
+import base64
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+
+from .post_index import INDEX_DIR
+
+REVISION_DIR = "revisions"
+KEYFRAME_INTERVAL = 50
+KEEP_RECENT = 100
+KEEP_DAYS = 90
+
+
+def revision_id(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def make_delta(base, text):
+    """把 text 表示为 base 的行差异：[起始行, 结束行] 表示复制 base 中的行，字符串表示新内容"""
+    from difflib import SequenceMatcher
+
+    old = base.splitlines(True)
+    new = text.splitlines(True)
+    ops = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old, new).get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(new[j1:j2]))
+    return ops
+
+
+def apply_delta(base, ops):
+    old = base.splitlines(True)
+    return ''.join(''.join(old[op[0]:op[1]]) if isinstance(op, list) else op for op in ops)
+
+
+def _pack(value):
+    data = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.b64encode(zlib.compress(data, 9)).decode('ascii')
+
+
+def _unpack(data):
+    return json.loads(zlib.decompress(base64.b64decode(data)))
+
+
+def select_kept(revisions, keep_recent=KEEP_RECENT, keep_days=KEEP_DAYS, now=None):
+    """按保留策略返回要保留的修订下标集合"""
+    now = time.time() if now is None else now
+    kept = set(range(max(len(revisions) - keep_recent, 0), len(revisions)))
+    days = {}
+    for i, revision in enumerate(revisions):
+        if now - revision['t'] <= keep_days * 86400:
+            # Later revisions of the same day replace earlier ones
+            days[time.strftime('%Y-%m-%d', time.localtime(revision['t']))] = i
+    return kept | set(days.values())
+
+
+class RevisionLog:
+    """一篇文章的修订日志（内存中的视图）
+
+    revisions 为按时间排列的 {'t', 'id', 'size', 'note'}，
+    objects 为 {id: (基准修订 id 或 None, 打包的数据, 重建时要应用的差异数)}。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.revisions = []
+        self.objects = {}
+        self.stamp = None
+
+    def load(self):
+        self.revisions = []
+        self.objects = {}
+        try:
+            f = open(self.path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            self.stamp = None
+            return
+        valid = []
+        torn = False
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn last line from an interrupted save; the revision before it is intact
+                    torn = True
+                    continue
+                if not line.endswith('\n'):
+                    torn = True
+                if self._add(record):
+                    valid.append(line.rstrip('\n') + '\n')
+                else:
+                    torn = True
+        if torn:
+            # Rewrite the log so later appends do not land after a broken line
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(valid)
+            os.replace(tmp_path, self.path)
+        self.stamp = self._current_stamp()
+
+    def _current_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def is_stale(self):
+        return self.stamp != self._current_stamp()
+
+    def _add(self, record):
+        """加入一条记录，它依赖的数据不存在时返回 False"""
+        if 'z' in record:
+            base = record.get('base')
+            if base is not None and base not in self.objects:
+                return False
+            depth = 0 if base is None else self.objects[base][2] + 1
+            self.objects[record['id']] = (base, record['z'], depth)
+        elif record['id'] not in self.objects:
+            return False
+        self.revisions.append({'t': record['t'], 'id': record['id'], 'size': record['size'],
+                               'note': record.get('note', '')})
+        return True
+
+    def text(self, rev_id):
+        """重建某个修订的完整内容"""
+        chain = []
+        while rev_id is not None:
+            base, data, _ = self.objects[rev_id]
+            chain.append(data)
+            rev_id = base
+        text = _unpack(chain.pop())
+        while chain:
+            text = apply_delta(text, _unpack(chain.pop()))
+        return text
+
+    def encode(self, text, rev_id, previous_id, previous_text):
+        """生成一条记录：相对 previous_id 的差异或完整快照，内容已存在时不带数据"""
+        record = {'t': time.time(), 'id': rev_id, 'size': len(text)}
+        if rev_id in self.objects:
+            return record
+        full = _pack(text)
+        if previous_id is not None and self.objects[previous_id][2] < KEYFRAME_INTERVAL - 1:
+            delta = _pack(make_delta(previous_text, text))
+            if len(delta) < len(full):
+                record.update(base=previous_id, z=delta)
+                return record
+        record['z'] = full
+        return record
+
+
+class RevisionStore:
+    """.hugo_manager/revisions 下所有文章的修订历史，可在多个线程中使用"""
+
+    def __init__(self, blog_path, keep_recent=KEEP_RECENT, keep_days=KEEP_DAYS):
+        self.root = Path(blog_path) / INDEX_DIR / REVISION_DIR
+        self.keep_recent = keep_recent
+        self.keep_days = keep_days
+        self.logs = {}
+        # Text of the newest revision per post, so the next delta needs no reconstruction
+        self.latest = {}
+        self._lock = threading.Lock()
+
+    def _log(self, name):
+        log = self.logs.get(name)
+        if log is None:
+            log = self.logs[name] = RevisionLog(self.root / f"{name}.log")
+            log.load()
+        elif log.is_stale():
+            log.load()
+            self.latest.pop(name, None)
+        return log
+
+    def has_history(self, name):
+        with self._lock:
+            return bool(self._log(name).revisions)
+
+    def record(self, name, text, note=''):
+        """保存一个修订，与最新修订相同时不记录；返回是否记录"""
+        rev_id = revision_id(text)
+        with self._lock:
+            log = self._log(name)
+            previous = log.revisions[-1]['id'] if log.revisions else None
+            if previous == rev_id:
+                return False
+            previous_text = None
+            if previous is not None:
+                cached = self.latest.get(name)
+                previous_text = cached[1] if cached and cached[0] == previous else log.text(previous)
+
+            record = log.encode(text, rev_id, previous, previous_text)
+            if note:
+                record['note'] = note
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(log.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            log._add(record)
+            log.stamp = log._current_stamp()
+            self.latest[name] = (rev_id, text)
+
+            # The cheap check first; the kept set only matters once it passes
+            if len(log.revisions) > 2 * (self.keep_recent + 1):
+                kept = select_kept(log.revisions, self.keep_recent, self.keep_days)
+                if len(log.revisions) > 2 * (len(kept) + 1):
+                    self._compact(name, log, kept)
+            return True
+
+    def record_file(self, name, path, note=''):
+        """把磁盘上的文件内容作为一个修订（例如第一次保存前的原始版本）"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except (OSError, UnicodeDecodeError):
+            return False
+        return self.record(name, text, note)
+
+    def list(self, name):
+        """按时间倒序返回修订列表"""
+        with self._lock:
+            return list(reversed(self._log(name).revisions))
+
+    def text(self, name, rev_id):
+        with self._lock:
+            cached = self.latest.get(name)
+            if cached and cached[0] == rev_id:
+                return cached[1]
+            return self._log(name).text(rev_id)
+
+    def diff(self, name, old_id, new_id=None, new_text=None, context=3):
+        """两个修订（或一个修订与 new_text）之间的 unified diff"""
+        from difflib import unified_diff
+
+        old = self.text(name, old_id)
+        new = new_text if new_id is None else self.text(name, new_id)
+        return ''.join(unified_diff(old.splitlines(True), new.splitlines(True),
+                                    f"{name}@{old_id[:8]}", f"{name}@{(new_id or 'current')[:8]}", n=context))
+
+    def compact(self, name):
+        with self._lock:
+            log = self._log(name)
+            return self._compact(name, log)
+
+    def _compact(self, name, log, kept=None):
+        """按保留策略重写日志，返回删除的修订数"""
+        if kept is None:
+            kept = select_kept(log.revisions, self.keep_recent, self.keep_days)
+        kept = sorted(kept)
+        if len(kept) == len(log.revisions):
+            return 0
+
+        fresh = RevisionLog(log.path)
+        lines = []
+        previous_id = previous_text = None
+        for i in kept:
+            revision = log.revisions[i]
+            text = log.text(revision['id'])
+            if revision['id'] == previous_id:
+                continue
+            record = fresh.encode(text, revision['id'], previous_id, previous_text)
+            record['t'] = revision['t']
+            if revision['note']:
+                record['note'] = revision['note']
+            fresh._add(record)
+            lines.append(json.dumps(record, ensure_ascii=False) + '\n')
+            previous_id, previous_text = revision['id'], text
+
+        tmp_path = log.path.with_name(log.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+        os.replace(tmp_path, log.path)
+        removed = len(log.revisions) - len(fresh.revisions)
+        fresh.stamp = fresh._current_stamp()
+        self.logs[name] = fresh
+        return removed
+
+    def names(self):
+        try:
+            return sorted(path.name[:-4] for path in self.root.iterdir() if path.name.endswith('.log'))
+        except FileNotFoundError:
+            return []
+
+    def stats(self):
+        """{文章: (修订数, 日志字节数, 最新修订的字符数)}"""
+        result = {}
+        for name in self.names():
+            revisions = self.list(name)
+            if revisions:
+                result[name] = (len(revisions), os.path.getsize(self.root / f"{name}.log"), revisions[0]['size'])
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local revision history of posts")
+    parser.add_argument('--blog', default='.', help="博客根目录")
+    commands = parser.add_subparsers(dest='command', required=True)
+    command = commands.add_parser('list', help="列出一篇文章的修订")
+    command.add_argument('post')
+    command = commands.add_parser('diff', help="比较两个修订，省略第二个时与当前文件比较")
+    command.add_argument('post')
+    command.add_argument('old')
+    command.add_argument('new', nargs='?')
+    command = commands.add_parser('restore', help="把文章恢复为某个修订")
+    command.add_argument('post')
+    command.add_argument('revision')
+    command = commands.add_parser('compact', help="按保留策略压缩修订日志")
+    command.add_argument('--keep-recent', type=int, default=KEEP_RECENT, help="保留最新的 N 个修订")
+    command.add_argument('--keep-days', type=int, default=KEEP_DAYS, help="在 N 天内每天保留一个修订")
+    commands.add_parser('stats', help="各文章的修订数和占用空间")
+    args = parser.parse_args()
+
+    store = RevisionStore(args.blog, **({'keep_recent': args.keep_recent, 'keep_days': args.keep_days}
+                                        if args.command == 'compact' else {}))
+    posts_path = Path(args.blog) / "content" / "posts"
+
+    def resolve(prefix):
+        matches = [revision['id'] for revision in store.list(args.post) if revision['id'].startswith(prefix)]
+        if not matches:
+            raise SystemExit(f"没有修订 {prefix}")
+        return matches[0]
+
+    if args.command == 'list':
+        for revision in store.list(args.post):
+            stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(revision['t']))
+            print(f"{revision['id'][:10]}  {stamp}  {revision['size']:>8}  {revision['note']}")
+    elif args.command == 'diff':
+        if args.new:
+            print(store.diff(args.post, resolve(args.old), resolve(args.new)), end='')
+        else:
+            current = (posts_path / args.post).read_text(encoding='utf-8')
+            print(store.diff(args.post, resolve(args.old), new_text=current), end='')
+    elif args.command == 'restore':
+        from .posts import atomic_write
+
+        path = posts_path / args.post
+        store.record_file(args.post, path)
+        text = store.text(args.post, resolve(args.revision))
+        atomic_write(path, text)
+        store.record(args.post, text, note='restore')
+        print(f"已恢复 {args.post}")
+    elif args.command == 'compact':
+        for name in store.names():
+            removed = store.compact(name)
+            if removed:
+                print(f"{name}: 删除 {removed} 个修订")
+    else:
+        total = 0
+        for name, (count, size, chars) in sorted(store.stats().items()):
+            total += size
+            print(f"{name}: {count} 个修订，{size} 字节（当前 {chars} 字符）")
+        print(f"共 {total} 字节")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
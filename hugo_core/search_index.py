@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Full-text search over posts with CJK bigram tokenization
+
+The inverted index is an SQLite FTS5 table stored in .hugo_manager/search.db.
+Text is tokenized here before it reaches SQLite: latin words are kept whole
+and runs of CJK characters become overlapping bigrams, so Chinese posts can
+be searched without a word segmenter.
+"""
+
+import re
+import sqlite3
+import threading
+from pathlib import Path
+
+from .frontmatter import FrontMatterError, as_list, parse_markdown
+from .post_index import INDEX_DIR
+
+SEARCH_FILE = "search.db"
+
+TOKEN_RE = re.compile(
+    r'[0-9a-z_]+'
+    r'|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+'
+)
+
+
+def tokenize(text):
+    """把文本切分成检索词：拉丁词整体保留，CJK 连续字符切成二元组
+
+    每个 CJK 串最后一个字也单独输出，这样任何一个字都是某个词的开头，
+    单字查询可以用前缀匹配找到。
+    """
+    tokens = []
+    for match in TOKEN_RE.finditer(text.lower()):
+        run = match.group()
+        if run[0] < '\u3040':
+            tokens.append(run)
+            continue
+        for i in range(len(run) - 1):
+            tokens.append(run[i:i + 2])
+        tokens.append(run[-1])
+    return tokens
+
+
+def build_query(text):
+    """把用户输入转换成 FTS5 查询，所有词都必须命中"""
+    clauses = []
+    for match in TOKEN_RE.finditer(text.lower()):
+        run = match.group()
+        if run[0] < '\u3040':
+            clauses.append(f'"{run}"*')
+        elif len(run) == 1:
+            clauses.append(f'"{run}"*')
+        else:
+            # Consecutive bigrams as a phrase keep the characters adjacent
+            bigrams = ' '.join(run[i:i + 2] for i in range(len(run) - 1))
+            clauses.append(f'"{bigrams}"')
+    return ' AND '.join(clauses)
+
+
+class SearchIndex:
+    """持久化的全文倒排索引，按文章索引中的文件版本标记增量更新"""
+
+    VERSION = 2
+    # bm25 column weights: name (unindexed), title, tags, body
+    WEIGHTS = (0.0, 10.0, 5.0, 1.0)
+
+    def __init__(self, blog_path):
+        self.blog_path = Path(blog_path)
+        self.posts_path = self.blog_path / "content" / "posts"
+        self.db_path = self.blog_path / INDEX_DIR / SEARCH_FILE
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self):
+        """每个线程使用自己的连接（WAL 模式下读写互不阻塞），第一次连接时建表"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path))
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        if not self._ready:
+            with self._write_lock:
+                if not self._ready:
+                    self._setup(conn)
+                    self._ready = True
+        return conn
+
+    def _setup(self, conn):
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != self.VERSION:
+            conn.executescript("""
+                DROP TABLE IF EXISTS posts;
+                DROP TABLE IF EXISTS files;
+            """)
+        conn.executescript(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS posts USING fts5(
+                name UNINDEXED, title, tags, body, tokenize='unicode61'
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                name TEXT PRIMARY KEY,
+                stamp TEXT NOT NULL,
+                doc INTEGER NOT NULL
+            );
+            PRAGMA user_version={self.VERSION};
+        """)
+        conn.commit()
+
+    def sync(self, entries):
+        """根据文章索引的条目同步：只重新索引版本标记变化的文章，删除已不存在的文章"""
+        conn = self._connect()
+        indexed = dict(conn.execute("SELECT name, stamp FROM files"))
+
+        changed = [entry for name, entry in entries.items() if indexed.get(name) != entry['stamp']]
+        removed = [name for name in indexed if name not in entries]
+        if not changed and not removed:
+            return 0
+
+        with self._write_lock:
+            for name in removed:
+                self._delete(conn, name)
+            for entry in changed:
+                try:
+                    # A post that is not valid UTF-8 is still indexed rather than stopping the refresh
+                    with open(self.posts_path / entry['name'], 'r', encoding='utf-8', errors='replace') as f:
+                        content = f.read()
+                except OSError:
+                    continue
+                self._index(conn, entry['name'], entry['stamp'], content)
+            conn.commit()
+        return len(changed) + len(removed)
+
+    def update_file(self, name, stamp, content):
+        """保存文章后更新单篇文章的索引"""
+        conn = self._connect()
+        with self._write_lock:
+            self._index(conn, name, stamp, content)
+            conn.commit()
+
+    def remove(self, name):
+        conn = self._connect()
+        with self._write_lock:
+            self._delete(conn, name)
+            conn.commit()
+
+    def search(self, text, limit=200):
+        """返回按相关度排序的文件名列表"""
+        query = build_query(text)
+        if not query:
+            return []
+
+        weights = ', '.join(str(weight) for weight in self.WEIGHTS)
+        rows = self._connect().execute(
+            f"SELECT name FROM posts WHERE posts MATCH ? ORDER BY bm25(posts, {weights}) LIMIT ?",
+            (query, limit)
+        )
+        return [row[0] for row in rows]
+
+    def _index(self, conn, name, stamp, content):
+        try:
+            front_matter, body = parse_markdown(content)
+        except FrontMatterError:
+            front_matter, body = {}, content
+        terms = as_list(front_matter.get('tags')) + as_list(front_matter.get('categories'))
+
+        self._delete(conn, name)
+        cursor = conn.execute(
+            "INSERT INTO posts (name, title, tags, body) VALUES (?, ?, ?, ?)",
+            (name,
+             ' '.join(tokenize(str(front_matter.get('title', '')))),
+             ' '.join(tokenize(' '.join(terms))),
+             ' '.join(tokenize(body)))
+        )
+        conn.execute("INSERT INTO files (name, stamp, doc) VALUES (?, ?, ?)",
+                     (name, stamp, cursor.lastrowid))
+
+    def _delete(self, conn, name):
+        row = conn.execute("SELECT doc FROM files WHERE name = ?", (name,)).fetchone()
+        if row is not None:
+            conn.execute("DELETE FROM posts WHERE rowid = ?", row)
+            conn.execute("DELETE FROM files WHERE name = ?", (name,))
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+In-memory tag/category taxonomy kept in step with the post index
+
+For every kind (tags, categories) each term maps to the set of posts using
+it, and a list of (casefolded term, term) pairs is kept sorted, so prefix
+completion is a binary search plus the matches returned. Adding or removing
+a post only touches its own terms; nothing is ever rebuilt from scratch
+after the first load.
+"""
+
+from bisect import bisect_left, insort
+
+KINDS = ('tags', 'categories')
+
+
+def fold(term):
+    return term.casefold()
+
+
+class TermIndex:
+    """一种分类法（标签或分类）：词项 -> 文章文件名集合，外加按小写排序的词项表"""
+
+    def __init__(self):
+        self.posts = {}
+        self.keys = []
+
+    def add(self, term, name):
+        posts = self.posts.get(term)
+        if posts is None:
+            posts = self.posts[term] = set()
+            insort(self.keys, (fold(term), term))
+        posts.add(name)
+
+    def discard(self, term, name):
+        posts = self.posts.get(term)
+        if posts is None:
+            return
+        posts.discard(name)
+        if not posts:
+            del self.posts[term]
+            key = (fold(term), term)
+            i = bisect_left(self.keys, key)
+            if i < len(self.keys) and self.keys[i] == key:
+                del self.keys[i]
+
+    def count(self, term):
+        return len(self.posts.get(term, ()))
+
+    def complete(self, prefix, limit=10):
+        """返回以 prefix 开头（不区分大小写）的前 limit 个词项 [(词项, 文章数)]"""
+        key = fold(prefix)
+        i = bisect_left(self.keys, (key,))
+        matches = []
+        while i < len(self.keys) and len(matches) < limit:
+            folded, term = self.keys[i]
+            if not folded.startswith(key):
+                break
+            matches.append((term, len(self.posts[term])))
+            i += 1
+        return matches
+
+    def terms(self):
+        """按名称排序的全部词项 [(词项, 文章数)]"""
+        return [(term, len(self.posts[term])) for _, term in self.keys]
+
+
+class Taxonomy:
+    """所有分类法；条目格式与 PostIndex 的条目相同"""
+
+    def __init__(self, entries=None):
+        self.kinds = {kind: TermIndex() for kind in KINDS}
+        for entry in (entries or {}).values():
+            self.add_entry(entry)
+
+    def add_entry(self, entry):
+        for kind, index in self.kinds.items():
+            for term in entry.get(kind, ()):
+                index.add(term, entry['name'])
+
+    def remove_entry(self, entry):
+        for kind, index in self.kinds.items():
+            for term in entry.get(kind, ()):
+                index.discard(term, entry['name'])
+
+    def replace(self, old, new):
+        """一篇文章从 old 变为 new（任一方可以为 None）"""
+        if old is not None:
+            self.remove_entry(old)
+        if new is not None:
+            self.add_entry(new)
+
+    def __getitem__(self, kind):
+        return self.kinds[kind]
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in tracing spans with Chrome trace-event export
+
+    with tracing.span('load.read', file=name):
+        ...
+
+While tracing is disabled span() returns a shared no-op context manager, so
+instrumented code pays one global lookup and one call. When enabled, every
+span becomes a complete ("X") event; export() writes them as JSON that
+chrome://tracing and https://ui.perfetto.dev can open. The most recent
+top-level span is kept in `last` for a live latency display.
+"""
+
+import os
+import json
+import time
+import threading
+from collections import deque
+
+MAX_EVENTS = 200000
+
+_enabled = False
+_events = deque(maxlen=MAX_EVENTS)
+_threads = {}
+_local = threading.local()
+_origin = time.perf_counter_ns()
+# (name, milliseconds) of the latest finished top-level span
+last = None
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'args', 'start')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        _local.depth = getattr(_local, 'depth', 0) + 1
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        global last
+        end = time.perf_counter_ns()
+        _local.depth -= 1
+
+        thread = threading.current_thread()
+        if thread.ident not in _threads:
+            _threads[thread.ident] = thread.name
+        event = {
+            'name': self.name,
+            'cat': self.name.split('.', 1)[0],
+            'ph': 'X',
+            'ts': (self.start - _origin) / 1000,
+            'dur': (end - self.start) / 1000,
+            'pid': os.getpid(),
+            'tid': thread.ident,
+        }
+        if self.args or exc_type is not None:
+            args = {key: str(value) for key, value in self.args.items()}
+            if exc_type is not None:
+                args['error'] = exc_type.__name__
+            event['args'] = args
+        _events.append(event)
+
+        if _local.depth == 0:
+            last = (self.name, (end - self.start) / 1e6)
+        return False
+
+
+def span(name, **args):
+    """记录一段耗时；未启用时几乎没有开销"""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def clear():
+    global last
+    _events.clear()
+    last = None
+
+
+def export(path):
+    """把记录的事件写成 Chrome trace JSON，返回事件数"""
+    events = list(_events)
+    pid = os.getpid()
+    metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                for tid, name in list(_threads.items())]
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return len(events)
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Background file watching for content/posts and static/uploads
+
+On Linux the kernel reports changes through inotify (called via ctypes, no
+extra dependency). Elsewhere, or when inotify is unavailable or out of
+watches, a thread compares stat snapshots instead. Either way consumers
+call drain() and get {path: CHANGED | DELETED}, coalesced so only the final
+state of each path is reported, without ever rescanning the directories
+themselves. Hidden files (editor swap files, our own .name.tmp files) are
+ignored.
+"""
+
+import os
+import sys
+import struct
+import threading
+
+CHANGED = 'changed'
+DELETED = 'deleted'
+# Key reported when the kernel dropped events; the consumer should do a full refresh
+OVERFLOW = None
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF)
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def is_hidden(name):
+    return name.startswith('.') or name.endswith('~')
+
+
+def snapshot(roots):
+    """返回 roots 下所有文件的 {路径: (mtime_ns, 大小)}"""
+    files = {}
+    stack = [str(root) for root in roots]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if is_hidden(entry.name):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    continue
+    return files
+
+
+class _Inotify:
+    """inotify 的 ctypes 封装"""
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.ctypes = ctypes
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            self._raise()
+        self.paths = {}
+
+    def _raise(self):
+        code = self.ctypes.get_errno()
+        raise OSError(code, os.strerror(code))
+
+    def add(self, path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            self._raise()
+        self.paths[wd] = path
+
+    def read(self):
+        """读取一批事件，返回 [(目录, 文件名, mask)]"""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            events.append((self.paths.get(wd), name, mask))
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """在后台线程中监视若干目录（含子目录），变化通过 drain() 取走
+
+    后端在线程中选择，创建和启动都不会阻塞调用方；backend 为 'inotify' 或 'polling'。
+    """
+
+    def __init__(self, roots, interval=2.0, use_inotify=True):
+        self.roots = [str(root) for root in roots]
+        self.interval = interval
+        self.use_inotify = use_inotify and sys.platform.startswith('linux')
+        self.backend = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="file-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def drain(self):
+        """取走积累的事件 {路径: CHANGED | DELETED}，丢失事件时包含 OVERFLOW 键"""
+        with self._lock:
+            events, self._pending = self._pending, {}
+        return events
+
+    def _emit(self, path, kind):
+        with self._lock:
+            self._pending[path] = kind
+
+    def _run(self):
+        if self.use_inotify:
+            try:
+                inotify = _Inotify()
+            except (OSError, AttributeError):
+                inotify = None
+            if inotify is not None:
+                try:
+                    self.backend = 'inotify'
+                    for root in self.roots:
+                        self._watch_tree(inotify, root)
+                    self._run_inotify(inotify)
+                    return
+                except OSError:
+                    # Typically ENOSPC: fs.inotify.max_user_watches is exhausted.
+                    # Changes made before polling starts would be missed, so ask for a refresh
+                    self._emit(OVERFLOW, CHANGED)
+                finally:
+                    inotify.close()
+        self.backend = 'polling'
+        self._run_polling()
+
+    def _watch_tree(self, inotify, root, report=False):
+        """给 root 及其子目录添加监视；report 为 True 时把其中已有的文件报告为新文件"""
+        stack = [root]
+        while stack:
+            path = stack.pop()
+            try:
+                inotify.add(path)
+                it = os.scandir(path)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            with it:
+                for entry in it:
+                    if is_hidden(entry.name):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif report:
+                        self._emit(entry.path, CHANGED)
+
+    def _run_inotify(self, inotify):
+        import select
+
+        while not self._stop.is_set():
+            ready, _, _ = select.select([inotify.fd], [], [], 0.5)
+            if not ready:
+                continue
+            for directory, name, mask in inotify.read():
+                if mask & IN_Q_OVERFLOW:
+                    self._emit(OVERFLOW, CHANGED)
+                    continue
+                if directory is None or not name or is_hidden(name):
+                    continue
+                path = os.path.join(directory, name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        # Files may land in a new directory before its watch exists
+                        self._watch_tree(inotify, path, report=True)
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        self._emit(path, DELETED)
+                elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    self._emit(path, CHANGED)
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    self._emit(path, DELETED)
+
+    def _run_polling(self):
+        previous = snapshot(self.roots)
+        while not self._stop.wait(self.interval):
+            current = snapshot(self.roots)
+            for path, stamp in current.items():
+                if previous.get(path) != stamp:
+                    self._emit(path, CHANGED)
+            for path in previous.keys() - current.keys():
+                self._emit(path, DELETED)
+            previous = current
@@ -8,14 +8,42 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, scrolledtext
 import os
 import re
-import subprocess
-import datetime
+import sys
+import queue
+import hashlib
+import threading
 from pathlib import Path
-import markdown
-import webbrowser
-import tempfile
 from tkinter import font
 
+from hugo_core import tracing
+from hugo_core.frontmatter import (FrontMatterError, as_list, locate_body, parse_document, parse_markdown,
+                                   serialize_front_matter, serialize_markdown)
+from hugo_core.posts import AtomicFile, atomic_write, new_post_content, main as batch_main
+from hugo_core.post_index import PostIndex, file_stamp
+from hugo_core.search_index import SearchIndex
+from hugo_core.watcher import DELETED, OVERFLOW, FileWatcher
+from tasks import TaskRunner
+from preview import LivePreview
+from highlight import MarkdownHighlighter
+from editor_io import LARGE_FILE, LARGE_TEXT, ChunkedLoader, ChunkedSaver
+from virtual_list import VirtualList
+from taxonomy_view import KIND_LABELS, TaxonomyBrowser, TermCompleter
+
+AUTOSAVE_DELAY = 2000
+WATCH_INTERVAL = 500
+# Set to a file path to record tracing spans and write them there on exit
+TRACE_ENV = "HUGO_MANAGER_TRACE"
+LATENCY_INTERVAL = 250
+# Deploy log: how often queued output lines are shown, and how many lines are kept
+LOG_INTERVAL = 50
+LOG_BATCH = 500
+LOG_MAX_LINES = 5000
+
+
+def content_hash(content):
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
 class HugoManager:
     def __init__(self, root):
         self.root = root
@@ -26,11 +54,59 @@ class HugoManager:
         self.blog_path = Path.cwd()  # Current working directory
         self.posts_path = self.blog_path / "content" / "posts"
         self.current_file = None
+        self.current_front_matter = {}
+        self.current_format = None
+        self.saved_hashes = {}
+        self.autosave_after_id = None
+        # ChunkedLoader or ChunkedSaver while a large post is moving in or out of the editor
+        self.transfer = None
+        self.post_index = PostIndex(self.blog_path)
+        self.search_index = SearchIndex(self.blog_path)
+        # Created on first use: their modules and state files are only needed for preview and upload
+        self.build_manifest = None
+        self.image_pipeline = None
+        self.preview_server = None
+        self.revision_store = None
+        self.search_results = None
+        self.search_after_id = None
+        # (kind, term) chosen in the taxonomy browser, or None
+        self.term_filter = None
+        self.save_lock = threading.Lock()
+        # PipelineRunner of the running upload and the output lines it queued for the log tab
+        self.deploy_runner = None
+        self.deploy_lines = queue.Queue()
+        self.log_after_id = None
         
         # Create GUI
         self.create_widgets()
+        self.tasks = TaskRunner(self.root, self.status_var)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Watch before the first refresh, so nothing changed in between goes unnoticed
+        self.uploads_path = self.blog_path / "static" / "uploads"
+        self.watcher = FileWatcher([path for path in (self.posts_path, self.uploads_path) if path.exists()])
+        self.watcher.start()
+        self.watch_batches = 0
+        self.root.after(WATCH_INTERVAL, self.poll_watcher)
         self.refresh_articles()
         
+    def on_close(self):
+        """关闭窗口前停止后台任务"""
+        self.flush_autosave()
+        if isinstance(self.transfer, ChunkedSaver):
+            # Let a chunked save finish before the editor goes away
+            self.root.after(100, self.on_close)
+            return
+        if self.transfer is not None:
+            self.transfer.cancel()
+        self.watcher.stop()
+        if self.deploy_runner is not None:
+            # Don't leave hugo or git running behind a closed window
+            self.deploy_runner.cancel()
+        self.tasks.shutdown()
+        if self.preview_server is not None:
+            self.preview_server.stop()
+        self.root.destroy()
+        
     def create_widgets(self):
         # Main container
         main_frame = ttk.Frame(self.root)
@@ -44,6 +120,11 @@ class HugoManager:
         ttk.Button(toolbar, text="刷新列表", command=self.refresh_articles).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(toolbar, text="保存", command=self.save_article).pack(side=tk.LEFT, padx=(0, 5))
         ttk.Button(toolbar, text="预览", command=self.preview_article).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(toolbar, text="历史版本", command=self.show_revisions).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(toolbar, text="导出HTML", command=self.export_html).pack(side=tk.LEFT, padx=(0, 5))
+        self.autosave_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(toolbar, text="自动保存", variable=self.autosave_var,
+                        command=self.schedule_autosave).pack(side=tk.LEFT, padx=(5, 0))
         ttk.Button(toolbar, text="上传博客", command=self.upload_blog, 
                   style="Accent.TButton").pack(side=tk.RIGHT, padx=(5, 0))
         
@@ -55,18 +136,47 @@ class HugoManager:
         left_frame = ttk.LabelFrame(content_frame, text="文章列表", padding=10)
         left_frame.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 5))
         
-        # Article listbox with scrollbar
-        list_frame = ttk.Frame(left_frame)
-        list_frame.pack(fill=tk.BOTH, expand=True)
+        # Full-text search
+        search_frame = ttk.Frame(left_frame)
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(search_frame, text="搜索:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        ttk.Entry(search_frame, textvariable=self.search_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+        self.search_var.trace('w', self.on_search_changed)
         
-        self.article_listbox = tk.Listbox(list_frame, width=30)
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.article_listbox.yview)
-        self.article_listbox.configure(yscrollcommand=scrollbar.set)
+        # Draft filter
+        filter_frame = ttk.Frame(left_frame)
+        filter_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(filter_frame, text="显示:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar(value="全部")
+        filter_box = ttk.Combobox(filter_frame, textvariable=self.filter_var,
+                                  values=["全部", "已发布", "草稿"], state="readonly", width=8)
+        filter_box.pack(side=tk.LEFT, padx=(5, 0))
+        filter_box.bind('<<ComboboxSelected>>', lambda e: self.populate_article_list())
         
-        self.article_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Sort order
+        ttk.Label(filter_frame, text="排序:").pack(side=tk.LEFT, padx=(10, 0))
+        self.sort_var = tk.StringVar(value="日期")
+        sort_box = ttk.Combobox(filter_frame, textvariable=self.sort_var,
+                                values=["日期", "标题", "修改时间"], state="readonly", width=8)
+        sort_box.pack(side=tk.LEFT, padx=(5, 0))
+        sort_box.bind('<<ComboboxSelected>>', lambda e: self.sort_article_list())
         
-        self.article_listbox.bind('<<ListboxSelect>>', self.on_article_select)
+        # Virtualized article list: only the visible rows are drawn
+        self.article_list = VirtualList(
+            left_frame,
+            columns=[
+                ('title', "标题", None, lambda entry: entry['title'] or entry['name']),
+                ('date', "日期", 85, lambda entry: entry['date'][:10]),
+                ('draft', "草稿", 40, lambda entry: "是" if entry['draft'] else ""),
+                ('tags', "标签", 100, lambda entry: ', '.join(entry['tags'])),
+            ],
+            on_select=self.on_article_select,
+            on_filter=lambda prefix, count: self.status_var.set(
+                f"筛选 \"{prefix}\": {count} 篇文章" if prefix else f"共 {count} 篇文章"),
+        )
+        self.article_list.pack(fill=tk.BOTH, expand=True)
+        self.article_list.sort_by('date', reverse=True)
         
         # Right panel - Editor and preview
         right_frame = ttk.Frame(content_frame)
@@ -102,6 +212,11 @@ class HugoManager:
         self.categories_entry = ttk.Entry(info_frame, textvariable=self.categories_var, width=50)
         self.categories_entry.grid(row=1, column=1, sticky=tk.W+tk.E, padx=(0, 10))
         
+        # Suggest existing terms, so a typo does not quietly create a new taxonomy page
+        TermCompleter(self.tags_entry, lambda prefix, limit: self.post_index.complete_term('tags', prefix, limit))
+        TermCompleter(self.categories_entry,
+                      lambda prefix, limit: self.post_index.complete_term('categories', prefix, limit))
+        
         # Draft status
         self.draft_var = tk.BooleanVar()
         self.draft_check = ttk.Checkbutton(info_frame, text="草稿", variable=self.draft_var)
@@ -121,6 +236,12 @@ class HugoManager:
             undo=True
         )
         self.text_editor.pack(fill=tk.BOTH, expand=True)
+        self.highlighter = MarkdownHighlighter(self.root, self.text_editor)
+        
+        # Any edit restarts the autosave timer and updates the live preview
+        self.text_editor.bind('<<Modified>>', self.on_editor_modified, add='+')
+        for var in (self.title_var, self.tags_var, self.categories_var, self.draft_var):
+            var.trace('w', lambda *args: self.schedule_autosave())
         
         # Preview tab
         preview_frame = ttk.Frame(self.notebook)
@@ -135,92 +256,320 @@ class HugoManager:
         )
         self.preview_text.pack(fill=tk.BOTH, expand=True)
         
+        # Live preview only renders while the preview tab is visible
+        self.live_preview = LivePreview(self.root, self.text_editor, self.preview_text, watch=False)
+        self.live_preview.set_active(False)
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+        
+        # Deploy log tab: output of the upload steps, streamed while they run
+        log_frame = ttk.Frame(self.notebook)
+        self.notebook.add(log_frame, text="部署日志")
+        log_toolbar = ttk.Frame(log_frame)
+        log_toolbar.pack(fill=tk.X, pady=(0, 5))
+        self.cancel_upload_button = ttk.Button(log_toolbar, text="取消上传", command=self.cancel_upload,
+                                               state=tk.DISABLED)
+        self.cancel_upload_button.pack(side=tk.LEFT)
+        ttk.Button(log_toolbar, text="清空", command=self.clear_deploy_log).pack(side=tk.LEFT, padx=(5, 0))
+        
+        self.log_text = scrolledtext.ScrolledText(
+            log_frame,
+            wrap=tk.NONE,
+            font=('Consolas', 10),
+            state=tk.DISABLED
+        )
+        self.log_text.pack(fill=tk.BOTH, expand=True)
+        self.log_text.tag_configure('info', foreground='#2980b9', font=('Consolas', 10, 'bold'))
+        self.log_text.tag_configure('stderr', foreground='#c0392b')
+        
+        # Taxonomy tab: every tag/category with its post count; selecting one filters the list
+        self.taxonomy_browser = TaxonomyBrowser(self.notebook, self.post_index.terms, self.set_term_filter)
+        self.notebook.add(self.taxonomy_browser, text="标签/分类")
+        
         # Status bar
         self.status_var = tk.StringVar()
         self.status_var.set("就绪")
-        status_bar = ttk.Label(main_frame, textvariable=self.status_var, relief=tk.SUNKEN)
-        status_bar.pack(fill=tk.X, pady=(10, 0))
+        status_frame = ttk.Frame(main_frame)
+        status_frame.pack(fill=tk.X, pady=(10, 0))
+        status_bar = ttk.Label(status_frame, textvariable=self.status_var, relief=tk.SUNKEN)
+        status_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        # Latency of the last traced operation, only shown while tracing
+        self.latency_var = tk.StringVar()
+        if tracing.is_enabled():
+            ttk.Label(status_frame, textvariable=self.latency_var, relief=tk.SUNKEN,
+                      width=36).pack(side=tk.RIGHT, padx=(5, 0))
+            self.update_latency()
+        
+    def update_latency(self):
+        """在状态栏显示最近一次被追踪操作的耗时"""
+        if tracing.last is not None:
+            name, ms = tracing.last
+            self.latency_var.set(f"{name}: {ms:.1f} ms")
+        self.root.after(LATENCY_INTERVAL, self.update_latency)
+        
+    def on_tab_changed(self, event=None):
+        """切换到预览标签页时刷新实时预览"""
+        selected = self.notebook.index(self.notebook.select())
+        self.live_preview.set_active(selected == 1)
+        self.taxonomy_browser.set_active(selected == 3)
         
     def refresh_articles(self):
         """刷新文章列表"""
-        self.article_listbox.delete(0, tk.END)
-        
         if not self.posts_path.exists():
+            self.article_list.set_items([])
             self.status_var.set("文章目录不存在")
             return
             
-        articles = []
-        for file_path in self.posts_path.glob("*.md"):
-            articles.append(file_path.name)
+        def on_done(result):
+            count = self.populate_article_list()
+            self.status_var.set(f"找到 {count} 篇文章")
             
-        articles.sort()
-        for article in articles:
-            self.article_listbox.insert(tk.END, article)
+        def refresh(task):
+            with tracing.span('refresh.posts'):
+                self.post_index.refresh()
+            task.progress("正在更新搜索索引...")
+            with tracing.span('refresh.search'):
+                self.search_index.sync(self.post_index.snapshot())
             
-        self.status_var.set(f"找到 {len(articles)} 篇文章")
+        self.tasks.submit('refresh', refresh, on_done,
+                          lambda e: self.status_var.set(f"刷新失败: {e}"),
+                          message="正在刷新文章列表...")
         
-    def on_article_select(self, event):
-        """选择文章时的处理"""
-        selection = self.article_listbox.curselection()
-        if not selection:
+    def populate_article_list(self):
+        """根据索引和筛选条件填充文章列表"""
+        with tracing.span('list.populate'):
+            draft = {"已发布": False, "草稿": True}.get(self.filter_var.get())
+            terms = {}
+            if self.term_filter is not None:
+                kind, term = self.term_filter
+                terms = {'tag' if kind == 'tags' else 'category': term}
+            if self.search_results is None:
+                entries = self.post_index.filter(draft=draft, **terms)
+            else:
+                # Keep the relevance order of the search results
+                entries = [self.post_index.get(name) for name in self.search_results]
+                entries = [entry for entry in entries
+                           if entry is not None and (draft is None or entry['draft'] == draft)
+                           and (self.term_filter is None or self.term_filter[1] in entry[self.term_filter[0]])]
+            
+            if self.search_results is None:
+                if self.article_list.sort_key is None:
+                    self.sort_article_list(entries)
+                else:
+                    self.article_list.set_items(entries)
+            else:
+                self.article_list.set_items(entries, ordered=True)
+            self.taxonomy_browser.invalidate()
+            
+        return len(entries)
+        
+    def set_term_filter(self, kind, term):
+        """只显示带有某个标签或分类的文章；kind 为 None 时取消筛选"""
+        self.term_filter = (kind, term) if kind is not None else None
+        count = self.populate_article_list()
+        if kind is None:
+            self.status_var.set(f"共 {count} 篇文章")
+        else:
+            self.status_var.set(f"{KIND_LABELS[kind]} \"{term}\": {count} 篇文章")
+        
+    def poll_watcher(self):
+        """取走文件监视器积累的变化"""
+        events = self.watcher.drain()
+        if events:
+            self.apply_file_events(events)
+        self.root.after(WATCH_INTERVAL, self.poll_watcher)
+
+    def apply_file_events(self, events):
+        """把外部程序对文章和上传文件的修改逐个应用到索引和列表，不重新扫描目录"""
+        if OVERFLOW in events:
+            self.refresh_articles()
+            return
+
+        posts = {}
+        uploads_changed = False
+        for path, kind in events.items():
+            path = Path(path)
+            if path.parent == self.posts_path and path.suffix == '.md':
+                posts[path.name] = kind
+            elif self.uploads_path in path.parents:
+                uploads_changed = True
+
+        # Pages in the browser preview may show the changed images
+        if uploads_changed and self.current_file and self.transfer is None:
+            self.push_preview(self.title_var.get(), self.text_editor.get(1.0, tk.END))
+        if not posts:
+            return
+
+        def apply(task):
+            results = []
+            for name, kind in posts.items():
+                file_path = self.posts_path / name
+                entry = self.post_index.get(name)
+                try:
+                    stat = None if kind == DELETED else file_path.stat()
+                except OSError:
+                    stat = None
+                if stat is None:
+                    if entry is not None:
+                        self.post_index.remove(name)
+                        self.search_index.remove(name)
+                        results.append((name, 'removed', None))
+                    continue
+                # Our own saves have already been indexed with this stamp
+                if entry is not None and entry['stamp'] == file_stamp(stat):
+                    continue
+                with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                    content = f.read()
+                new_entry = self.post_index.update_file(file_path)
+                if new_entry is not None:
+                    self.search_index.update_file(name, new_entry['stamp'], content)
+                results.append((name, 'added' if entry is None else 'modified', content_hash(content)))
+            return results
+
+        def on_done(results):
+            if not results:
+                return
+            self.populate_article_list()
+            counts = {kind: sum(1 for _, k, _ in results if k == kind) for kind in ('added', 'modified', 'removed')}
+            self.status_var.set(f"文件已在外部修改：新增 {counts['added']}，修改 {counts['modified']}，"
+                                f"删除 {counts['removed']}")
+
+            for name, kind, digest in results:
+                if self.current_file is None or name != self.current_file.name:
+                    continue
+                if kind == 'removed':
+                    messagebox.showwarning("警告", f"当前文章已在磁盘上被删除: {name}\n保存会重新创建该文件。")
+                elif digest != self.saved_hashes.get(self.current_file):
+                    if messagebox.askyesno("文件已修改", f"{name} 已被其它程序修改。\n是否重新加载？未保存的修改会丢失。"):
+                        self.cancel_autosave()
+                        self.load_article(name)
+
+        # Every batch gets its own key: a newer batch must not cancel an older one
+        self.watch_batches += 1
+        self.tasks.submit(('watch', self.watch_batches), apply, on_done,
+                          lambda e: self.status_var.set(f"更新索引失败: {e}"))
+
+    def sort_article_list(self, entries=None):
+        """按排序选项重新排列文章列表"""
+        key, reverse = {"日期": ('date', True), "标题": ('title', False),
+                        "修改时间": ('mtime', True)}[self.sort_var.get()]
+        if entries is not None:
+            self.article_list.items = entries
+        self.article_list.sort_by(key, reverse)
+        
+    def on_search_changed(self, *args):
+        """搜索框输入防抖"""
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(200, self.run_search)
+        
+    def run_search(self):
+        """在全文索引中搜索并按相关度显示结果"""
+        self.search_after_id = None
+        query = self.search_var.get().strip()
+        if not query:
+            self.tasks.cancel('search')
+            self.search_results = None
+            self.populate_article_list()
             return
             
-        filename = self.article_listbox.get(selection[0])
-        self.load_article(filename)
+        def on_done(names):
+            self.search_results = names
+            count = self.populate_article_list()
+            self.status_var.set(f"搜索到 {count} 篇文章")
+            
+        self.tasks.submit('search', lambda task: self.search_index.search(query), on_done,
+                          lambda e: self.status_var.set(f"搜索失败: {e}"))
+        
+    def on_article_select(self, entry):
+        """选择文章时的处理"""
+        self.flush_autosave()
+        self.load_article(entry['name'])
         
     def load_article(self, filename):
-        """加载文章内容"""
+        """加载文章内容（后台读取，切换文章时取消旧的加载）"""
         file_path = self.posts_path / filename
-        self.current_file = file_path
+        if isinstance(self.transfer, ChunkedSaver):
+            # The editor is still being written out; switch once that is done
+            self.root.after(100, self.load_article, filename)
+            return
+        if self.transfer is not None:
+            self.transfer.cancel()
+            self.transfer = None
         
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            # Parse front matter and content
-            front_matter, body = self.parse_markdown(content)
-            
-            # Update UI
-            self.title_var.set(front_matter.get('title', ''))
-            self.tags_var.set(', '.join(front_matter.get('tags', [])))
-            self.categories_var.set(', '.join(front_matter.get('categories', [])))
-            self.draft_var.set(front_matter.get('draft', False))
-            
-            self.text_editor.delete(1.0, tk.END)
-            self.text_editor.insert(1.0, body)
+        def read(task):
+            if file_path.stat().st_size >= LARGE_FILE:
+                # Only the header is parsed here; the body is streamed into the editor
+                with tracing.span('load.parse', file=filename):
+                    front_matter, fmt, offset = locate_body(file_path)
+                return front_matter, None, fmt, offset
+            with tracing.span('load.read', file=filename):
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            with tracing.span('load.parse', file=filename):
+                return parse_document(content) + (None,)
             
+        def on_done(result):
+            front_matter, body, fmt, offset = result
+            with tracing.span('load.populate', file=filename):
+                # Only switch once the editor really shows this file, so a save
+                # issued mid-load cannot write the old buffer into the new post
+                self.current_file = file_path
+                self.current_front_matter = front_matter
+                self.current_format = fmt
+                
+                # Update UI
+                self.title_var.set(front_matter.get('title', ''))
+                self.tags_var.set(', '.join(as_list(front_matter.get('tags'))))
+                self.categories_var.set(', '.join(as_list(front_matter.get('categories'))))
+                self.draft_var.set(front_matter.get('draft', False))
+                
+                self.live_preview.reset()
+                self.text_editor.delete(1.0, tk.END)
+                if body is None:
+                    self.stream_article(file_path, offset, fmt)
+                    return
+                self.text_editor.insert(1.0, body)
+                
+                # Saving the buffer as loaded produces this content, so it is not a change
+                self.saved_hashes[file_path] = content_hash(self.collect_article()[1])
             self.status_var.set(f"已加载: {filename}")
             
-        except Exception as e:
+        self.tasks.submit('load', read, on_done,
+                          lambda e: messagebox.showerror("错误", f"加载文章失败: {str(e)}"),
+                          message=f"正在加载: {filename}")
+            
+    def stream_article(self, file_path, offset, fmt):
+        """把大文件的正文分块读入编辑器，期间编辑器只读"""
+        # The loader hashes what it inserts, so the header goes in first
+        header = serialize_front_matter(self.collect_front_matter(), self.current_format or 'yaml') + '\n\n'
+        digest = hashlib.sha1(header.encode('utf-8'))
+
+        def on_done(hexdigest):
+            self.transfer = None
+            self.saved_hashes[file_path] = hexdigest
+            # Inserting the chunks looked like edits
+            self.cancel_autosave()
+            self.status_var.set(f"已加载: {file_path.name}")
+
+        def on_error(e):
+            self.transfer = None
             messagebox.showerror("错误", f"加载文章失败: {str(e)}")
+
+        self.transfer = ChunkedLoader(
+            self.root, self.text_editor, file_path, offset, digest,
+            on_progress=lambda fraction: self.status_var.set(f"正在加载 {file_path.name}: {fraction:.0%}"),
+            on_done=on_done, on_error=on_error,
+            # Without front matter parse_document keeps leading blank lines as well
+            strip_leading=fmt is not None)
+        try:
+            self.transfer.start()
+        except OSError as e:
+            on_error(e)
             
     def parse_markdown(self, content):
         """解析Markdown文件的front matter和正文"""
-        front_matter = {}
-        body = content
-        
-        if content.startswith('---'):
-            parts = content.split('---', 2)
-            if len(parts) >= 3:
-                front_matter_text = parts[1].strip()
-                body = parts[2].strip()
-                
-                # Parse YAML-like front matter
-                for line in front_matter_text.split('\n'):
-                    if ':' in line:
-                        key, value = line.split(':', 1)
-                        key = key.strip()
-                        value = value.strip().strip('"\'')
-                        
-                        # Handle arrays
-                        if value.startswith('[') and value.endswith(']'):
-                            value = [item.strip().strip('"\'') for item in value[1:-1].split(',')]
-                        elif value.lower() in ['true', 'false']:
-                            value = value.lower() == 'true'
-                            
-                        front_matter[key] = value
-                        
-        return front_matter, body
+        return parse_markdown(content)
 
     def new_article(self):
         """创建新文章"""
@@ -235,23 +584,9 @@ class HugoManager:
                 messagebox.showerror("错误", "文件已存在")
                 return
 
-            # Create front matter
-            now = datetime.datetime.now()
-            front_matter = f"""---
-title: "{title}"
-date: {now.strftime('%Y-%m-%dT%H:%M:%S+08:00')}
-draft: true
-author: "你的名字"
-tags: []
-categories: []
-description: ""
----
-
-"""
-
             try:
                 with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(front_matter)
+                    f.write(new_post_content(title))
 
                 self.refresh_articles()
                 self.load_article(f"{filename}.md")
@@ -260,122 +595,456 @@ description: ""
             except Exception as e:
                 messagebox.showerror("错误", f"创建文章失败: {str(e)}")
 
-    def save_article(self):
-        """保存当前文章"""
+    def collect_front_matter(self):
+        """从界面收集当前文章的 front matter"""
+        # Keys the editor does not show (date, author, ...) come from the loaded front matter
+        front_matter = dict(self.current_front_matter)
+        front_matter.update({
+            'title': self.title_var.get(),
+            'tags': [tag.strip() for tag in self.tags_var.get().split(',') if tag.strip()],
+            'categories': [cat.strip() for cat in self.categories_var.get().split(',') if cat.strip()],
+            'draft': self.draft_var.get()
+        })
+        return front_matter
+
+    def collect_article(self):
+        """从界面收集当前文章，返回 (front matter, 文章内容, 正文)"""
+        front_matter = self.collect_front_matter()
+        body = self.text_editor.get(1.0, tk.END).rstrip()
+        return front_matter, serialize_markdown(front_matter, body, self.current_format), body
+
+    def save_article(self, autosave=False):
+        """保存当前文章，内容没有变化时不写入"""
+        self.cancel_autosave()
+        if not self.current_file:
+            if not autosave:
+                messagebox.showwarning("警告", "没有打开的文章")
+            return
+        if self.transfer is not None:
+            if not autosave:
+                self.status_var.set("文章正在加载或保存，请稍候")
+            return
+
+        # Collect widget state on the main thread, write in the background
+        file_path = self.current_file
+        if (self.text_editor.count('1.0', tk.END, 'chars') or (0,))[0] >= LARGE_TEXT:
+            self.save_article_chunked(file_path, autosave)
+            return
+        with tracing.span('save.serialize', file=file_path.name):
+            front_matter, content, body = self.collect_article()
+        new_terms = self.new_terms(front_matter)
+
+        def write(task):
+            with self.save_lock:
+                if not task.start():
+                    return False
+                return self.write_article(file_path, content)
+
+        def on_done(written):
+            if not written:
+                if not autosave:
+                    self.status_var.set(f"没有修改: {file_path.name}")
+                return
+            self.on_saved(file_path, front_matter, autosave, new_terms)
+            self.push_preview(front_matter['title'], body)
+
+        # A newer save of the same post supersedes an older one that has not started yet;
+        # one that already started writing still reports, so saved_hashes and the status agree
+        self.tasks.submit(('save', file_path), write, on_done,
+                          lambda e: messagebox.showerror("错误", f"保存失败: {str(e)}"),
+                          message=f"正在保存: {file_path.name}", keep_started=True)
+
+    def save_article_chunked(self, file_path, autosave):
+        """大文章分块写入临时文件，不把整篇内容拼成一个字符串，写完后在后台替换原文件"""
+        front_matter = self.collect_front_matter()
+        new_terms = self.new_terms(front_matter)
+        header = serialize_front_matter(front_matter, self.current_format or 'yaml') + '\n\n'
+
+        def on_error(e):
+            self.transfer = None
+            writer.discard()
+            messagebox.showerror("错误", f"保存失败: {str(e)}")
+
+        def commit(task, digest):
+            # Posts this large keep no revision history, so the save stays chunked
+            with self.save_lock:
+                with tracing.span('save.write', file=file_path.name):
+                    writer.commit()
+                self.saved_hashes[file_path] = digest
+                with tracing.span('save.index', file=file_path.name):
+                    entry = self.post_index.update_file(file_path)
+                    if entry is not None:
+                        with open(file_path, 'r', encoding='utf-8') as f:
+                            self.search_index.update_file(file_path.name, entry['stamp'], f.read())
+
+        def on_committed(result):
+            self.transfer = None
+            self.on_saved(file_path, front_matter, autosave, new_terms)
+
+        def on_written(digest):
+            if self.saved_hashes.get(file_path) == digest:
+                self.transfer = None
+                writer.discard()
+                if not autosave:
+                    self.status_var.set(f"没有修改: {file_path.name}")
+                return
+            # The saver stays the active transfer until the file is replaced, so no
+            # other save or load can reuse its temp file in the meantime
+            self.tasks.submit(('save', file_path), lambda task: commit(task, digest), on_committed, on_error,
+                              message=f"正在保存: {file_path.name}")
+
+        try:
+            writer = AtomicFile(file_path)
+        except OSError as e:
+            messagebox.showerror("错误", f"保存失败: {str(e)}")
+            return
+        self.transfer = ChunkedSaver(
+            self.root, self.text_editor, writer, header,
+            on_progress=lambda fraction: self.status_var.set(f"正在保存 {file_path.name}: {fraction:.0%}"),
+            on_done=on_written, on_error=on_error)
+        try:
+            self.transfer.start()
+        except OSError as e:
+            self.transfer.cancel()
+            on_error(e)
+
+    def new_terms(self, front_matter):
+        """front matter 中还没有任何文章使用的标签和分类"""
+        return [term for kind in KIND_LABELS for term in front_matter[kind]
+                if not self.post_index.term_count(kind, term)]
+
+    def on_saved(self, file_path, front_matter, autosave, new_terms=()):
+        """文章写入磁盘后刷新列表和状态栏，新建的标签/分类也提示出来，便于发现拼写错误"""
+        if file_path == self.current_file:
+            self.current_front_matter = front_matter
+        self.populate_article_list()
+        status = f"{'已自动保存' if autosave else '已保存'}: {file_path.name}"
+        if new_terms:
+            status += f"（新标签/分类: {', '.join(new_terms)}）"
+        self.status_var.set(status)
+
+    def write_article(self, file_path, content):
+        """原子地写入文章并更新索引（在工作线程中执行），内容未变时返回 False"""
+        digest = content_hash(content)
+        if self.saved_hashes.get(file_path) == digest:
+            return False
+
+        self.record_original(file_path)
+        # Write a sibling temp file and swap it in, so a crash never leaves a truncated post
+        with tracing.span('save.write', file=file_path.name):
+            atomic_write(file_path, content)
+        self.saved_hashes[file_path] = digest
+
+        with tracing.span('save.index', file=file_path.name):
+            entry = self.post_index.update_file(file_path)
+            if entry is not None:
+                self.search_index.update_file(file_path.name, entry['stamp'], content)
+        with tracing.span('save.revision', file=file_path.name):
+            self.revisions().record(file_path.name, content)
+        return True
+
+    def revisions(self):
+        """文章的修订历史（第一次保存或查看时创建）"""
+        if self.revision_store is None:
+            from hugo_core.revisions import RevisionStore
+            self.revision_store = RevisionStore(self.blog_path)
+        return self.revision_store
+
+    def record_original(self, file_path):
+        """第一次保存一篇还没有历史的文章前，先记下磁盘上原来的内容（在工作线程中执行）"""
+        store = self.revisions()
+        try:
+            if file_path.stat().st_size >= LARGE_FILE:
+                return
+        except FileNotFoundError:
+            return
+        if not store.has_history(file_path.name):
+            with tracing.span('save.revision', file=file_path.name):
+                store.record_file(file_path.name, file_path, note='original')
+
+    def show_revisions(self):
+        """查看当前文章的历史版本，可以与编辑器内容对比并恢复"""
         if not self.current_file:
             messagebox.showwarning("警告", "没有打开的文章")
             return
+        if self.transfer is not None:
+            self.status_var.set("文章正在加载或保存，请稍候")
+            return
+        store = self.revisions()
+        if not store.has_history(self.current_file.name):
+            messagebox.showinfo("历史版本", "这篇文章还没有保存过的历史版本（分块保存的大文件不记录历史）")
+            return
+        from revision_view import RevisionDialog
+        RevisionDialog(self.root, store, self.current_file.name, self.collect_article()[1],
+                       lambda text: self.restore_revision(self.current_file, text))
 
+    def restore_revision(self, file_path, text):
+        """把一个历史版本放回编辑器，和手动修改一样：保存或自动保存后写入文件，并成为新的版本"""
+        if file_path != self.current_file or self.transfer is not None:
+            return
         try:
-            # Build front matter
-            front_matter = {
-                'title': self.title_var.get(),
-                'tags': [tag.strip() for tag in self.tags_var.get().split(',') if tag.strip()],
-                'categories': [cat.strip() for cat in self.categories_var.get().split(',') if cat.strip()],
-                'draft': self.draft_var.get()
-            }
-
-            # Read existing front matter to preserve other fields
-            with open(self.current_file, 'r', encoding='utf-8') as f:
-                existing_content = f.read()
-
-            existing_front_matter, _ = self.parse_markdown(existing_content)
-            existing_front_matter.update(front_matter)
-
-            # Build new content
-            content = "---\n"
-            for key, value in existing_front_matter.items():
-                if isinstance(value, list):
-                    if value:  # Only add non-empty lists
-                        formatted_list = '[' + ', '.join(f'"{item}"' for item in value) + ']'
-                        content += f'{key}: {formatted_list}\n'
-                elif isinstance(value, bool):
-                    content += f'{key}: {str(value).lower()}\n'
-                elif isinstance(value, str):
-                    content += f'{key}: "{value}"\n'
-                else:
-                    content += f'{key}: {value}\n'
+            front_matter, body, fmt = parse_document(text)
+        except FrontMatterError as e:
+            self.status_var.set(f"无法恢复历史版本: {e}")
+            return
+        self.current_front_matter = front_matter
+        self.current_format = fmt
+        self.title_var.set(front_matter.get('title', ''))
+        self.tags_var.set(', '.join(as_list(front_matter.get('tags'))))
+        self.categories_var.set(', '.join(as_list(front_matter.get('categories'))))
+        self.draft_var.set(front_matter.get('draft', False))
+        self.live_preview.reset()
+        self.text_editor.delete(1.0, tk.END)
+        self.text_editor.insert(1.0, body)
+        when = "将自动保存" if self.autosave_var.get() else "保存后生效"
+        self.status_var.set(f"已恢复历史版本到编辑器，{when}: {file_path.name}")
+        self.schedule_autosave()
 
-            content += "---\n\n"
-            content += self.text_editor.get(1.0, tk.END).rstrip()
+    def on_editor_modified(self, event=None):
+        """Tk 只在修改标志从假变真时发出 <<Modified>>，所以这里清除标志，下一次编辑才会再触发"""
+        if not self.text_editor.edit_modified():
+            return
+        self.text_editor.edit_modified(False)
+        self.schedule_autosave()
+        self.live_preview.schedule()
 
-            with open(self.current_file, 'w', encoding='utf-8') as f:
-                f.write(content)
+    def schedule_autosave(self):
+        """编辑停止一段时间后自动保存，连续的修改只写入一次"""
+        self.cancel_autosave()
+        if self.autosave_var.get() and self.current_file:
+            self.autosave_after_id = self.root.after(AUTOSAVE_DELAY, self.save_article, True)
 
-            self.status_var.set(f"已保存: {self.current_file.name}")
+    def cancel_autosave(self):
+        if self.autosave_after_id is not None:
+            self.root.after_cancel(self.autosave_after_id)
+            self.autosave_after_id = None
 
-        except Exception as e:
-            messagebox.showerror("错误", f"保存失败: {str(e)}")
+    def flush_autosave(self):
+        """切换文章或退出前立即执行等待中的自动保存"""
+        if self.autosave_after_id is not None:
+            self.save_article(autosave=True)
 
     def preview_article(self):
-        """预览文章"""
+        """在浏览器中预览文章（本地预览服务器，保存后自动刷新）"""
         if not self.current_file:
             messagebox.showwarning("警告", "没有打开的文章")
             return
 
-        try:
-            # Get markdown content
-            markdown_content = self.text_editor.get(1.0, tk.END)
-
-            # Convert to HTML
-            md = markdown.Markdown(extensions=['extra', 'codehilite'])
-            html_content = md.convert(markdown_content)
-
-            # Create a simple HTML template
-            html_template = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <title>{self.title_var.get()}</title>
-    <style>
-        body {{ font-family: 'Microsoft YaHei', Arial, sans-serif; line-height: 1.6; margin: 40px; }}
-        h1, h2, h3 {{ color: #333; }}
-        code {{ background: #f4f4f4; padding: 2px 4px; border-radius: 3px; }}
-        pre {{ background: #f4f4f4; padding: 10px; border-radius: 5px; overflow-x: auto; }}
-        blockquote {{ border-left: 4px solid #ddd; margin: 0; padding-left: 20px; color: #666; }}
-    </style>
-</head>
-<body>
-    <h1>{self.title_var.get()}</h1>
-    {html_content}
-</body>
-</html>
-"""
+        # Get markdown content
+        markdown_content = self.text_editor.get(1.0, tk.END)
+        title = self.title_var.get()
+
+        def render(task):
+            import webbrowser
+            from hugo_core.preview_server import PreviewServer
+
+            if self.preview_server is None:
+                self.preview_server = PreviewServer(self.blog_path)
+            self.preview_server.start()
+            with tracing.span('preview.publish'):
+                self.preview_server.publish(title, markdown_content)
+            # Only open a new tab when no page is listening for updates
+            if self.preview_server.clients == 0:
+                webbrowser.open(self.preview_server.url)
 
-            # Save to temporary file and open in browser
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8') as f:
-                f.write(html_template)
-                temp_file = f.name
+        self.tasks.submit('preview', render,
+                          lambda result: self.status_var.set(f"预览地址: {self.preview_server.url}"),
+                          lambda e: messagebox.showerror("错误", f"预览失败: {str(e)}"),
+                          message="正在生成预览...")
 
-            webbrowser.open(f'file://{temp_file}')
-            self.status_var.set("已在浏览器中打开预览")
+    def push_preview(self, title, markdown_content):
+        """保存后把新内容推送给已打开的浏览器预览"""
+        if self.preview_server is None or not self.preview_server.running:
+            return
+        def publish(task):
+            with tracing.span('preview.publish'):
+                self.preview_server.publish(title, markdown_content)
+
+        # Its own key, so a push never cancels a pending "open in browser"
+        self.tasks.submit('push-preview', publish)
+
+    def export_html(self):
+        """把所有文章导出为独立的 HTML 页面（多进程渲染，只重新渲染有变化的文章）"""
+        if self.tasks.is_busy('export'):
+            self.status_var.set("正在导出...")
+            return
+
+        def run(task):
+            from hugo_core.export import HtmlExporter
 
-        except Exception as e:
-            messagebox.showerror("错误", f"预览失败: {str(e)}")
+            exporter = HtmlExporter(self.blog_path)
+            with tracing.span('export.run'):
+                report = exporter.run(
+                    progress=lambda done, total, name, ms: task.progress(f"正在导出 {done}/{total}: {name}"))
+            return exporter.out_path, report
+
+        def on_done(result):
+            from hugo_core.export import slowest
+
+            out_path, report = result
+            rendered = report['rendered']
+            lines = [f"渲染 {len(rendered)} 篇（共 {sum(rendered.values()):.0f} ms），"
+                     f"未变化 {report['cached']} 篇，删除 {report['removed']} 篇"]
+            if rendered:
+                lines.append("\n渲染最慢的文章:")
+                lines += [f"{ms:8.1f} ms  {name}" for name, ms in slowest(rendered, 5)]
+            if report['failed']:
+                lines.append("\n失败:")
+                lines += [f"{name}: {error}" for name, error in sorted(report['failed'].items())]
+            lines.append(f"\n输出目录: {out_path}")
+            (messagebox.showwarning if report['failed'] else messagebox.showinfo)("导出完成", '\n'.join(lines))
+            self.status_var.set(f"已导出到 {out_path}")
+
+        self.tasks.submit('export', run, on_done,
+                          lambda e: messagebox.showerror("错误", f"导出失败: {str(e)}"),
+                          message="正在导出 HTML...")
 
     def upload_blog(self):
-        """上传博客 - 执行updateblog.bat"""
+        """上传博客 - 输入有变化时依次构建、提交并推送，输出实时显示在部署日志中"""
+        if self.tasks.is_busy('upload'):
+            self.status_var.set("博客正在上传中...")
+            return
+
         if messagebox.askyesno("确认", "确定要构建并上传博客吗？\n这将执行hugo构建和git推送操作。"):
-            try:
-                # Change to blog directory and run updateblog.bat
-                result = subprocess.run(
-                    ['updateblog.bat'],
-                    cwd=str(self.blog_path),
-                    capture_output=True,
-                    text=True,
-                    shell=True
-                )
-
-                if result.returncode == 0:
-                    messagebox.showinfo("成功", "博客上传成功！")
+            from hugo_core.pipeline import PipelineRunner
+
+            self.clear_deploy_log()
+            runner = PipelineRunner(
+                self.blog_path,
+                on_line=lambda name, stream, line: self.deploy_lines.put((stream, line)),
+            )
+            self.deploy_runner = runner
+            self.cancel_upload_button.configure(state=tk.NORMAL)
+            self.notebook.select(2)
+
+            def run(task):
+                from hugo_core.build_manifest import BuildManifest
+                from hugo_core.image_pipeline import ImagePipeline
+                from hugo_core.pipeline import deploy_steps, succeeded
+
+                if self.build_manifest is None:
+                    self.build_manifest = BuildManifest(self.blog_path)
+                    self.image_pipeline = ImagePipeline(self.blog_path)
+
+                # Image variants are build inputs, so generate them before hashing the inputs.
+                # Only worth it once a template serves them instead of the originals
+                if self.image_pipeline.available() and self.image_pipeline.is_used():
+                    with tracing.span('upload.images'):
+                        self.image_pipeline.run(
+                            progress=lambda done, total, url: task.progress(f"正在优化图片 {done}/{total}..."))
+
+                with tracing.span('upload.check_inputs'):
+                    needs_build, inputs, changed_inputs = self.build_manifest.check_inputs()
+                if not needs_build:
+                    return None
+
+                from hugo_core.quick_publish import plan_publish
+
+                # A body-only edit of one post only needs that post's page and feeds
+                quick, reason = plan_publish(self.blog_path, self.build_manifest, changed_inputs)
+                if quick is not None:
+                    task.progress(f"只有 {Path(quick).name} 的正文有变化，正在更新它的页面并上传...")
+                else:
+                    self.deploy_lines.put(('info', f"完整构建: {reason}"))
+                    task.progress(f"{len(changed_inputs)} 个源文件有变化，正在构建并上传博客...")
+                steps = deploy_steps(quick=quick is not None)
+                runner.on_step = lambda name: task.progress(f"正在上传博客: {name}...")
+                with tracing.span('upload.build'):
+                    results = runner.run(steps)
+                output_changes = None
+                if succeeded(results):
+                    with tracing.span('upload.record_build'):
+                        output_changes = self.build_manifest.record_build(inputs)
+                return results, output_changes
+
+            def on_done(outcome):
+                from hugo_core.pipeline import CANCELLED, OK, SKIPPED, describe_results, succeeded
+
+                self.finish_upload()
+                if outcome is None:
+                    messagebox.showinfo("提示", "内容、静态文件和配置都没有变化，已跳过构建和上传。")
+                    self.status_var.set("没有变化，跳过构建")
+                    return
+
+                results, output_changes = outcome
+                if succeeded(results):
+                    message = "博客上传成功！"
+                    if any(result['status'] == SKIPPED for result in results):
+                        message = "构建完成，没有需要提交的修改。"
+                    messagebox.showinfo("成功", f"{message}\n\n{self.describe_output_changes(output_changes)}"
+                                        f"\n\n{describe_results(results)}")
                     self.status_var.set("博客上传完成")
+                elif any(result['status'] == CANCELLED for result in results):
+                    self.status_var.set("上传已取消")
                 else:
-                    messagebox.showerror("错误", f"上传失败:\n{result.stderr}")
+                    failed = next(result for result in results if result['status'] not in (OK, SKIPPED))
+                    self.notebook.select(2)
+                    messagebox.showerror("错误", f"上传失败（{failed['name']}: {failed['status']}）:\n"
+                                         + '\n'.join(failed['tail']))
                     self.status_var.set("博客上传失败")
 
-            except Exception as e:
-                messagebox.showerror("错误", f"执行上传脚本失败: {str(e)}")
+            def on_error(e):
+                self.finish_upload()
+                messagebox.showerror("错误", f"执行上传失败: {str(e)}")
+                self.status_var.set("博客上传失败")
+
+            self.tasks.submit('upload', run, on_done, on_error, message="正在检查是否需要构建...")
+            self.poll_deploy_log()
+
+    def cancel_upload(self):
+        """停止正在运行的上传步骤"""
+        if self.deploy_runner is not None:
+            self.deploy_runner.cancel()
+            self.cancel_upload_button.configure(state=tk.DISABLED)
+            self.status_var.set("正在取消上传...")
+
+    def finish_upload(self):
+        self.deploy_runner = None
+        self.cancel_upload_button.configure(state=tk.DISABLED)
+        # Show whatever output is still queued
+        self.poll_deploy_log()
+
+    def poll_deploy_log(self):
+        """把排队的输出行追加到部署日志，上传结束且队列为空后停止"""
+        if self.log_after_id is not None:
+            self.root.after_cancel(self.log_after_id)
+            self.log_after_id = None
+
+        lines = []
+        while len(lines) < LOG_BATCH:
+            try:
+                lines.append(self.deploy_lines.get_nowait())
+            except queue.Empty:
+                break
+        if lines:
+            self.log_text.configure(state=tk.NORMAL)
+            for stream, line in lines:
+                self.log_text.insert(tk.END, line + '\n', stream)
+            excess = int(self.log_text.index('end-1c').split('.')[0]) - 1 - LOG_MAX_LINES
+            if excess > 0:
+                self.log_text.delete('1.0', f"{excess + 1}.0")
+            self.log_text.configure(state=tk.DISABLED)
+            self.log_text.see(tk.END)
+
+        if self.deploy_runner is not None or not self.deploy_lines.empty():
+            self.log_after_id = self.root.after(LOG_INTERVAL, self.poll_deploy_log)
+
+    def clear_deploy_log(self):
+        self.log_text.configure(state=tk.NORMAL)
+        self.log_text.delete('1.0', tk.END)
+        self.log_text.configure(state=tk.DISABLED)
+
+    def describe_output_changes(self, output_changes, limit=15):
+        """把 public/ 的变化整理成提示文字"""
+        added, changed, removed = output_changes
+        lines = [f"public/ 变化: 新增 {len(added)}，修改 {len(changed)}，删除 {len(removed)}"]
+        for label, paths in (("+", added), ("~", changed), ("-", removed)):
+            for path in paths:
+                if len(lines) > limit:
+                    lines.append("...")
+                    return '\n'.join(lines)
+                lines.append(f"{label} {path}")
+        return '\n'.join(lines)
 
 
 class ArticleDialog:
@@ -456,10 +1125,22 @@ class ArticleDialog:
 
 
 def main():
+    # Any arguments select the headless batch mode, which never creates a window
+    if len(sys.argv) > 1:
+        raise SystemExit(batch_main(sys.argv[1:]))
+
+    trace_path = os.environ.get(TRACE_ENV)
+    if trace_path:
+        tracing.enable()
+
     root = tk.Tk()
     app = HugoManager(root)
     root.mainloop()
 
+    if trace_path:
+        count = tracing.export(trace_path)
+        print(f"trace: {count} events written to {trace_path}")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+"""
+Markdown preview rendering for Tk text widgets
+"""
+
+import tkinter as tk
+import re
+import bisect
+
+from hugo_core import tracing
+
+HEADING_RE = re.compile(r'^(#{1,6}) ')
+
+
+def setup_preview_tags(text_widget):
+    """设置预览文本的格式标签"""
+    text_widget.tag_configure("h1", font=('Microsoft YaHei', 18, 'bold'), spacing1=15, spacing3=10, foreground='#2c3e50')
+    text_widget.tag_configure("h2", font=('Microsoft YaHei', 16, 'bold'), spacing1=12, spacing3=8, foreground='#34495e')
+    text_widget.tag_configure("h3", font=('Microsoft YaHei', 14, 'bold'), spacing1=10, spacing3=6, foreground='#34495e')
+    text_widget.tag_configure("bold", font=('Microsoft YaHei', 11, 'bold'), foreground='#2c3e50')
+    text_widget.tag_configure("italic", font=('Microsoft YaHei', 11, 'italic'), foreground='#7f8c8d')
+    text_widget.tag_configure("code", font=('Consolas', 10), background='#f8f9fa', foreground='#e74c3c', relief='solid', borderwidth=1)
+    text_widget.tag_configure("code_block", font=('Consolas', 10), background='#f8f9fa', lmargin1=20, lmargin2=20, spacing1=5, spacing3=5)
+    text_widget.tag_configure("blockquote", lmargin1=20, lmargin2=20, foreground='#7f8c8d', font=('Microsoft YaHei', 11, 'italic'))
+    text_widget.tag_configure("link", font=('Microsoft YaHei', 11), foreground='#3498db', underline=True)
+
+
+# One alternation, scanned once per line. Bold content may hold single '*'
+# (italic) but never '**', so no match reaches past the next bold delimiter.
+# Link text stops at the next '[' and the URL allows one level of balanced
+# parentheses, so a line full of unclosed brackets is scanned in linear time.
+INLINE_RE = re.compile(
+    r'`(?P<code>[^`]*)`'
+    r'|\*\*\*(?P<strong_em>[^*]+)\*\*\*'
+    r'|\*\*(?P<bold>(?:[^*]|\*(?!\*))+?)\*\*'
+    r'|\*(?P<italic>[^*]+)\*'
+    r'|\[(?P<text>[^\[\]]*)\]\((?P<url>(?:[^()]|\([^()]*\))*)\)'
+)
+
+
+def tokenize_inline(text, tags=()):
+    """把一行文本切分成互不重叠的 (文本, 标签元组) 片段
+
+    粗体、斜体和链接文字内部继续解析，嵌套的格式会叠加标签；行内代码按原样输出。
+    """
+    spans = []
+    current_pos = 0
+    for match in INLINE_RE.finditer(text):
+        start = match.start()
+        if start > current_pos:
+            spans.append((text[current_pos:start], tags))
+
+        kind = match.lastgroup
+        if kind == 'code':
+            spans.append((match.group('code'), tags + ('code',)))
+        elif kind == 'strong_em':
+            spans.extend(tokenize_inline(match.group(kind), tags + ('bold', 'italic')))
+        elif kind == 'url':
+            spans.extend(tokenize_inline(match.group('text'), tags + ('link',)))
+            spans.append((f" ({match.group('url')})", tags + ('link',)))
+        else:
+            spans.extend(tokenize_inline(match.group(kind), tags + (kind,)))
+
+        current_pos = match.end()
+
+    if current_pos < len(text):
+        spans.append((text[current_pos:], tags))
+    return spans
+
+
+def insert_formatted_line(text_widget, text, index=tk.END):
+    """插入格式化的文本行到预览窗口（每行只调用一次 insert）"""
+    if not text.strip():
+        text_widget.insert(index, '\n')
+        return
+
+    args = []
+    for chars, tags in tokenize_inline(text):
+        if chars:
+            args.append(chars)
+            args.append(tags)
+    args.append('\n')
+    args.append(())
+    text_widget.insert(index, *args)
+
+
+def _read_line(text, pos):
+    end = text.find('\n', pos)
+    if end == -1:
+        end = len(text)
+    return text[pos:end], end
+
+
+def iter_blocks(text, pos=0):
+    """从行首位置 pos 开始逐块切分Markdown源码
+
+    依次产生 (类型, 源码, 起始偏移)，块之间以一个换行分隔。
+    块的范围只取决于它自身以及其后的行，因此可以从任意块边界开始重新切分。
+    """
+    n = len(text)
+    while True:
+        start = pos
+        line, end = _read_line(text, pos)
+
+        if line.startswith('```'):
+            kind = 'code'
+            while end < n:
+                line, end = _read_line(text, end + 1)
+                if line.startswith('```'):
+                    break
+        else:
+            if HEADING_RE.match(line):
+                kind = 'heading'
+                continues = None
+            elif not line.strip():
+                kind = 'blank'
+                continues = lambda l: not l.strip()
+            elif line.startswith('>'):
+                kind = 'quote'
+                continues = lambda l: l.startswith('>')
+            else:
+                kind = 'paragraph'
+                continues = lambda l: not (not l.strip() or l.startswith(('>', '```'))
+                                           or HEADING_RE.match(l))
+
+            while continues is not None and end < n:
+                next_line, next_end = _read_line(text, end + 1)
+                if not continues(next_line):
+                    break
+                end = next_end
+
+        yield kind, text[start:end], start
+        if end >= n:
+            return
+        pos = end + 1
+
+
+def split_blocks(text):
+    """把Markdown源码切分成块：标题、段落、代码块、引用、空行
+
+    返回 (类型, 源码) 列表，块的源码以换行连接起来即为原文。
+    """
+    return [(kind, source) for kind, source, _ in iter_blocks(text)]
+
+
+def _common_prefix(a, b):
+    """两个字符串公共前缀的长度，先按大块比较再逐步缩小"""
+    n = min(len(a), len(b))
+    i = 0
+    step = 65536
+    while step:
+        while i + step <= n and a[i:i + step] == b[i:i + step]:
+            i += step
+        step //= 16
+    return i
+
+
+def _common_suffix(a, b, limit):
+    """公共后缀长度，不超过 limit"""
+    i = 0
+    step = 65536
+    len_a, len_b = len(a), len(b)
+    while step:
+        while i + step <= limit and a[len_a - i - step:len_a - i] == b[len_b - i - step:len_b - i]:
+            i += step
+        step //= 16
+    return i
+
+
+def render_block(text_widget, kind, source, index=tk.END):
+    """渲染单个块；每个块至少插入一个换行，保证块的起始位置互不重合"""
+    if kind == 'heading':
+        level, content = source.split(' ', 1)
+        text_widget.insert(index, content + '\n\n', f"h{min(len(level), 3)}")
+    elif kind == 'code':
+        lines = source.split('\n')[1:]
+        if lines and lines[-1].startswith('```'):
+            lines.pop()
+        code_content = ''.join(line + '\n' for line in lines)
+        text_widget.insert(index, code_content or '\n', 'code_block')
+    elif kind == 'quote':
+        for line in source.split('\n'):
+            text_widget.insert(index, line[1:].lstrip() + '\n', 'blockquote')
+    elif kind == 'blank':
+        text_widget.insert(index, '\n' * (source.count('\n') + 1))
+    else:
+        for line in source.split('\n'):
+            insert_formatted_line(text_widget, line.rstrip(), index)
+
+
+class LivePreview:
+    """增量实时预览
+
+    编辑器内容变化后延迟 delay 毫秒更新。先用新旧文本的公共前后缀定位改动区域，
+    只对改动附近的块重新切分，再按块哈希比较，只删除并重绘发生变化的块。
+    每个块在预览控件中的起始位置用一个 mark 记录。
+
+    watch 为 False 时不自己监听 <<Modified>>，由调用方在编辑后调用 schedule()。
+    """
+
+    def __init__(self, root, source_widget, preview_widget, delay=150, watch=True):
+        self.root = root
+        self.source = source_widget
+        self.preview = preview_widget
+        self.delay = delay
+        self.text = ''
+        self.blocks = []
+        self.starts = []
+        self.hashes = []
+        self.marks = []
+        self._mark_counter = 0
+        self._after_id = None
+        self.active = True
+
+        setup_preview_tags(self.preview)
+        if watch:
+            self.source.bind('<<Modified>>', self.on_modified, add='+')
+
+    def on_modified(self, event=None):
+        if not self.source.edit_modified():
+            return
+        self.source.edit_modified(False)
+        self.schedule()
+
+    def schedule(self):
+        """防抖：连续输入只触发一次渲染"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self._after_id = self.root.after(self.delay, self.update)
+
+    def set_active(self, active):
+        """预览页不可见时暂停渲染，切回时补一次"""
+        self.active = active
+        if active:
+            self.schedule()
+
+    def reset(self):
+        """清空预览（切换文章时使用）"""
+        self.preview.configure(state=tk.NORMAL)
+        self.preview.delete('1.0', tk.END)
+        for mark in self.marks:
+            self.preview.mark_unset(mark)
+        self.preview.configure(state=tk.DISABLED)
+        self.text = ''
+        self.blocks = []
+        self.starts = []
+        self.hashes = []
+        self.marks = []
+
+    def update(self):
+        self._after_id = None
+        if not self.active:
+            return
+
+        text = self.source.get('1.0', 'end-1c')
+        if self.marks and text == self.text:
+            return
+
+        with tracing.span('render.resplit'):
+            first, old_end, new_blocks = self._resplit(text)
+        new_starts = [start for _, _, start in new_blocks]
+        new_blocks = [(kind, source) for kind, source, _ in new_blocks]
+        new_hashes = [hash(block) for block in new_blocks]
+
+        # Blocks just around the edit are often unchanged; skip re-rendering them
+        old_hashes = self.hashes
+        while new_hashes and first < old_end and old_hashes[first] == new_hashes[0]:
+            first += 1
+            del new_blocks[0], new_starts[0], new_hashes[0]
+        while new_hashes and old_end > first and old_hashes[old_end - 1] == new_hashes[-1]:
+            old_end -= 1
+            new_blocks.pop(), new_starts.pop(), new_hashes.pop()
+
+        delta = len(text) - len(self.text)
+        self.starts[first:] = new_starts + [start + delta for start in self.starts[old_end:]]
+        self.blocks[first:old_end] = new_blocks
+        self.hashes[first:old_end] = new_hashes
+        self.text = text
+        with tracing.span('render.preview', blocks=len(new_blocks)):
+            self._render(first, old_end, new_blocks)
+
+    def _resplit(self, text):
+        """只重新切分改动区域，返回 (起始块, 旧结束块, 新块列表)"""
+        old = self.text
+        if not self.blocks:
+            return 0, 0, list(iter_blocks(text))
+
+        prefix = _common_prefix(old, text)
+        suffix = _common_suffix(old, text, min(len(old), len(text)) - prefix)
+        old_change_end = len(old) - suffix
+        delta = len(text) - len(old)
+
+        # The block before the edit may absorb lines from it, so start one block earlier
+        first = max(bisect.bisect_right(self.starts, prefix) - 2, 0)
+
+        new_blocks = []
+        old_end = len(self.blocks)
+        for block in iter_blocks(text, self.starts[first]):
+            # Once a new block starts where an old one did past the edit, the rest is unchanged
+            old_start = block[2] - delta
+            if old_start >= old_change_end and block[2] > self.starts[first]:
+                index = bisect.bisect_left(self.starts, old_start)
+                if index < len(self.starts) and self.starts[index] == old_start:
+                    old_end = index
+                    break
+            new_blocks.append(block)
+
+        return first, old_end, new_blocks
+
+    def _render(self, first, old_end, blocks):
+        widget = self.preview
+        widget.configure(state=tk.NORMAL)
+
+        from_index = self.marks[first] if first < len(self.marks) else 'end-1c'
+        to_index = self.marks[old_end] if old_end < len(self.marks) else 'end-1c'
+        widget.delete(from_index, to_index)
+        for mark in self.marks[first:old_end]:
+            widget.mark_unset(mark)
+
+        # 'render' has right gravity, so consecutive inserts at it stay in order
+        widget.mark_set('render', to_index)
+        new_marks = []
+        for kind, source in blocks:
+            position = widget.index('render')
+            render_block(widget, kind, source, 'render')
+            mark = f"block{self._mark_counter}"
+            self._mark_counter += 1
+            widget.mark_set(mark, position)
+            new_marks.append(mark)
+
+        self.marks[first:old_end] = new_marks
+        widget.configure(state=tk.DISABLED)
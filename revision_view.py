@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+History dialog: revisions of the open post, their diffs, and restoring one
+"""
+
+import time
+import tkinter as tk
+from tkinter import ttk, scrolledtext
+
+NOTE_LABELS = {'original': "原始文件", 'restore': "恢复"}
+
+
+class RevisionDialog:
+    """左侧列出修订，右侧显示所选修订与编辑器当前内容（或与它的上一个修订）的差异
+
+    on_restore(文本) 在点击"恢复到编辑器"时调用，恢复的内容需要再保存才会写入文件。
+    """
+
+    def __init__(self, parent, store, name, current_text, on_restore):
+        self.store = store
+        self.name = name
+        self.current_text = current_text
+        self.on_restore = on_restore
+        self.revisions = store.list(name)
+
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(f"历史版本 - {name}")
+        self.dialog.geometry("1000x650")
+        self.dialog.transient(parent)
+        self.dialog.geometry("+%d+%d" % (parent.winfo_rootx() + 50, parent.winfo_rooty() + 50))
+
+        self.create_widgets()
+        if self.revisions:
+            self.listbox.selection_set(0)
+            self.show_diff()
+
+    def create_widgets(self):
+        main_frame = ttk.Frame(self.dialog, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        left_frame = ttk.Frame(main_frame)
+        left_frame.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 10))
+        ttk.Label(left_frame, text=f"共 {len(self.revisions)} 个版本").pack(anchor=tk.W, pady=(0, 5))
+        self.listbox = tk.Listbox(left_frame, width=34, exportselection=False, font=('Consolas', 10))
+        self.listbox.pack(fill=tk.Y, expand=True)
+        for revision in self.revisions:
+            stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(revision['t']))
+            note = NOTE_LABELS.get(revision['note'], revision['note'])
+            self.listbox.insert(tk.END, f"{stamp} {revision['size']:>7} {note}")
+        self.listbox.bind('<<ListboxSelect>>', lambda e: self.show_diff())
+
+        right_frame = ttk.Frame(main_frame)
+        right_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        compare_frame = ttk.Frame(right_frame)
+        compare_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(compare_frame, text="对比:").pack(side=tk.LEFT)
+        self.compare_var = tk.StringVar(value='current')
+        ttk.Radiobutton(compare_frame, text="编辑器当前内容", value='current', variable=self.compare_var,
+                        command=self.show_diff).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Radiobutton(compare_frame, text="上一个版本", value='previous', variable=self.compare_var,
+                        command=self.show_diff).pack(side=tk.LEFT, padx=(5, 0))
+
+        self.diff_text = scrolledtext.ScrolledText(right_frame, wrap=tk.NONE, font=('Consolas', 10),
+                                                   state=tk.DISABLED)
+        self.diff_text.pack(fill=tk.BOTH, expand=True)
+        self.diff_text.tag_configure('added', foreground='#27ae60')
+        self.diff_text.tag_configure('removed', foreground='#c0392b')
+        self.diff_text.tag_configure('hunk', foreground='#2980b9')
+
+        button_frame = ttk.Frame(self.dialog, padding=(10, 0, 10, 10))
+        button_frame.pack(fill=tk.X)
+        ttk.Button(button_frame, text="关闭", command=self.dialog.destroy).pack(side=tk.RIGHT, padx=(5, 0))
+        ttk.Button(button_frame, text="恢复到编辑器", command=self.restore_clicked).pack(side=tk.RIGHT)
+
+    def selected(self):
+        selection = self.listbox.curselection()
+        return selection[0] if selection else None
+
+    def show_diff(self):
+        index = self.selected()
+        if index is None:
+            return
+        rev_id = self.revisions[index]['id']
+        if self.compare_var.get() == 'current':
+            diff = self.store.diff(self.name, rev_id, new_text=self.current_text)
+            empty = "与编辑器当前内容相同"
+        elif index + 1 < len(self.revisions):
+            diff = self.store.diff(self.name, self.revisions[index + 1]['id'], rev_id)
+            empty = "与上一个版本相同"
+        else:
+            diff = ''
+            empty = "这是最早的版本"
+
+        self.diff_text.configure(state=tk.NORMAL)
+        self.diff_text.delete(1.0, tk.END)
+        for line in diff.splitlines(True) or [empty]:
+            tag = None
+            if line.startswith('@@'):
+                tag = 'hunk'
+            elif line.startswith('+') and not line.startswith('+++'):
+                tag = 'added'
+            elif line.startswith('-') and not line.startswith('---'):
+                tag = 'removed'
+            self.diff_text.insert(tk.END, line, tag)
+        self.diff_text.configure(state=tk.DISABLED)
+
+    def restore_clicked(self):
+        index = self.selected()
+        if index is None:
+            return
+        self.on_restore(self.store.text(self.name, self.revisions[index]['id']))
+        self.dialog.destroy()
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Background task runner that keeps blocking work off the Tk main loop
+"""
+
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Task:
+    """一次后台操作，工作线程可以通过它检查是否被取消并报告进度"""
+
+    def __init__(self, runner, key, message, keep_started=False):
+        self.runner = runner
+        self.key = key
+        self.message = message
+        self.keep_started = keep_started
+        self.started = False
+        self.future = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def start(self):
+        """工作线程在产生副作用（例如写文件）之前调用，已取消时返回 False"""
+        with self._lock:
+            if self.cancelled:
+                return False
+            self.started = True
+            return True
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def progress(self, text):
+        """从工作线程更新状态栏（在主线程中执行）"""
+        if not self.cancelled:
+            self.runner._results.put((self, 'progress', text))
+
+
+class TaskRunner:
+    """线程池 + root.after 轮询
+
+    工作函数在线程池中运行，完成后的回调总是在 Tk 主线程中执行。
+    同一个 key 只保留最新的任务，旧任务会被取消，结果被丢弃；
+    以 keep_started=True 提交并已调用 task.start() 的任务除外，它的工作已经生效，回调照常执行。
+    """
+
+    POLL_INTERVAL = 16  # ms, roughly one frame
+    FRAME_BUDGET = 0.008  # seconds of callback work per poll
+
+    def __init__(self, root, status_var=None, max_workers=4):
+        self.root = root
+        self.status_var = status_var
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hugo-manager")
+        self._results = queue.Queue()
+        self._active = {}
+        self._pending = 0
+        self._poll_id = None
+
+    def submit(self, key, func, on_done=None, on_error=None, message=None, keep_started=False):
+        """提交后台任务，func(task) 在工作线程中执行"""
+        previous = self._active.get(key)
+        if previous is not None:
+            previous.cancel()
+
+        task = Task(self, key, message, keep_started)
+        self._active[key] = task
+        if message and self.status_var is not None:
+            self.status_var.set(message)
+
+        def run():
+            if task.cancelled:
+                return None
+            return func(task)
+
+        task.future = self.executor.submit(run)
+        task.future.add_done_callback(
+            lambda future: self._results.put((task, 'done', (on_done, on_error)))
+        )
+        self._pending += 1
+        self._schedule()
+        return task
+
+    def cancel(self, key):
+        """取消某个 key 上正在进行的任务"""
+        task = self._active.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def is_busy(self, key):
+        task = self._active.get(key)
+        return task is not None and not task.future.done()
+
+    def shutdown(self):
+        """停止轮询；已提交的任务（例如保存）仍会在退出前执行完"""
+        self._active.clear()
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+        self.executor.shutdown(wait=False)
+
+    def _schedule(self):
+        if self._poll_id is None:
+            self._poll_id = self.root.after(self.POLL_INTERVAL, self._poll)
+
+    def _poll(self):
+        self._poll_id = None
+        deadline = time.perf_counter() + self.FRAME_BUDGET
+
+        while time.perf_counter() < deadline:
+            try:
+                task, kind, payload = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == 'progress':
+                if not task.cancelled and self.status_var is not None:
+                    self.status_var.set(payload)
+                continue
+
+            self._pending -= 1
+            self._finish(task, *payload)
+
+        if self._pending > 0 or not self._results.empty():
+            self._schedule()
+
+    def _finish(self, task, on_done, on_error):
+        if self._active.get(task.key) is task:
+            del self._active[task.key]
+        # A superseded task whose side effects already happened still reports them
+        if task.cancelled and not (task.keep_started and task.started):
+            return
+
+        error = task.future.exception()
+        if error is not None:
+            if on_error is not None:
+                on_error(error)
+            elif self.status_var is not None:
+                self.status_var.set(f"操作失败: {error}")
+            return
+
+        if on_done is not None:
+            on_done(task.future.result())
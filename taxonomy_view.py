@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Tag/category autocomplete for the editor and the taxonomy browser tab
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+KIND_LABELS = {'tags': "标签", 'categories': "分类"}
+# Keys handled by their own bindings while the suggestion list is open
+NAVIGATION_KEYS = {'Up', 'Down', 'Return', 'KP_Enter', 'Tab', 'Escape'}
+
+
+class TermCompleter:
+    """逗号分隔的词项输入框的前缀补全
+
+    lookup(prefix, limit) 返回 [(词项, 文章数)]。光标前正在输入的词项作为前缀，
+    上下键选择，Tab 或回车接受，Esc 关闭。
+    """
+
+    def __init__(self, entry, lookup, limit=8):
+        self.entry = entry
+        self.lookup = lookup
+        self.limit = limit
+        self.matches = []
+        self.popup = None
+        self.listbox = None
+
+        entry.bind('<KeyRelease>', self.on_key, add='+')
+        entry.bind('<Down>', lambda e: self.move(1))
+        entry.bind('<Up>', lambda e: self.move(-1))
+        entry.bind('<Tab>', self.accept)
+        entry.bind('<Return>', self.accept)
+        entry.bind('<Escape>', lambda e: self.hide())
+        # Clicking a suggestion moves the focus first, so hide a little later
+        entry.bind('<FocusOut>', lambda e: entry.after(150, self.hide_unless_focused), add='+')
+
+    def fragment(self):
+        """返回 (起始位置, 光标位置, 光标前正在输入的词项)"""
+        text = self.entry.get()
+        cursor = self.entry.index(tk.INSERT)
+        start = text.rfind(',', 0, cursor) + 1
+        return start, cursor, text[start:cursor].strip()
+
+    def on_key(self, event):
+        if event.keysym in NAVIGATION_KEYS:
+            return
+        _, _, prefix = self.fragment()
+        self.matches = self.lookup(prefix, self.limit) if prefix else []
+        if not self.matches or (len(self.matches) == 1 and self.matches[0][0] == prefix):
+            self.hide()
+            return
+        self.show()
+
+    def show(self):
+        if self.popup is None:
+            self.popup = tk.Toplevel(self.entry)
+            self.popup.wm_overrideredirect(True)
+            self.listbox = tk.Listbox(self.popup, exportselection=False, takefocus=False)
+            self.listbox.pack(fill=tk.BOTH, expand=True)
+            self.listbox.bind('<ButtonRelease-1>', self.accept)
+
+        self.listbox.delete(0, tk.END)
+        for term, count in self.matches:
+            self.listbox.insert(tk.END, f"{term}  ({count})")
+        self.listbox.configure(height=len(self.matches))
+        self.listbox.selection_set(0)
+        x = self.entry.winfo_rootx()
+        y = self.entry.winfo_rooty() + self.entry.winfo_height()
+        self.popup.wm_geometry(f"{max(self.entry.winfo_width(), 160)}x{self.listbox.winfo_reqheight()}+{x}+{y}")
+        self.popup.deiconify()
+        self.popup.lift()
+
+    def hide(self):
+        self.matches = []
+        if self.popup is not None:
+            self.popup.withdraw()
+
+    def hide_unless_focused(self):
+        if self.entry.focus_get() is not self.entry:
+            self.hide()
+
+    def move(self, step):
+        if not self.matches:
+            return None
+        selection = self.listbox.curselection()
+        index = (selection[0] + step if selection else 0) % len(self.matches)
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(index)
+        self.listbox.see(index)
+        return 'break'
+
+    def accept(self, event=None):
+        if not self.matches:
+            return None
+        selection = self.listbox.curselection()
+        term = self.matches[selection[0] if selection else 0][0]
+        start, cursor, _ = self.fragment()
+        text = self.entry.get()
+        head = text[:start] + (' ' if start else '')
+        self.entry.delete(0, tk.END)
+        self.entry.insert(0, head + term + text[cursor:])
+        self.entry.icursor(len(head + term))
+        self.entry.focus_set()
+        self.hide()
+        return 'break'
+
+
+class TaxonomyBrowser(ttk.Frame):
+    """列出全部标签或分类及其文章数，选中一项时调用 on_select(kind, 词项)
+
+    terms(kind) 返回按名称排序的 [(词项, 文章数)]。索引变化后调用 invalidate()，
+    列表只在标签页可见时重新生成。
+    """
+
+    def __init__(self, parent, terms, on_select, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.terms = terms
+        self.on_select = on_select
+        self.active = False
+        self.dirty = True
+        self.sort_by_count = True
+        self.selected = None
+
+        toolbar = ttk.Frame(self)
+        toolbar.pack(fill=tk.X, pady=(0, 5))
+        self.kind_var = tk.StringVar(value=KIND_LABELS['tags'])
+        kind_box = ttk.Combobox(toolbar, textvariable=self.kind_var, values=list(KIND_LABELS.values()),
+                                state="readonly", width=6)
+        kind_box.pack(side=tk.LEFT)
+        kind_box.bind('<<ComboboxSelected>>', lambda e: self.reload())
+        ttk.Label(toolbar, text="筛选:").pack(side=tk.LEFT, padx=(10, 0))
+        self.filter_var = tk.StringVar()
+        ttk.Entry(toolbar, textvariable=self.filter_var, width=20).pack(side=tk.LEFT, padx=(5, 0))
+        self.filter_var.trace('w', lambda *args: self.reload())
+        ttk.Button(toolbar, text="显示全部文章", command=self.clear_selection).pack(side=tk.RIGHT)
+
+        self.tree = ttk.Treeview(self, columns=('count',), selectmode='browse')
+        self.tree.heading('#0', text="名称", command=lambda: self.sort(False))
+        self.tree.heading('count', text="文章数", command=lambda: self.sort(True))
+        self.tree.column('count', width=80, anchor=tk.E, stretch=False)
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        self.tree.bind('<<TreeviewSelect>>', self.on_tree_select)
+
+    @property
+    def kind(self):
+        return next(kind for kind, label in KIND_LABELS.items() if label == self.kind_var.get())
+
+    def set_active(self, active):
+        self.active = active
+        if active and self.dirty:
+            self.reload()
+
+    def invalidate(self):
+        self.dirty = True
+        if self.active:
+            self.reload()
+
+    def sort(self, by_count):
+        self.sort_by_count = by_count
+        self.reload()
+
+    def reload(self):
+        self.dirty = False
+        needle = self.filter_var.get().strip().casefold()
+        terms = [(term, count) for term, count in self.terms(self.kind)
+                 if not needle or needle in term.casefold()]
+        if self.sort_by_count:
+            terms.sort(key=lambda item: -item[1])
+
+        selection = self.tree.selection()
+        self.tree.delete(*self.tree.get_children())
+        for term, count in terms:
+            if not term:
+                continue
+            self.tree.insert('', tk.END, iid=term, text=term, values=(count,))
+        if selection and self.tree.exists(selection[0]):
+            self.tree.selection_set(selection[0])
+
+    def on_tree_select(self, event=None):
+        selection = self.tree.selection()
+        # Restoring the selection after a reload fires this event too
+        if selection and (self.kind, selection[0]) != self.selected:
+            self.selected = (self.kind, selection[0])
+            self.on_select(*self.selected)
+
+    def clear_selection(self):
+        self.selected = None
+        self.tree.selection_set(())
+        self.on_select(None, None)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""Round trips of YAML, TOML and JSON front matter through hugo_core.frontmatter"""
+
+import datetime
+
+import pytest
+
+from hugo_core.frontmatter import (FrontMatterError, locate_body, parse_document,
+                                   serialize_front_matter, serialize_markdown)
+
+
+def round_trip(front_matter, fmt, body="正文\n\n第二段"):
+    parsed, parsed_body, parsed_fmt = parse_document(serialize_markdown(front_matter, body, fmt))
+    assert parsed_fmt == fmt
+    assert parsed_body == body
+    return parsed
+
+
+@pytest.mark.parametrize('fmt', ['yaml', 'toml', 'json'])
+def test_round_trip_keeps_values_and_types(fmt):
+    front_matter = {
+        'title': "标题: 含冒号 \"引号\" 和 --- 分隔符",
+        'date': "2026-04-13T00:45:48+08:00",
+        'draft': False,
+        'weight': 3,
+        'ratio': 0.5,
+        'tags': ["日常", "Hugo"],
+        'categories': [],
+    }
+    assert round_trip(front_matter, fmt) == front_matter
+
+
+def test_yaml_dates_stay_strings_quoted_or_not():
+    content = '---\ndate: 2026-04-13T00:45:48+08:00\nlastmod: "2026-04-14"\nday: 2026-04-15\n---\n\nbody'
+    front_matter, body, fmt = parse_document(content)
+    assert front_matter == {'date': '2026-04-13T00:45:48+08:00', 'lastmod': '2026-04-14', 'day': '2026-04-15'}
+    assert fmt == 'yaml' and body == 'body'
+    assert round_trip(front_matter, 'yaml') == front_matter
+
+
+def test_toml_dates_are_native_and_round_trip():
+    content = '+++\ndate = 2026-04-13T00:45:48+08:00\nday = 2026-04-15\nquoted = "2026-04-16"\n+++\n\nbody'
+    front_matter, _, fmt = parse_document(content)
+    assert fmt == 'toml'
+    assert isinstance(front_matter['date'], datetime.datetime)
+    assert front_matter['day'] == datetime.date(2026, 4, 15)
+    assert front_matter['quoted'] == '2026-04-16'
+    assert round_trip(front_matter, 'toml') == front_matter
+
+
+def test_yaml_multi_line_list_and_separator_in_block_value():
+    content = ('---\ntitle: 多行\ntags:\n  - a\n  - b\nsummary: |\n  第一行\n  ---\n  最后一行\n---\n\n'
+               '正文里的 ---\n---\n结尾')
+    front_matter, body, _ = parse_document(content)
+    assert front_matter['tags'] == ['a', 'b']
+    assert front_matter['summary'] == '第一行\n---\n最后一行\n'
+    assert body == '正文里的 ---\n---\n结尾'
+
+
+def test_toml_nested_tables_and_arrays_of_tables():
+    front_matter = {
+        'title': "嵌套",
+        'params': {'toc': True, 'author': {'name': "LiangYu", 'links': ["a", "b"]}},
+        'resources': [{'src': "a.png", 'title': "A"}, {'src': "b.png", 'params': {'credit': "B"}}],
+        'inline': [{'x': 1}, 2],
+    }
+    header = serialize_front_matter(front_matter, 'toml')
+    assert '[params.author]' in header
+    assert header.count('[[resources]]') == 2
+    assert '[resources.params]' in header
+    assert round_trip(front_matter, 'toml') == front_matter
+
+
+def test_yaml_nested_values_round_trip():
+    front_matter = {'title': "t", 'params': {'toc': True, 'list': [{'a': 1}, {'b': [1, 2]}]}}
+    assert round_trip(front_matter, 'yaml') == front_matter
+
+
+def test_json_header_with_braces_in_strings():
+    content = '{\n  "title": "a } b",\n  "tags": ["x"]\n}\n\nbody {not json}'
+    front_matter, body, fmt = parse_document(content)
+    assert fmt == 'json'
+    assert front_matter == {'title': 'a } b', 'tags': ['x']}
+    assert body == 'body {not json}'
+
+
+def test_no_front_matter_and_bom():
+    assert parse_document("just text") == ({}, "just text", None)
+    front_matter, body, fmt = parse_document('\ufeff---\ntitle: x\n---\nbody')
+    assert (front_matter, body, fmt) == ({'title': 'x'}, 'body', 'yaml')
+
+
+@pytest.mark.parametrize('content', [
+    '---\ntitle: x\nno closing delimiter',
+    '---\ntitle: [unclosed\n---\nbody',
+    '---\n- a list\n- not a mapping\n---\nbody',
+    '+++\ntitle = \n+++\nbody',
+    '{"title": "x",\n"tags": [}\nbody',
+])
+def test_malformed_header_raises_front_matter_error(content):
+    with pytest.raises(FrontMatterError):
+        parse_document(content)
+
+
+def test_locate_body_reads_only_the_header(tmp_path):
+    path = tmp_path / "post.md"
+    content = '---\ntitle: 中文标题\n---\n\n正文'
+    path.write_bytes(content.encode('utf-8'))
+    front_matter, fmt, offset = locate_body(path)
+    assert front_matter == {'title': '中文标题'} and fmt == 'yaml'
+    assert path.read_bytes()[offset:].decode('utf-8') == '\n正文'
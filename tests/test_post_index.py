@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Incremental refresh, journal replay and recovery of hugo_core.post_index"""
+
+import os
+
+import pytest
+
+from hugo_core.post_index import PostIndex
+
+
+def write_post(blog, name, title, tags=(), stamp=None):
+    path = blog / "content" / "posts" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tag_list = ', '.join(f'"{tag}"' for tag in tags)
+    path.write_text(f'---\ntitle: "{title}"\ntags: [{tag_list}]\n---\n\n正文', encoding='utf-8')
+    if stamp is not None:
+        # Distinct mtimes, so a rewrite of the same size is still seen as a change
+        os.utime(path, ns=(stamp, stamp))
+    return path
+
+
+@pytest.fixture
+def blog(tmp_path):
+    write_post(tmp_path, "a.md", "A", ["x"], stamp=1_000_000_000)
+    write_post(tmp_path, "b.md", "B", ["x", "y"], stamp=1_000_000_000)
+    return tmp_path
+
+
+def test_refresh_reports_added_changed_and_removed(blog):
+    index = PostIndex(blog)
+    index.refresh()
+    assert index.refresh() == ([], [], [])
+
+    write_post(blog, "c.md", "C", stamp=2_000_000_000)
+    write_post(blog, "a.md", "A2", ["x"], stamp=3_000_000_000)
+    os.remove(blog / "content" / "posts" / "b.md")
+    assert index.refresh() == (['c.md'], ['a.md'], ['b.md'])
+    assert index.get('a.md')['title'] == 'A2'
+    assert sorted(index.snapshot()) == ['a.md', 'c.md']
+
+
+def test_first_refresh_lists_every_post(blog):
+    added, changed, removed = PostIndex(blog).refresh()
+    assert sorted(added) == ['a.md', 'b.md'] and changed == [] and removed == []
+
+
+def test_unchanged_files_are_not_reparsed(blog, monkeypatch):
+    index = PostIndex(blog)
+    index.refresh()
+    reloaded = PostIndex(blog)
+    monkeypatch.setattr(reloaded, '_read_entry', lambda name, stat: pytest.fail(f"re-read {name}"))
+    assert reloaded.refresh() == ([], [], [])
+    assert reloaded.get('b.md')['tags'] == ['x', 'y']
+
+
+def test_update_file_is_journaled_and_replayed(blog):
+    index = PostIndex(blog)
+    index.refresh()
+    write_post(blog, "a.md", "Saved", ["z"], stamp=4_000_000_000)
+    index.update_file(blog / "content" / "posts" / "a.md")
+    index.remove('b.md')
+    assert index.journal_path.exists()
+
+    reloaded = PostIndex(blog)
+    reloaded.load()
+    assert reloaded.get('a.md')['title'] == 'Saved'
+    assert reloaded.get('b.md') is None
+
+
+def test_corrupt_index_file_starts_over(blog):
+    index = PostIndex(blog)
+    index.refresh()
+    index.index_path.write_text('{"version": 2, "posts": {', encoding='utf-8')
+
+    recovered = PostIndex(blog)
+    added, changed, removed = recovered.refresh()
+    assert sorted(added) == ['a.md', 'b.md'] and removed == []
+    assert PostIndex(blog).refresh() == ([], [], [])
+
+
+def test_torn_journal_line_is_skipped_and_rewritten(blog):
+    index = PostIndex(blog)
+    index.refresh()
+    write_post(blog, "a.md", "Saved", stamp=5_000_000_000)
+    index.update_file(blog / "content" / "posts" / "a.md")
+    with open(index.journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"name": "b.md", "ent')
+
+    reloaded = PostIndex(blog)
+    reloaded.load()
+    assert reloaded.get('a.md')['title'] == 'Saved'
+    assert reloaded.get('b.md')['title'] == 'B'
+    assert not reloaded.journal_path.exists()
+
+
+def test_broken_header_is_still_listed(blog):
+    (blog / "content" / "posts" / "bad.md").write_text('---\ntitle: [oops\n---\nbody', encoding='utf-8')
+    index = PostIndex(blog)
+    index.refresh()
+    assert index.get('bad.md')['title'] == ''
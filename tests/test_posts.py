@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""Batch operations on posts, in particular posts without front matter"""
+
+from hugo_core.posts import process_post
+
+BARE_POST = "# 标题\n\n![图](/old/a.png)\n<img src=\"/old/b.png\">\n"
+REWRITE = {'old': '/old/', 'new': '/new/'}
+
+
+def test_body_operation_applies_without_front_matter(tmp_path):
+    path = tmp_path / "bare.md"
+    path.write_text(BARE_POST, encoding='utf-8')
+
+    _, changed, diff, error = process_post(str(path), 'rewrite-images', REWRITE, True)
+    assert error is None and changed
+    # Only the image lines change; no front matter is added
+    changes = [line for line in diff.splitlines()[2:] if line[:1] in '+-']
+    assert changes == ['-![图](/old/a.png)', '-<img src="/old/b.png">',
+                       '+![图](/new/a.png)', '+<img src="/new/b.png">']
+    # A dry run leaves the file alone
+    assert path.read_text(encoding='utf-8') == BARE_POST
+
+
+def test_body_operation_rewrites_only_the_body(tmp_path):
+    path = tmp_path / "bare.md"
+    path.write_bytes(('\ufeff' + BARE_POST).encode('utf-8'))
+
+    assert process_post(str(path), 'rewrite-images', REWRITE, False)[1:] == (True, '', None)
+    assert path.read_text(encoding='utf-8') == '\ufeff' + BARE_POST.replace('/old/', '/new/')
+
+
+def test_front_matter_operation_skips_posts_without_it(tmp_path):
+    path = tmp_path / "bare.md"
+    path.write_text(BARE_POST, encoding='utf-8')
+    assert process_post(str(path), 'set-draft', {'draft': True}, True)[1:] == (False, '', None)
+    assert process_post(str(path), 'normalize-dates', {'tz': '+0800'}, False)[1:] == (False, '', None)
+    assert path.read_text(encoding='utf-8') == BARE_POST
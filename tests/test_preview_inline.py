@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""Inline tokenizer of the preview pane"""
+
+import time
+
+from preview import tokenize_inline
+
+
+def test_plain_text():
+    assert tokenize_inline("no markup here") == [("no markup here", ())]
+
+
+def test_nested_emphasis():
+    assert tokenize_inline("**b *i* b**") == [
+        ("b ", ('bold',)), ("i", ('bold', 'italic')), (" b", ('bold',))]
+    assert tokenize_inline("***x***") == [("x", ('bold', 'italic'))]
+
+
+def test_link_inside_emphasis():
+    assert tokenize_inline("**b [l](u)**") == [
+        ("b ", ('bold',)), ("l", ('bold', 'link')), (" (u)", ('bold', 'link'))]
+
+
+def test_links():
+    assert tokenize_inline("see [docs](https://x/y) now") == [
+        ("see ", ()), ("docs", ('link',)), (" (https://x/y)", ('link',)), (" now", ())]
+    # One level of balanced parentheses in the URL
+    assert tokenize_inline("[w](https://x/Foo_(bar))") == [
+        ("w", ('link',)), (" (https://x/Foo_(bar))", ('link',))]
+
+
+def test_code_span_is_not_parsed():
+    assert tokenize_inline("a `x**y*[l](u)` b") == [
+        ("a ", ()), ("x**y*[l](u)", ('code',)), (" b", ())]
+    assert tokenize_inline("`c*`") == [("c*", ('code',))]
+
+
+def test_unclosed_markup_stays_text():
+    for text in ("**open", "[text](", "`tick", "[a] (b)"):
+        assert "".join(part for part, _ in tokenize_inline(text)) == text
+
+
+def test_unclosed_brackets_are_linear():
+    def elapsed(n):
+        text = "[" * n + "x"
+        start = time.perf_counter()
+        assert tokenize_inline(text) == [(text, ())]
+        return time.perf_counter() - start
+
+    elapsed(100)
+    # Quadratic backtracking would take about 64 times longer
+    assert elapsed(8000) < max(0.05, 16 * elapsed(1000))
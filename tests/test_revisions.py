@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""Deduplication, reconstruction and compaction of hugo_core.revisions"""
+
+import json
+import time
+
+from hugo_core.revisions import (KEYFRAME_INTERVAL, RevisionStore, apply_delta, make_delta,
+                                 revision_id, select_kept)
+
+
+def version(i, lines=200):
+    return ''.join(f"第 {n} 行{' 改' if n == i % lines else ''}\n" for n in range(lines))
+
+
+def log_records(store, name):
+    with open(store.root / f"{name}.log", 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_delta_round_trip():
+    base, text = version(1), version(2) + "新的一行\n"
+    assert apply_delta(base, make_delta(base, text)) == text
+    assert apply_delta(base, make_delta(base, '')) == ''
+
+
+def test_identical_saves_are_recorded_once(tmp_path):
+    store = RevisionStore(tmp_path)
+    assert store.record('a.md', "one\n")
+    assert not store.record('a.md', "one\n")
+    assert store.record('a.md', "two\n")
+    assert [r['id'] for r in store.list('a.md')] == [revision_id("two\n"), revision_id("one\n")]
+
+
+def test_returning_to_earlier_content_stores_no_data(tmp_path):
+    store = RevisionStore(tmp_path)
+    for text in (version(1), version(2), version(1)):
+        store.record('a.md', text)
+    records = log_records(store, 'a.md')
+    assert len(records) == 3
+    assert 'z' not in records[2] and records[2]['id'] == records[0]['id']
+    # Later saves are deltas against the previous revision
+    assert records[1]['base'] == records[0]['id']
+
+
+def test_every_revision_reconstructs_after_reload(tmp_path):
+    store = RevisionStore(tmp_path)
+    texts = [version(i) for i in range(KEYFRAME_INTERVAL + 10)]
+    for text in texts:
+        store.record('a.md', text)
+
+    reloaded = RevisionStore(tmp_path)
+    revisions = list(reversed(reloaded.list('a.md')))
+    assert [reloaded.text('a.md', r['id']) for r in revisions] == texts
+    # A keyframe bounds the delta chain
+    assert sum('base' not in record for record in log_records(store, 'a.md')) >= 2
+    assert '+第 3 行 改' in reloaded.diff('a.md', revisions[2]['id'], revisions[3]['id'])
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    store = RevisionStore(tmp_path)
+    store.record('a.md', "one\n")
+    store.record('a.md', "two\n")
+    with open(store.root / "a.md.log", 'a', encoding='utf-8') as f:
+        f.write('{"t": 1, "id": "abc", "z"')
+
+    reloaded = RevisionStore(tmp_path)
+    assert len(reloaded.list('a.md')) == 2
+    assert reloaded.record('a.md', "three\n")
+    assert [reloaded.text('a.md', r['id']) for r in RevisionStore(tmp_path).list('a.md')] == \
+        ["three\n", "two\n", "one\n"]
+
+
+def test_select_kept_keeps_recent_and_one_per_day():
+    day = 86400
+    now = 100 * day
+    revisions = [{'t': now - 200 * day}]  # older than keep_days
+    revisions += [{'t': now - 5 * day + hour * 3600} for hour in range(3)]
+    revisions += [{'t': now - hour} for hour in (3, 2, 1)]
+    kept = select_kept(revisions, keep_recent=2, keep_days=90, now=now)
+    assert 0 not in kept
+    assert {2, 3, 4} & kept == {3}  # the last revision of that day
+    assert {5, 6} <= kept
+
+
+def test_compaction_bounds_the_log_and_keeps_texts(tmp_path):
+    store = RevisionStore(tmp_path, keep_recent=5, keep_days=0)
+    texts = [version(i) for i in range(40)]
+    for text in texts:
+        store.record('a.md', text)
+
+    revisions = store.list('a.md')
+    assert len(revisions) <= 2 * (5 + 1)
+    assert revisions[0]['id'] == revision_id(texts[-1])
+    store.compact('a.md')
+    reloaded = RevisionStore(tmp_path)
+    kept = [reloaded.text('a.md', r['id']) for r in reversed(reloaded.list('a.md'))]
+    assert kept == texts[-5:]
+
+
+def test_compaction_waits_for_the_log_to_double(tmp_path, monkeypatch):
+    store = RevisionStore(tmp_path, keep_recent=5, keep_days=10)
+    sizes = []
+    compact = store._compact
+
+    def spy(name, log, kept=None):
+        before = len(log.revisions)
+        removed = compact(name, log, kept)
+        sizes.append((before, before - removed))
+        return removed
+
+    monkeypatch.setattr(store, '_compact', spy)
+    now = [1_000_000_000.0]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    # 30 days of saves, more than keep_days, so the daily revisions fill the kept set
+    for day in range(30):
+        for save in range(4):
+            now[0] = 1_000_000_000.0 + day * 86400 + save * 3600
+            store.record('a.md', version(day * 4 + save))
+
+    assert sizes
+    for (_, after), (before, _) in zip(sizes, sizes[1:]):
+        assert before >= 2 * after
+    assert len(sizes) < 10
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""Superseding tasks in tasks.TaskRunner, driven without a Tk main loop"""
+
+import threading
+
+from tasks import TaskRunner
+
+
+class FakeRoot:
+    """Just enough of a Tk root for TaskRunner: after() callbacks are run by drain()"""
+
+    def __init__(self):
+        self.pending = {}
+        self.next_id = 0
+
+    def after(self, ms, callback):
+        self.next_id += 1
+        self.pending[self.next_id] = callback
+        return self.next_id
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def drain(self, runner):
+        runner.executor.shutdown(wait=True)
+        while self.pending:
+            self.pending.pop(min(self.pending))()
+
+
+def blocked_task(started, release, result):
+    def run(task):
+        if not task.start():
+            return None
+        started.set()
+        release.wait(5)
+        return result
+    return run
+
+
+def supersede_running(keep_started):
+    root = FakeRoot()
+    runner = TaskRunner(root)
+    started, release = threading.Event(), threading.Event()
+    done = []
+    runner.submit('save', blocked_task(started, release, 'old'), done.append, keep_started=keep_started)
+    assert started.wait(5)
+    runner.submit('save', lambda task: 'new' if task.start() else None, done.append, keep_started=keep_started)
+    release.set()
+    root.drain(runner)
+    return done
+
+
+def test_started_task_keeps_its_callback():
+    assert sorted(supersede_running(keep_started=True)) == ['new', 'old']
+
+
+def test_superseded_task_is_dropped_by_default():
+    assert supersede_running(keep_started=False) == ['new']
+
+
+def test_task_superseded_before_starting_never_runs():
+    root = FakeRoot()
+    runner = TaskRunner(root, max_workers=1)
+    started, release = threading.Event(), threading.Event()
+    done, ran = [], []
+    runner.submit('busy', blocked_task(started, release, 'busy'), done.append)
+    assert started.wait(5)
+    # The pool's only worker is busy, so the first save is still queued when the second replaces it
+    runner.submit('save', lambda task: ran.append('first') or 'first', done.append, keep_started=True)
+    runner.submit('save', lambda task: task.start() and 'second', done.append, keep_started=True)
+    release.set()
+    root.drain(runner)
+    assert ran == [] and sorted(done) == ['busy', 'second']
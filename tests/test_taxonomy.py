@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""Term counts and completion of hugo_core.taxonomy, alone and kept in step by PostIndex"""
+
+from hugo_core.post_index import PostIndex
+from hugo_core.posts import process_post
+from hugo_core.taxonomy import Taxonomy
+
+
+def entry(name, tags=(), categories=()):
+    return {'name': name, 'tags': list(tags), 'categories': list(categories)}
+
+
+def test_counts_and_completion():
+    taxonomy = Taxonomy({
+        'a.md': entry('a.md', ['Hugo', 'python'], ['技术']),
+        'b.md': entry('b.md', ['hugo', 'Python'], ['技术']),
+        'c.md': entry('c.md', ['hugo'], ['日常']),
+    })
+    tags = taxonomy['tags']
+    assert tags.count('hugo') == 2 and tags.count('Hugo') == 1 and tags.count('missing') == 0
+    assert tags.complete('HU') == [('Hugo', 1), ('hugo', 2)]
+    assert tags.complete('py', limit=1) == [('Python', 1)]
+    assert tags.complete('z') == []
+    assert taxonomy['categories'].terms() == [('技术', 2), ('日常', 1)]
+
+
+def test_renaming_a_term_moves_its_counts():
+    old = entry('a.md', ['old', 'keep'])
+    taxonomy = Taxonomy({'a.md': old, 'b.md': entry('b.md', ['old'])})
+    taxonomy.replace(old, entry('a.md', ['new', 'keep']))
+    tags = taxonomy['tags']
+    assert tags.count('old') == 1 and tags.count('new') == 1 and tags.count('keep') == 1
+
+    taxonomy.replace(entry('b.md', ['old']), entry('b.md', ['new']))
+    assert tags.terms() == [('keep', 1), ('new', 2)]
+    assert tags.complete('o') == []
+
+
+def test_removing_the_last_post_drops_the_term():
+    only = entry('a.md', ['solo'])
+    taxonomy = Taxonomy({'a.md': only})
+    taxonomy.replace(only, None)
+    assert taxonomy['tags'].terms() == []
+    assert taxonomy['tags'].posts == {}
+
+
+def write_post(blog, name, tags):
+    path = blog / "content" / "posts" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tag_list = ', '.join(f'"{tag}"' for tag in tags)
+    path.write_text(f'---\ntitle: "{name}"\ntags: [{tag_list}]\n---\n\nbody\n', encoding='utf-8')
+    return path
+
+
+def test_post_index_counts_after_rename_tag(tmp_path):
+    paths = [write_post(tmp_path, "a.md", ["旧标签", "hugo"]), write_post(tmp_path, "b.md", ["旧标签"]),
+             write_post(tmp_path, "c.md", ["新标签"])]
+    index = PostIndex(tmp_path)
+    index.refresh()
+    assert index.term_count('tags', '旧标签') == 2
+
+    # The batch CLI's rename-tag, followed by the index update a save makes
+    for path in paths:
+        _, changed, _, error = process_post(str(path), 'retag',
+                                            {'field': 'tags', 'sources': ['旧标签'], 'target': '新标签'}, False)
+        assert error is None
+        if changed:
+            index.update_file(path)
+
+    assert index.term_count('tags', '旧标签') == 0
+    assert index.term_count('tags', '新标签') == 3
+    assert index.terms('tags') == [('hugo', 1), ('新标签', 3)]
+    assert [e['name'] for e in index.filter(tag='新标签')] == ['a.md', 'b.md', 'c.md']
+
+    # A fresh index loaded from the journal agrees
+    reloaded = PostIndex(tmp_path)
+    reloaded.refresh()
+    assert reloaded.terms('tags') == [('hugo', 1), ('新标签', 3)]
+
+
+def test_renaming_a_post_file_keeps_counts(tmp_path):
+    path = write_post(tmp_path, "a.md", ["x"])
+    index = PostIndex(tmp_path)
+    index.refresh()
+    path.rename(path.with_name("renamed.md"))
+    assert index.refresh() == (['renamed.md'], [], ['a.md'])
+    assert index.term_count('tags', 'x') == 1
+    assert [e['name'] for e in index.filter(tag='x')] == ['renamed.md']
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+Virtualized multi-column list for very large article collections
+"""
+
+import tkinter as tk
+from tkinter import ttk, font as tkfont
+
+
+class VirtualList(ttk.Frame):
+    """只绘制可见行的多列列表
+
+    数据全部保存在 Python 列表中，画布上只保留一屏行数的图元，滚动时复用它们。
+    支持按任意字段排序、键入前缀筛选（Esc 清除）和键盘导航。
+    columns 为 (字段, 标题, 宽度, 格式化函数) 列表，格式化函数接收整行数据，
+    宽度为 None 的列占满剩余空间。
+    """
+
+    ROW_HEIGHT = 22
+    PADDING = 4
+
+    def __init__(self, parent, columns, on_select=None, on_filter=None, id_key='name', width=360, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.columns = columns
+        self.on_select = on_select
+        self.on_filter = on_filter
+        self.id_key = id_key
+
+        self.items = []
+        self.view = []
+        self.sort_key = None
+        self.reverse = False
+        self.prefix = ""
+        self.top = 0
+        self.selected_id = None
+        self.selected = None
+        self.rows = []
+
+        self.font = tkfont.nametofont('TkDefaultFont')
+        self.narrow_width = self.font.measure('n')
+        self.wide_width = self.font.measure('中')
+
+        self.header = tk.Canvas(self, height=self.ROW_HEIGHT, highlightthickness=0, background='#eeeeee')
+        self.canvas = tk.Canvas(self, width=width, highlightthickness=0, background='white', takefocus=True)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+
+        self.header.grid(row=0, column=0, sticky='ew')
+        self.canvas.grid(row=1, column=0, sticky='nsew')
+        self.scrollbar.grid(row=0, column=1, rowspan=2, sticky='ns')
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(1, weight=1)
+
+        self.canvas.bind('<Configure>', lambda e: self.redraw(full=True))
+        self.canvas.bind('<Button-1>', self.on_click)
+        self.canvas.bind('<MouseWheel>', self.on_mousewheel)
+        self.canvas.bind('<Button-4>', lambda e: self.scroll_rows(-3))
+        self.canvas.bind('<Button-5>', lambda e: self.scroll_rows(3))
+        self.canvas.bind('<Up>', lambda e: self.move_selection(-1))
+        self.canvas.bind('<Down>', lambda e: self.move_selection(1))
+        self.canvas.bind('<Prior>', lambda e: self.move_selection(-self.visible_rows()))
+        self.canvas.bind('<Next>', lambda e: self.move_selection(self.visible_rows()))
+        self.canvas.bind('<Home>', lambda e: self.move_selection(-len(self.view)))
+        self.canvas.bind('<End>', lambda e: self.move_selection(len(self.view)))
+        self.canvas.bind('<Escape>', lambda e: self.set_prefix(""))
+        self.canvas.bind('<BackSpace>', lambda e: self.set_prefix(self.prefix[:-1]))
+        self.canvas.bind('<Key>', self.on_key)
+
+    # Data
+
+    def set_items(self, items, ordered=False):
+        """替换全部数据；ordered=True 时保留传入顺序（例如搜索结果）"""
+        self.items = items
+        if ordered:
+            self.sort_key = None
+        self.rebuild_view()
+
+    def sort_by(self, key, reverse=False):
+        self.sort_key = key
+        self.reverse = reverse
+        self.rebuild_view()
+
+    def set_prefix(self, prefix):
+        """键入前缀筛选：标题或文件名以前缀开头的行"""
+        self.prefix = prefix
+        self.rebuild_view()
+        if self.on_filter is not None:
+            self.on_filter(prefix, len(self.view))
+        return "break"
+
+    def rebuild_view(self):
+        view = self.items
+        if self.prefix:
+            prefix = self.prefix.lower()
+            view = [item for item in view
+                    if str(item.get('title', '')).lower().startswith(prefix)
+                    or str(item.get(self.id_key, '')).lower().startswith(prefix)]
+        if self.sort_key is not None:
+            key = self.sort_key
+            view = sorted(view, key=lambda item: item.get(key) or '', reverse=self.reverse)
+        self.view = list(view)
+        self.selected = self.find_index(self.selected_id)
+        self.top = min(self.top, max(len(self.view) - self.visible_rows(), 0))
+        self.redraw(full=True)
+
+    def selected_item(self):
+        return self.view[self.selected] if self.selected is not None else None
+
+    def find_index(self, item_id):
+        if item_id is None:
+            return None
+        for index, item in enumerate(self.view):
+            if item.get(self.id_key) == item_id:
+                return index
+        return None
+
+    # Geometry and scrolling
+
+    def visible_rows(self):
+        height = self.canvas.winfo_height()
+        return max(height // self.ROW_HEIGHT, 1)
+
+    def column_layout(self):
+        """计算每列的 x 坐标和宽度"""
+        total = max(self.canvas.winfo_width(), 1)
+        fixed = sum(width for _, _, width, _ in self.columns if width)
+        flexible = [column for column in self.columns if not column[2]]
+        flex_width = max((total - fixed) // max(len(flexible), 1), 40)
+
+        layout = []
+        x = 0
+        for key, heading, width, formatter in self.columns:
+            width = width or flex_width
+            layout.append((x, width, key, heading, formatter))
+            x += width
+        return layout
+
+    def yview(self, *args):
+        """滚动条回调"""
+        total = len(self.view)
+        visible = self.visible_rows()
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * total)
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            self.top += amount * (visible if args[2] == 'pages' else 1)
+        self.top = max(0, min(self.top, max(total - visible, 0)))
+        self.redraw()
+
+    def scroll_rows(self, amount):
+        self.yview('scroll', amount, 'units')
+
+    def on_mousewheel(self, event):
+        self.scroll_rows(-3 if event.delta > 0 else 3)
+
+    def see(self, index):
+        visible = self.visible_rows()
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + visible:
+            self.top = index - visible + 1
+        self.redraw()
+
+    # Drawing
+
+    def fit_text(self, text, width):
+        """按字符宽度粗略截断文本，避免溢出到下一列"""
+        available = width - 2 * self.PADDING
+        used = 0
+        for i, char in enumerate(text):
+            used += self.wide_width if ord(char) > 0x2e80 else self.narrow_width
+            if used > available:
+                return text[:max(i - 1, 0)] + '…'
+        return text
+
+    def redraw(self, full=False):
+        layout = self.column_layout()
+        visible = self.visible_rows() + 1
+
+        if full:
+            self.draw_header(layout)
+            self.canvas.delete('all')
+            self.rows = []
+
+        # Grow the pool of canvas items to cover the viewport
+        while len(self.rows) < visible:
+            y = len(self.rows) * self.ROW_HEIGHT
+            background = self.canvas.create_rectangle(0, y, 0, y + self.ROW_HEIGHT, width=0, fill='white')
+            cells = [self.canvas.create_text(x + self.PADDING, y + self.ROW_HEIGHT // 2, anchor='w',
+                                             font=self.font)
+                     for x, _, _, _, _ in layout]
+            self.rows.append((background, cells))
+
+        width = max(self.canvas.winfo_width(), 1)
+        selected = self.selected
+        for slot, (background, cells) in enumerate(self.rows):
+            index = self.top + slot
+            y = slot * self.ROW_HEIGHT
+            if index >= len(self.view):
+                self.canvas.itemconfigure(background, fill='white')
+                self.canvas.coords(background, 0, y, width, y + self.ROW_HEIGHT)
+                for cell in cells:
+                    self.canvas.itemconfigure(cell, text='')
+                continue
+
+            item = self.view[index]
+            fill = '#cce4ff' if index == selected else ('white' if index % 2 == 0 else '#f7f7f7')
+            self.canvas.itemconfigure(background, fill=fill)
+            self.canvas.coords(background, 0, y, width, y + self.ROW_HEIGHT)
+            for cell, (x, column_width, key, _, formatter) in zip(cells, layout):
+                text = formatter(item) if formatter else str(item.get(key, ''))
+                self.canvas.itemconfigure(cell, text=self.fit_text(text, column_width))
+
+        total = len(self.view)
+        if total:
+            self.scrollbar.set(self.top / total, min((self.top + visible - 1) / total, 1.0))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def draw_header(self, layout):
+        self.header.delete('all')
+        for x, width, key, heading, _ in layout:
+            if key == self.sort_key:
+                heading += ' ▼' if self.reverse else ' ▲'
+            self.header.create_text(x + self.PADDING, self.ROW_HEIGHT // 2, anchor='w',
+                                    text=self.fit_text(heading, width), font=self.font)
+        if self.prefix:
+            self.header.create_text(self.canvas.winfo_width() - self.PADDING, self.ROW_HEIGHT // 2,
+                                    anchor='e', text=f"筛选: {self.prefix}", fill='#3498db', font=self.font)
+
+    # Interaction
+
+    def select_index(self, index):
+        if not self.view:
+            return
+        index = max(0, min(index, len(self.view) - 1))
+        item = self.view[index]
+        self.selected_id = item.get(self.id_key)
+        self.selected = index
+        self.see(index)
+        if self.on_select is not None:
+            self.on_select(item)
+
+    def on_click(self, event):
+        self.canvas.focus_set()
+        index = self.top + event.y // self.ROW_HEIGHT
+        if index < len(self.view):
+            self.select_index(index)
+
+    def move_selection(self, amount):
+        current = self.selected
+        self.select_index(0 if current is None else current + amount)
+        return "break"
+
+    def on_key(self, event):
+        # Printable characters feed the type-ahead prefix
+        if event.char and event.char.isprintable() and not event.state & 0x4:
+            return self.set_prefix(self.prefix + event.char)
+        return None